@@ -0,0 +1,255 @@
+"""Anuncios programados compartidos entre el bot principal y el cantinero
+
+Un solo archivo (announcements.json) define los mensajes de los dos bots: a qué bot pertenece
+cada uno, su peso y, opcionalmente, una ventana tipo cron en la que puede salir. El tiempo se
+divide en turnos de `slot_seconds` contados desde la época, así que los dos procesos calculan
+las mismas horas absolutas de envío sin hablar entre sí, y los turnos se reparten por orden
+entre los bots de `bots` (el esquema de "un bot cada 60 segundos" de antes).
+
+El canal local es un directorio: cada bot deja un latido (<bot>.alive) y reserva el turno con
+un archivo creado en exclusiva, de modo que un turno no sale dos veces y, si un bot está caído,
+el otro ocupa sus turnos con sus propios mensajes. Con la sala vacía no se gasta la llamada.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+
+import metrics
+
+DEFAULT_PATH = "announcements.json"
+CHANNEL_DIR = os.path.join("data", "announcements")
+SLOT_SECONDS = 60             # segundos entre anuncios (de cualquiera de los bots)
+MIN_ROOM_USERS = 3            # usuarios en sala (bots incluidos) para que merezca la pena anunciar
+HEARTBEAT_SLOTS = 3           # turnos sin latido tras los que un bot se da por caído
+CLAIM_HISTORY = 10            # turnos reservados que se conservan en el canal
+
+
+# ============================================================================
+# VENTANAS CRON
+# ============================================================================
+
+# (mínimo, máximo) de minuto, hora, día del mes, mes y día de la semana (0 = domingo)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+def _parse_field(field: str, low: int, high: int) -> set:
+    """Valores de un campo cron: *, */n, a-b, a-b/n y listas separadas por comas"""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"paso inválido en '{field}'")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = end = int(part)
+        if start < low or end > high or start > end:
+            raise ValueError(f"'{field}' fuera de rango {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expression: str) -> list:
+    """Convierte "min hora día mes díasemana" en una lista de conjuntos de valores permitidos"""
+    fields = expression.split()
+    if len(fields) != len(CRON_FIELDS):
+        raise ValueError(f"la ventana cron necesita 5 campos: '{expression}'")
+    return [_parse_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)]
+
+
+def cron_matches(cron: list, when: float) -> bool:
+    """¿Cae el instante (hora local) dentro de la ventana?"""
+    t = time.localtime(when)
+    weekday = (t.tm_wday + 1) % 7         # time: lunes = 0; cron: domingo = 0
+    return (t.tm_min in cron[0] and t.tm_hour in cron[1] and t.tm_mday in cron[2]
+            and t.tm_mon in cron[3] and weekday in cron[4])
+
+
+# ============================================================================
+# PROGRAMADOR
+# ============================================================================
+
+def slot_at(when: float, slot_seconds: float) -> int:
+    """Número de turno que contiene el instante"""
+    return int(when // slot_seconds)
+
+
+class AnnouncementScheduler:
+    """Envía los anuncios de un bot en los turnos que le tocan.
+
+    send(texto) publica el mensaje; context() devuelve los valores para los {campos} del texto;
+    occupancy() devuelve los usuarios en sala o None si no se sabe (en ese caso se anuncia).
+    """
+
+    def __init__(self, bot: str, send, context=None, occupancy=None,
+                 path: str = DEFAULT_PATH, channel: str = CHANNEL_DIR, logger=print):
+        self.bot = bot
+        self.send = send
+        self.context = context or dict
+        self.occupancy = occupancy
+        self.path = path
+        self.channel = channel
+        self.logger = logger
+        self.config = {}
+        self.messages = []            # [(entrada, ventana cron o None)]
+        self._mtime = None
+        self.sent = 0
+        self.skipped = 0
+
+    # ------------------------------------------------------------------
+    # Configuración
+    # ------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """Relee el archivo si cambió. Con errores se conserva la configuración anterior"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self._mtime is not None or not self.config:
+                self.logger(f"Anuncios: no se encuentra {self.path}")
+                self._mtime = None
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            messages = []
+            for entry in config.get("messages", []):
+                if not entry.get("text") or float(entry.get("weight", 1)) <= 0:
+                    continue
+                cron = parse_cron(entry["cron"]) if entry.get("cron") else None
+                messages.append((entry, cron))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.logger(f"Anuncios: configuración inválida en {self.path}: {e}")
+            return False
+        self.config = config
+        self.messages = messages
+        return True
+
+    @property
+    def slot_seconds(self) -> float:
+        return max(1.0, float(self.config.get("slot_seconds", SLOT_SECONDS)))
+
+    @property
+    def bots(self) -> list:
+        return self.config.get("bots") or [self.bot]
+
+    # ------------------------------------------------------------------
+    # Canal local (latidos y reservas)
+    # ------------------------------------------------------------------
+
+    def heartbeat(self):
+        os.makedirs(self.channel, exist_ok=True)
+        with open(os.path.join(self.channel, f"{self.bot}.alive"), "w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+
+    def is_alive(self, bot: str, now: float) -> bool:
+        if bot == self.bot:
+            return True
+        try:
+            beat = os.path.getmtime(os.path.join(self.channel, f"{bot}.alive"))
+        except OSError:
+            return False
+        return now - beat <= HEARTBEAT_SLOTS * self.slot_seconds
+
+    def claim(self, slot: int) -> bool:
+        """Reserva el turno; False si otro proceso ya lo reservó"""
+        path = os.path.join(self.channel, f"slot-{slot}.claim")
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.bot)
+        self._prune(slot)
+        return True
+
+    def _prune(self, slot: int):
+        for name in os.listdir(self.channel):
+            if not (name.startswith("slot-") and name.endswith(".claim")):
+                continue
+            try:
+                if int(name[5:-6]) < slot - CLAIM_HISTORY:
+                    os.remove(os.path.join(self.channel, name))
+            except (ValueError, OSError):
+                pass
+
+    # ------------------------------------------------------------------
+    # Reparto de turnos
+    # ------------------------------------------------------------------
+
+    def eligible(self, bot: str, when: float) -> list:
+        return [entry for entry, cron in self.messages
+                if entry.get("bot", "any") in (bot, "any") and (cron is None or cron_matches(cron, when))]
+
+    def assign(self, slot: int, now: float | None = None):
+        """(bot, entrada) del turno, igual en todos los procesos que ven los mismos latidos.
+
+        El turno es del bot que toca por orden; si está caído o no tiene mensajes en esta
+        ventana pasa al siguiente. La entrada se elige por peso con el turno como semilla.
+        """
+        now = time.time() if now is None else now
+        when = slot * self.slot_seconds
+        bots = self.bots
+        for offset in range(len(bots)):
+            bot = bots[(slot + offset) % len(bots)]
+            if not self.is_alive(bot, now):
+                continue
+            entries = self.eligible(bot, when)
+            if entries:
+                weights = [float(entry.get("weight", 1)) for entry in entries]
+                return bot, random.Random(slot).choices(entries, weights)[0]
+        return None, None
+
+    def _skip(self, reason: str):
+        self.skipped += 1
+        metrics.inc("announcements_skipped_total", bot=self.bot, reason=reason)
+
+    async def fire(self, slot: int) -> bool:
+        """Envía el anuncio del turno si le toca a este bot"""
+        self.load()
+        self.heartbeat()
+        bot, entry = self.assign(slot)
+        if bot != self.bot:
+            return False
+        users = self.occupancy() if self.occupancy else None
+        if users is not None and users < self.config.get("min_room_users", MIN_ROOM_USERS):
+            self._skip("empty_room")
+            return False
+        if not self.claim(slot):
+            self._skip("claimed")
+            return False
+        try:
+            text = entry["text"].format_map(self.context())
+        except (KeyError, IndexError, ValueError) as e:
+            self.logger(f"Anuncios: no se pudo formatear '{entry['text'][:40]}': {e}")
+            self._skip("format")
+            return False
+        await self.send(text)
+        self.sent += 1
+        metrics.inc("announcements_sent_total", bot=self.bot)
+        return True
+
+    async def run(self):
+        """Bucle: duerme hasta el inicio absoluto del siguiente turno y lo atiende"""
+        self.load()
+        await asyncio.to_thread(self.heartbeat)
+        while True:
+            slot = slot_at(time.time(), self.slot_seconds) + 1
+            await asyncio.sleep(max(0.0, slot * self.slot_seconds - time.time()))
+            try:
+                if await self.fire(slot):
+                    self.logger(f"📢 Anuncio ({self.bot}) en el turno {slot}")
+            except Exception as e:
+                self.logger(f"Error en anuncios ({self.bot}): {type(e).__name__}: {e}")
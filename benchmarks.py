@@ -0,0 +1,269 @@
+"""Microbenchmarks de las rutas calientes de main.py
+
+Uso:
+    python benchmarks.py                          # suite completa, JSON por stdout
+    python benchmarks.py --quick --output bench.json
+    python benchmarks.py --quick --compare bench_baseline.json --tolerance 0.25
+
+Con --compare el proceso termina con código 1 si algún benchmark es más lento que
+la línea base más allá de la tolerancia (para CI).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import simulator
+
+SIZES = (1000, 10000, 100000)
+QUICK_SIZES = (1000, 10000)
+
+
+class BenchContext:
+    """Bot cargado en un directorio temporal con un cliente Highrise sin latencia"""
+
+    def __init__(self):
+        self.workdir = simulator.prepare_workdir()
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.workdir)
+        self.main, _ = simulator.load_bot_classes()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        options = simulator.SimOptions(latency_ms=0.0, jitter_ms=0.0, rate_limit=0, error_rate=0.0)
+        room = simulator.FakeRoom()
+        self.bot = self.main.Bot()
+        self.bot.highrise = simulator.FakeHighrise(room, simulator.MAIN_BOT_ID, options, random.Random(0))
+        self.bot.bot_id = simulator.MAIN_BOT_ID
+        self.user = self.main.User(id="bench_user", username="bench_user")
+        for i in range(30):
+            user = self.main.User(id=f"room_{i:03d}", username=f"room_{i:03d}")
+            room.add_user(user, self.main.Position(float(i % 10), 0.0, float(i // 10)))
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def populate_users(self, count: int):
+        """Llena los diccionarios globales con `count` usuarios sintéticos"""
+        main = self.main
+        self.clear_users()
+        now = datetime.now()
+        for i in range(count):
+            user_id = f"{i:024x}"
+            main.USER_NAMES[user_id] = f"user_{i}"
+            main.USER_HEARTS[user_id] = (i * 7919) % 5000
+            main.USER_ACTIVITY[user_id] = {"messages": (i * 104729) % 9000, "last_activity": now - timedelta(minutes=i)}
+            main.USER_INFO[user_id] = {
+                "username": f"user_{i}", "first_seen": now - timedelta(days=i % 400),
+                "total_time_in_room": i * 13, "time_joined": 0,
+            }
+
+    def clear_users(self):
+        main = self.main
+        for table in (main.USER_NAMES, main.USER_HEARTS, main.USER_ACTIVITY, main.USER_INFO):
+            table.clear()
+
+    def close(self):
+        self.clear_users()
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        self.loop.close()
+        os.chdir(self.previous_cwd)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def measure(func, iterations: int, repeat: int) -> dict:
+    """Ejecuta func `iterations` veces por ronda y devuelve tiempos por operación en µs"""
+    per_op = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        per_op.append((time.perf_counter_ns() - start) / iterations / 1000)
+    return {
+        "iterations": iterations,
+        "repeat": repeat,
+        "min_us": round(min(per_op), 3),
+        "median_us": round(statistics.median(per_op), 3),
+        "mean_us": round(statistics.fmean(per_op), 3),
+    }
+
+
+def measure_async(ctx: BenchContext, factory, iterations: int, repeat: int) -> dict:
+    """Como measure, pero para corrutinas; cada ronda se ejecuta en el mismo event loop"""
+    async def batch():
+        for _ in range(iterations):
+            await factory()
+
+    per_op = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        ctx.run(batch())
+        per_op.append((time.perf_counter_ns() - start) / iterations / 1000)
+    return {
+        "iterations": iterations,
+        "repeat": repeat,
+        "min_us": round(min(per_op), 3),
+        "median_us": round(statistics.median(per_op), 3),
+        "mean_us": round(statistics.fmean(per_op), 3),
+    }
+
+
+def run_suite(sizes=SIZES, repeat: int = 5, only: str | None = None) -> dict:
+    """Ejecuta todos los benchmarks y devuelve {nombre: resultado}"""
+    results = {}
+    ctx = BenchContext()
+    main, bot, user = ctx.main, ctx.bot, ctx.user
+
+    def record(name, thunk):
+        if only and only not in name:
+            return
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = thunk()
+
+    try:
+        # Despacho de comandos
+        record("handle_command/command_myid", lambda: measure_async(
+            ctx, lambda: bot.handle_command(user, "!myid", False), 2000, repeat))
+        record("handle_command/plain_text", lambda: measure_async(
+            ctx, lambda: bot.handle_command(user, "hola a todos que tal la noche", False), 2000, repeat))
+        record("handle_command/unknown_command", lambda: measure_async(
+            ctx, lambda: bot.handle_command(user, "!noexiste", False), 2000, repeat))
+
+        # Resolución de emotes
+        record("find_emote/number", lambda: measure(lambda: main.find_emote("150"), 20000, repeat))
+        record("find_emote/name_last", lambda: measure(lambda: main.find_emote("mindblown"), 5000, repeat))
+        record("find_emote/miss", lambda: measure(lambda: main.find_emote("no-existe"), 5000, repeat))
+
+        # Zonas prohibidas
+        saved_zones = list(main.FORBIDDEN_ZONES)
+        for zones in (10, 100, 1000):
+            main.FORBIDDEN_ZONES[:] = [{"x": 100.0 + i, "y": 0.0, "z": 100.0 + i, "radius": 0.5} for i in range(zones)]
+            record(f"is_in_forbidden_zone/{zones}_zones", lambda: measure(
+                lambda: bot.is_in_forbidden_zone(5.0, 12.0, 5.0, user.id), 2000, repeat))
+        main.FORBIDDEN_ZONES[:] = saved_zones
+
+        # Movimiento (sin cambio de piso y con flashmode en cooldown)
+        low = main.Position(3.0, 0.0, 3.0)
+        high = main.Position(3.0, 12.0, 3.0)
+        state = {"flip": False}
+
+        def move():
+            state["flip"] = not state["flip"]
+            return bot.on_user_move(user, high if state["flip"] else low)
+
+        bot.flashmode_cooldown[user.id] = time.time() + 10 ** 6
+        record("on_user_move/floor_change_cooldown", lambda: measure_async(ctx, move, 5000, repeat))
+        record("on_user_move/same_floor", lambda: measure_async(
+            ctx, lambda: bot.on_user_move(user, low), 5000, repeat))
+
+        # Utilidades puras
+        record("convert_to_gold_bars", lambda: measure(lambda: bot.convert_to_gold_bars(16789), 20000, repeat))
+        main.VIP_USERS.add("vip_user")
+        for name, uid, uname in (
+            ("owner", main.OWNER_ID, "owner"),
+            ("vip", "vip_id", "vip_user"),
+            ("user", user.id, user.username),
+        ):
+            main.USER_NAMES[uid] = uname
+            record(f"get_help_for_user/{name}", lambda uid=uid, uname=uname: measure(
+                lambda: bot.get_help_for_user(uid, uname), 5000, repeat))
+
+        # Persistencia y leaderboards por tamaño
+        for size in sizes:
+            ctx.populate_users(size)
+            rounds = max(1, min(repeat, 3 if size >= 100000 else repeat))
+            iterations = max(1, 20000 // size)
+            record(f"save_leaderboard_data/{size}", lambda: measure(main.save_leaderboard_data, iterations, rounds))
+            main.save_user_info()
+            record(f"save_snapshot/{size}", lambda: measure(main.save_snapshot, iterations, rounds))
+
+            def load_text():
+                ctx.clear_users()
+                bot.load_text_data()
+
+            def load():
+                ctx.clear_users()
+                bot.load_data()
+
+            record(f"load_data_text/{size}", lambda: measure(load_text, iterations, rounds))
+            main.save_snapshot()
+            record(f"load_data/{size}", lambda: measure(load, iterations, rounds))
+            ctx.populate_users(size)
+            record(f"leaderboard_heart/{size}", lambda: measure_async(
+                ctx, lambda: bot.handle_command(user, "!leaderboard heart", False), max(1, 200000 // size), rounds))
+            record(f"leaderboard_active/{size}", lambda: measure_async(
+                ctx, lambda: bot.handle_command(user, "!leaderboard active", False), max(1, 200000 // size), rounds))
+    finally:
+        ctx.close()
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Lista de regresiones (nombre, base µs, actual µs, ratio)"""
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append((name, base["median_us"], result["median_us"], round(ratio, 2)))
+    return regressions
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks de las rutas calientes del bot")
+    parser.add_argument("--quick", action="store_true", help="Tamaños 1k/10k y menos rondas (CI)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Ejecutar solo benchmarks cuyo nombre contenga este texto")
+    parser.add_argument("--output", help="Guardar resultados JSON en este archivo")
+    parser.add_argument("--compare", help="Archivo JSON de línea base para detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Margen permitido (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    repeat = min(args.repeat, 3) if args.quick else args.repeat
+    # Los print de main.py (guardados, arranque) van a stderr: stdout lleva solo el informe JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_suite(QUICK_SIZES if args.quick else SIZES, repeat, args.only)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare(results, baseline, args.tolerance)
+        report["regressions"] = [
+            {"name": name, "baseline_us": base, "current_us": cur, "ratio": ratio}
+            for name, base, cur, ratio in regressions
+        ]
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,194 @@
+"""Contenedores acotados para estado transitorio por usuario: mapa con TTL, mapa LRU y conjunto que expira
+
+Todas las operaciones son O(1). La expiración es perezosa (al leer) y periódica (purge_loop),
+y cada contenedor cuenta sus desalojos para /metrics.
+"""
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping, MutableSet
+
+import metrics
+
+PURGE_INTERVAL = 60           # segundos entre barridos periódicos
+PURGE_BATCH = 1000            # desalojos máximos por contenedor en cada barrido
+
+_stores = {}                  # id -> weakref al contenedor
+
+
+class _BoundedMixin:
+    """Contabilidad común: nombre, desalojos y registro para métricas"""
+
+    def _register(self, name: str):
+        self.name = name
+        self.evictions = 0
+        key = id(self)
+        _stores[key] = weakref.ref(self, lambda _, key=key: _stores.pop(key, None))
+
+    def _evicted(self, count: int = 1):
+        self.evictions += count
+        metrics.inc("store_evictions_total", count, store=self.name)
+
+    def stats(self) -> dict:
+        return {"name": self.name, "size": len(self), "evictions": self.evictions}
+
+
+class TTLMap(_BoundedMixin, MutableMapping):
+    """Mapa cuyas entradas caducan `ttl` segundos después de la última escritura.
+
+    Como el TTL es fijo, el orden de inserción (refrescado con move_to_end) coincide con el
+    de caducidad y el barrido solo mira el principio de la cola. maxsize opcional desaloja
+    las entradas más antiguas.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int | None = None, clock=time.monotonic):
+        self._data = OrderedDict()    # clave -> (expira, valor)
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._register(name)
+
+    def __setitem__(self, key, value):
+        data = self._data
+        if key in data:
+            data.move_to_end(key)
+        data[key] = (self._clock() + self.ttl, value)
+        if self.maxsize is not None and len(data) > self.maxsize:
+            data.popitem(last=False)
+            self._evicted()
+
+    def __getitem__(self, key):
+        expires, value = self._data[key]
+        if expires <= self._clock():
+            del self._data[key]
+            self._evicted()
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        now = self._clock()
+        return (key for key, (expires, _) in list(self._data.items()) if expires > now)
+
+    def __len__(self):
+        # Las caducadas están al principio de la cola: quitarlas es O(caducadas), como el barrido
+        self.purge()
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def purge(self, limit: int | None = None) -> int:
+        """Elimina entradas caducadas desde el principio de la cola"""
+        data = self._data
+        now = self._clock()
+        removed = 0
+        while data and (limit is None or removed < limit):
+            key, (expires, _) = next(iter(data.items()))
+            if expires > now:
+                break
+            del data[key]
+            removed += 1
+        if removed:
+            self._evicted(removed)
+        return removed
+
+
+class LRUMap(_BoundedMixin, OrderedDict):
+    """Diccionario con tamaño máximo; al superarlo desaloja la entrada escrita hace más tiempo.
+
+    Es un dict real (se puede serializar tal cual); la recencia se actualiza al escribir,
+    no al leer, para no penalizar las lecturas.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+        self._register(name)
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.move_to_end(key)
+        OrderedDict.__setitem__(self, key, value)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+            self._evicted()
+
+    def purge(self, limit: int | None = None) -> int:
+        return 0
+
+
+class ExpiringSet(MutableSet):
+    """Conjunto cuyos elementos caducan `ttl` segundos después de añadirse"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int | None = None, clock=time.monotonic):
+        # El mapa interno es el que se registra y cuenta los desalojos
+        self._map = TTLMap(name, ttl, maxsize, clock)
+
+    def add(self, item):
+        self._map[item] = True
+
+    def discard(self, item):
+        self._map.pop(item, None)
+
+    def __contains__(self, item):
+        return item in self._map
+
+    def __iter__(self):
+        return iter(self._map)
+
+    def __len__(self):
+        return len(self._map)
+
+    def clear(self):
+        self._map.clear()
+
+    def purge(self, limit: int | None = None) -> int:
+        return self._map.purge(limit)
+
+    def stats(self) -> dict:
+        return self._map.stats()
+
+
+# ============================================================================
+# BARRIDO PERIÓDICO Y MÉTRICAS
+# ============================================================================
+
+def _live_stores() -> list:
+    return [store for store in (ref() for ref in list(_stores.values())) if store is not None]
+
+
+def purge_all(limit: int | None = PURGE_BATCH) -> int:
+    """Barre todos los contenedores vivos del proceso"""
+    return sum(store.purge(limit) for store in _live_stores())
+
+
+async def purge_loop(interval: float = PURGE_INTERVAL):
+    """Tarea en segundo plano que barre los contenedores cada `interval` segundos"""
+    while True:
+        await asyncio.sleep(interval)
+        purge_all()
+
+
+def collect_metrics():
+    """Collector para metrics: tamaño actual de cada contenedor (sumado si varios bots del proceso usan el mismo nombre)"""
+    sizes = {}
+    for store in _live_stores():
+        sizes[store.name] = sizes.get(store.name, 0) + len(store)
+    for name, size in sizes.items():
+        metrics.set_gauge("store_size", size, store=name)
+
+
+def stats() -> list:
+    return [store.stats() for store in _live_stores()]
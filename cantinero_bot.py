@@ -7,6 +7,31 @@ import sys
 import json
 import os
 
+import announcements
+import bounded_store
+import dispatcher
+import emote_calibration
+import emote_catalog
+import emote_scheduler
+import instrumentation
+import message_coalescer
+import metrics
+import presence
+import task_registry
+
+CALL_BLOCK_SECONDS = 24 * 3600  # tiempo que un usuario queda bloqueado tras llamar al cantinero
+
+# Catálogo completo de 224 emotes (compartido con el bot principal)
+EMOTES = emote_catalog.EMOTES
+
+# Duraciones calibradas con lo observado (compartidas con el bot principal); el catálogo es la estimación inicial
+EMOTE_CALIBRATION = emote_calibration.EmoteCalibration("data/emote_calibration.json", "Cantinero")
+EMOTE_CALIBRATION.seed({e["id"]: e["duration"] for e in EMOTES.values()})
+
+def save_all_data():
+    """Guarda el estado persistente del cantinero (apagado del launcher de proceso único)"""
+    EMOTE_CALIBRATION.save()
+
 def safe_print(message: str):
     """Imprime mensaje de forma segura en Windows, manejando errores de encoding"""
     try:
@@ -24,12 +49,13 @@ class BartenderBot(BaseBot):
 
     def __init__(self):
         super().__init__()
-        self.current_message_index = 0
         self.bot_id = None
         self.is_in_call = False
         self.call_partner = None
-        self.users_called = set()  # Usuarios que ya llamaron (solo pueden llamar 1 vez)
-        self.users_blocked_notified = set()  # Usuarios que ya recibieron mensaje de bloqueo
+        # Usuarios que ya llamaron (solo pueden llamar 1 vez al día)
+        self.users_called = bounded_store.ExpiringSet("users_called", ttl=CALL_BLOCK_SECONDS, maxsize=10000)
+        # Usuarios que ya recibieron mensaje de bloqueo
+        self.users_blocked_notified = bounded_store.ExpiringSet("users_blocked_notified", ttl=CALL_BLOCK_SECONDS, maxsize=10000)
 
         # Sistema de emotes en bucle
         self.current_emote = "emote-ghost-idle"  # ghostfloat - emote por defecto
@@ -39,6 +65,19 @@ class BartenderBot(BaseBot):
         self.owner_id = None
         self.admin_ids = []
 
+        # Bucles en segundo plano: uno vivo por nombre aunque on_start se repita
+        self.tasks = task_registry.TaskRegistry("Bot Cantinero", logger=safe_print)
+        # Eventos en colas por usuario (la escena de llamada no bloquea a los demás)
+        self.dispatcher = dispatcher.EventDispatcher("Bot Cantinero", logger=safe_print)
+        self.outbox = message_coalescer.Outbox("Bot Cantinero", logger=safe_print)
+        # Anuncios automáticos: turnos compartidos con el bot principal (announcements.json)
+        self.announcements = announcements.AnnouncementScheduler(
+            "cantinero", lambda text: self.highrise.chat(text), context=self.announcement_context,
+            occupancy=self.occupancy, logger=safe_print)
+        # Lista de sala y estado compartidos con el bot principal a través del launcher
+        self.presence = presence.PresenceBus("cantinero", logger=safe_print)
+        self.room_users = None  # usuarios en el último get_room_users (metrics.instrument_bot)
+
         # Lista de bebidas para el comando !trago
         self.bebidas = [
             "🍺 Una cerveza bien fría",
@@ -91,15 +130,22 @@ class BartenderBot(BaseBot):
         weekday = local_time.weekday()
         return days[weekday]
 
-    def get_auto_messages(self):
-        """Lista de mensajes automáticos incluyendo el día de la semana"""
-        return [
-            self.get_day_message(),
-            "‼️¿Sugerencias o incomodidades? Contacta a un miembro superior de la sala: envía un mensaje a @Alber_JG_69 o a @_Kmi.77. ¡Estamos para ayudarte!‼️",
-            "¡Consigue tu VIP Permanente!💎 Para ser un miembro eterno de 🕷️ NOCTURNO 🕷️, Mándale 100 de oro al bot: @NOCTURNO_BOT. ¡Gracias por apoyar la oscuridad!",
-            "👉🏼PIDE TU CANCIÓN FAVORITA EN LA JARRITA DE TIP👈🏼",
-            "Acércate a la barra.🥃 Estoy para servirle. ¿Qué deseas hoy?🍻"
-        ]
+    def occupancy(self):
+        """Usuarios en la sala: la lista compartida si es reciente, si no el último get_room_users"""
+        users = self.presence.shared_users(presence.ROSTER_MAX_AGE)
+        return len(users) if users is not None else self.room_users
+
+    def collect_metrics(self):
+        """Actualiza los gauges del cantinero antes de cada snapshot de métricas"""
+        metrics.set_gauge("active_emote_loops", 1 if self.emote_loop_active and not self.is_in_call else 0,
+                          bot=self.tasks.owner)
+        users = self.occupancy()
+        if users is not None:
+            metrics.set_gauge("room_users", users, bot=self.tasks.owner)
+
+    def announcement_context(self) -> dict:
+        """Valores para los {campos} de los anuncios del cantinero"""
+        return {"day_message": self.get_day_message()}
 
     async def on_start(self, session_metadata: SessionMetadata) -> None:
         """Se ejecuta cuando el bot se conecta a la sala"""
@@ -107,6 +153,24 @@ class BartenderBot(BaseBot):
         safe_print(f"🕷️ Bot Cantinero NOCTURNO iniciado! ID: {self.bot_id}")
         safe_print(f"🕷️ User ID: {session_metadata.user_id}")
 
+        # Métricas para /metrics del launcher; chat y susurros pasan por el buzón de salida
+        self.highrise = self.outbox.unwrap(self.highrise)
+        metrics.instrument_bot(self)
+        self.highrise = self.outbox.wrap(self.highrise)
+        metrics.add_collector(self.collect_metrics)
+        metrics.add_collector(self.outbox.collect_metrics)
+        metrics.add_collector(self.tasks.collect_metrics)
+        metrics.add_collector(bounded_store.collect_metrics)
+        metrics.add_collector(self.dispatcher.collect_metrics)
+        metrics.add_collector(EMOTE_CALIBRATION.collect_metrics)
+
+        # Duraciones calibradas (propias y del bot principal)
+        try:
+            calibrated = await asyncio.to_thread(EMOTE_CALIBRATION.load)
+            safe_print(f"✅ Calibración de emotes cargada: {calibrated} emotes con muestras")
+        except Exception as e:
+            safe_print(f"⚠️ Error cargando calibración de emotes: {e}")
+
         # Cargar configuración de admin/owner desde config.json del bot principal
         try:
             with open("config.json", "r", encoding="utf-8") as f:
@@ -132,50 +196,57 @@ class BartenderBot(BaseBot):
 
         # Iniciar todos los loops con manejo de errores
         try:
-            asyncio.create_task(self.emote_loop())
+            self.tasks.start("emote_loop", self.emote_loop)
             safe_print(f"✅ Emote loop iniciado con: {self.current_emote} (ghostfloat)")
         except Exception as e:
             safe_print(f"❌ Error iniciando emote_loop: {e}")
 
         try:
-            asyncio.create_task(self.auto_message_loop())
-            safe_print("✅ Auto message loop iniciado")
+            self.tasks.start("auto_messages", self.announcements.run)
+            safe_print("✅ Anuncios automáticos iniciados")
         except Exception as e:
-            safe_print(f"❌ Error iniciando auto_message_loop: {e}")
+            safe_print(f"❌ Error iniciando anuncios automáticos: {e}")
+
+        if self.presence.address is not None:
+            self.tasks.start("presence_bus", self.presence.run)
+            self.tasks.start("presence_loops", lambda: self.presence.share_loops(lambda: {self.bot_id}))
 
         try:
-            asyncio.create_task(self.auto_reconnect_loop())
+            self.tasks.start("auto_reconnect", self.auto_reconnect_loop)
             safe_print("✅ Auto reconnect loop iniciado")
         except Exception as e:
             safe_print(f"❌ Error iniciando auto_reconnect_loop: {e}")
 
+        # Barrido periódico de los contenedores con TTL
+        self.tasks.start("store_purge", bounded_store.purge_loop)
+        self.tasks.start("emote_calibration_save", EMOTE_CALIBRATION.save_loop)
+
+        for index in range(dispatcher.DEFAULT_WORKERS):
+            self.tasks.start(f"dispatch_worker_{index}", self.dispatcher.worker)
+
     async def emote_loop(self) -> None:
         """Loop infinito que ejecuta el emote configurado en bucle"""
         await asyncio.sleep(5)  # Esperar al inicio
         consecutive_errors = 0
         max_consecutive_errors = 3
 
-        # Duraciones aproximadas de emotes comunes (en segundos)
-        emote_durations = {
-            "emote-ghost-idle": 20.43,  # ghostfloat
-            "emote-dab": 3.75,
-            "dance-gangnamstyle": 15.0,
-            "idle-floating": 27.60,  # fairyfloat
-            "emote-looping": 9.89,  # fairytwirl
-        }
+        def active():
+            return self.emote_loop_active and not self.is_in_call
 
+        scheduler = emote_scheduler.EmoteScheduler("cantinero", calibration=EMOTE_CALIBRATION)
         while True:
             try:
                 # Solo ejecutar si el loop está activo y no está en llamada
-                if self.emote_loop_active and not self.is_in_call:
-                    await self.highrise.send_emote(self.current_emote)
+                if active():
+                    emote = self.current_emote
+                    # Duración del catálogo corregida por la calibración (la por defecto si no está)
+                    await scheduler.play(lambda: self.highrise.send_emote(emote), emote, None, active)
                     consecutive_errors = 0
-
-                    emote_duration = emote_durations.get(self.current_emote, 10.0)
-                    await asyncio.sleep(max(0.5, emote_duration - 0.3))
                 else:
+                    scheduler.reset()
                     await asyncio.sleep(2)
             except Exception as e:
+                scheduler.reset()
                 consecutive_errors += 1
                 safe_print(f"⚠️ [CANTINERO] Error emote ({consecutive_errors}/{max_consecutive_errors}): {type(e).__name__}: {e}")
 
@@ -186,37 +257,6 @@ class BartenderBot(BaseBot):
                 if consecutive_errors >= max_consecutive_errors:
                     consecutive_errors = 0
 
-    async def auto_message_loop(self) -> None:
-        """Loop que envía mensajes automáticos públicos cada 2 minutos"""
-        await asyncio.sleep(120)
-        consecutive_errors = 0
-        max_consecutive_errors = 3
-
-        while True:
-            try:
-                auto_messages = self.get_auto_messages()
-                message = auto_messages[self.current_message_index]
-
-                # Enviar mensaje público en el chat
-                await self.highrise.chat(message)
-
-                self.current_message_index = (self.current_message_index + 1) % len(auto_messages)
-                consecutive_errors = 0  # Resetear en caso de éxito
-                safe_print(f"📢 Mensaje automático público enviado: {message[:50]}...")
-            except Exception as e:
-                consecutive_errors += 1
-                safe_print(f"❌ Error en auto_message_loop ({consecutive_errors}/{max_consecutive_errors}): {type(e).__name__}: {e}")
-
-                # Si hay muchos errores, esperar más
-                if consecutive_errors >= max_consecutive_errors:
-                    safe_print(f"⚠️ Demasiados errores en mensajes automáticos, pausando 5 minutos...")
-                    await asyncio.sleep(300)  # 5 minutos
-                    consecutive_errors = 0
-
-            # Esperar 2 minutos (120 segundos) para el siguiente mensaje
-            await asyncio.sleep(120)
-
-
     async def auto_reconnect_loop(self):
         """Sistema de reconexión automática mejorado con mejor logging"""
         consecutive_failures = 0
@@ -232,13 +272,16 @@ class BartenderBot(BaseBot):
 
                 # Verificar si el bot está en la sala
                 try:
-                    room_users = await self.highrise.get_room_users()
-                    if isinstance(room_users, Error):
-                        safe_print(f"[{current_time}] ❌ Error API: {room_users.message}")
-                        raise Exception(f"Error API obteniendo usuarios: {room_users.message}")
+                    # La lista publicada por el bot principal ahorra el sondeo si es reciente
+                    users = self.presence.shared_users(presence.ROSTER_MAX_AGE)
+                    if users is None:
+                        room_users = await self.highrise.get_room_users()
+                        if isinstance(room_users, Error):
+                            safe_print(f"[{current_time}] ❌ Error API: {room_users.message}")
+                            raise Exception(f"Error API obteniendo usuarios: {room_users.message}")
+                        users = self.presence.publish_roster(room_users.content)
 
-                    users = room_users.content
-                    bot_in_room = any(u.id == self.bot_id for u, _ in users)
+                    bot_in_room = self.bot_id in users
 
                     if bot_in_room:
                         consecutive_failures = 0  # Resetear contador si está conectado
@@ -284,6 +327,7 @@ class BartenderBot(BaseBot):
                 room_users = await self.highrise.get_room_users()
                 if not isinstance(room_users, Error):
                     safe_print("✅ Reconexión exitosa del bot cantinero!")
+                    metrics.inc("reconnects_total")
 
                     # Esperar antes de reiniciar tareas
                     await asyncio.sleep(2)
@@ -310,6 +354,13 @@ class BartenderBot(BaseBot):
         safe_print("🔄 El bot seguirá intentando reconectar...")
         return False
 
+    @dispatcher.dispatched(key=lambda self, user, message: user.id,
+                           priority=lambda self, user, message: dispatcher.is_moderation(message))
+    @instrumentation.traced(
+        "on_chat",
+        key=lambda self, user, message: metrics.command_key(message.strip()),
+        context=lambda self, user, message: {"user": user.username},
+    )
     async def on_chat(self, user: User, message: str) -> None:
         """Detectar cuando mencionan al bot cantinero o usan comando !trago"""
         msg = message.strip()
@@ -354,231 +405,7 @@ class BartenderBot(BaseBot):
                 safe_print(f"❌ Error en !copy: {e}")
             return
 
-        # Catálogo completo de 224 emotes (mismo que bot principal)
-        emotes = {
-            "1": {"id": "emote-looping", "name": "fairytwirl", "duration": 9.89},
-            "2": {"id": "idle-floating", "name": "fairyfloat", "duration": 27.60},
-            "3": {"id": "emote-launch", "name": "launch", "duration": 10.88},
-            "4": {"id": "emote-cutesalute", "name": "cutesalute", "duration": 3.79},
-            "5": {"id": "emote-salute", "name": "atattention", "duration": 4.79},
-            "6": {"id": "dance-tiktok11", "name": "tiktok", "duration": 11.37},
-            "7": {"id": "emote-kissing", "name": "smooch", "duration": 6.69},
-            "8": {"id": "dance-employee", "name": "pushit", "duration": 8.55},
-            "9": {"id": "emote-gift", "name": "foryou", "duration": 6.09},
-            "10": {"id": "dance-touch", "name": "touch", "duration": 13.15},
-            "11": {"id": "dance-kawai", "name": "kawaii", "duration": 10.85},
-            "12": {"id": "sit-relaxed", "name": "repose", "duration": 31.21},
-            "13": {"id": "emote-sleigh", "name": "sleigh", "duration": 12.51},
-            "14": {"id": "emote-hyped", "name": "hyped", "duration": 7.62},
-            "15": {"id": "dance-jinglebell", "name": "jingle", "duration": 12.09},
-            "16": {"id": "idle-toilet", "name": "gottago", "duration": 33.48},
-            "17": {"id": "emote-timejump", "name": "timejump", "duration": 5.51},
-            "18": {"id": "idle-wild", "name": "scritchy", "duration": 27.35},
-            "19": {"id": "idle-nervous", "name": "bitnervous", "duration": 22.81},
-            "20": {"id": "emote-iceskating", "name": "iceskating", "duration": 8.41},
-            "21": {"id": "emote-celebrate", "name": "partytime", "duration": 4.35},
-            "22": {"id": "emote-pose10", "name": "arabesque", "duration": 5.00},
-            "23": {"id": "emote-shy2", "name": "bashful", "duration": 6.34},
-            "24": {"id": "emote-headblowup", "name": "revelations", "duration": 13.66},
-            "25": {"id": "emote-creepycute", "name": "watchyourback", "duration": 9.01},
-            "26": {"id": "dance-creepypuppet", "name": "creepypuppet", "duration": 7.79},
-            "27": {"id": "dance-anime", "name": "saunter", "duration": 9.60},
-            "28": {"id": "emote-pose6", "name": "surprise", "duration": 6.46},
-            "29": {"id": "emote-celebrationstep", "name": "celebration", "duration": 5.18},
-            "30": {"id": "dance-pinguin", "name": "penguin", "duration": 12.81},
-            "31": {"id": "emote-boxer", "name": "boxer", "duration": 6.75},
-            "32": {"id": "idle-guitar", "name": "airguitar", "duration": 14.15},
-            "33": {"id": "emote-stargazer", "name": "stargaze", "duration": 7.93},
-            "34": {"id": "emote-pose9", "name": "ditzy", "duration": 6.00},
-            "35": {"id": "idle-uwu", "name": "uwu", "duration": 25.50},
-            "36": {"id": "dance-wrong", "name": "wrong", "duration": 13.60},
-            "37": {"id": "emote-fashionista", "name": "fashion", "duration": 6.33},
-            "38": {"id": "dance-icecream", "name": "icecream", "duration": 16.58},
-            "39": {"id": "idle-dance-tiktok4", "name": "sayso", "duration": 16.55},
-            "40": {"id": "idle_zombie", "name": "zombie", "duration": 31.39},
-            "41": {"id": "emote-astronaut", "name": "astronaut", "duration": 13.93},
-            "42": {"id": "emote-punkguitar", "name": "punk", "duration": 10.59},
-            "43": {"id": "emote-gravity", "name": "zerogravity", "duration": 9.02},
-            "44": {"id": "emote-pose5", "name": "beautiful", "duration": 5.49},
-            "46": {"id": "idle-dance-casual", "name": "casual", "duration": 9.57},
-            "47": {"id": "emote-pose1", "name": "wink", "duration": 4.71},
-            "48": {"id": "emote-pose3", "name": "fightme", "duration": 5.57},
-            "50": {"id": "emote-cute", "name": "cute", "duration": 7.20},
-            "51": {"id": "emote-cutey", "name": "cutey", "duration": 4.07},
-            "52": {"id": "emote-greedy", "name": "greedy", "duration": 5.72},
-            "53": {"id": "dance-tiktok9", "name": "viralgroove", "duration": 13.04},
-            "54": {"id": "dance-weird", "name": "weird", "duration": 22.87},
-            "55": {"id": "dance-tiktok10", "name": "shuffle", "duration": 9.41},
-            "56": {"id": "emoji-gagging", "name": "gagging", "duration": 6.84},
-            "57": {"id": "emoji-celebrate", "name": "raise", "duration": 4.78},
-            "58": {"id": "dance-tiktok8", "name": "savage", "duration": 13.10},
-            "59": {"id": "dance-blackpink", "name": "blackpink", "duration": 7.97},
-            "60": {"id": "emote-model", "name": "model", "duration": 7.43},
-            "61": {"id": "dance-tiktok2", "name": "dontstartnow", "duration": 11.37},
-            "62": {"id": "dance-pennywise", "name": "pennywise", "duration": 4.16},
-            "63": {"id": "emote-bow", "name": "bow", "duration": 5.10},
-            "64": {"id": "dance-russian", "name": "russian", "duration": 11.39},
-            "65": {"id": "emote-curtsy", "name": "curtsy", "duration": 3.99},
-            "66": {"id": "emote-snowball", "name": "snowball", "duration": 6.32},
-            "67": {"id": "emote-hot", "name": "hot", "duration": 5.57},
-            "68": {"id": "emote-snowangel", "name": "snowangel", "duration": 7.33},
-            "69": {"id": "emote-charging", "name": "charging", "duration": 9.53},
-            "70": {"id": "dance-shoppingcart", "name": "letsgoshopping", "duration": 5.56},
-            "71": {"id": "emote-confused", "name": "confused", "duration": 9.58},
-            "72": {"id": "idle-enthusiastic", "name": "enthused", "duration": 17.53},
-            "73": {"id": "emote-telekinesis", "name": "telekinesis", "duration": 11.01},
-            "74": {"id": "emote-float", "name": "float", "duration": 9.26},
-            "75": {"id": "emote-teleporting", "name": "teleporting", "duration": 12.89},
-            "76": {"id": "emote-swordfight", "name": "swordfight", "duration": 7.71},
-            "77": {"id": "emote-maniac", "name": "maniac", "duration": 5.94},
-            "78": {"id": "emote-energyball", "name": "energyball", "duration": 8.28},
-            "79": {"id": "emote-snake", "name": "worm", "duration": 6.63},
-            "80": {"id": "idle_singing", "name": "singalong", "duration": 11.31},
-            "81": {"id": "emote-frog", "name": "frog", "duration": 16.14},
-            "82": {"id": "dance-macarena", "name": "macarena", "duration": 15.0},
-            "83": {"id": "emote-kissing-passionate", "name": "kiss", "duration": 10.47},
-            "84": {"id": "emoji-shake-head", "name": "shakehead", "duration": 3.5},
-            "85": {"id": "idle-sad", "name": "sad", "duration": 25.24},
-            "86": {"id": "emoji-nod", "name": "nod", "duration": 2.5},
-            "87": {"id": "emote-laughing2", "name": "laughing", "duration": 6.60},
-            "88": {"id": "emoji-hello", "name": "hello", "duration": 3.0},
-            "89": {"id": "emoji-thumbsup", "name": "thumbsup", "duration": 2.5},
-            "90": {"id": "mining-fail", "name": "miningfail", "duration": 3.41},
-            "91": {"id": "emote-shy", "name": "shy", "duration": 5.15},
-            "92": {"id": "fishing-pull", "name": "fishingpull", "duration": 2.81},
-            "93": {"id": "dance-thewave", "name": "thewave", "duration": 8.0},
-            "94": {"id": "idle-angry", "name": "angry", "duration": 26.07},
-            "95": {"id": "emote-rough", "name": "rough", "duration": 6.0},
-            "96": {"id": "fishing-idle", "name": "fishingidle", "duration": 17.87},
-            "97": {"id": "emote-dropped", "name": "dropped", "duration": 4.5},
-            "98": {"id": "mining-success", "name": "miningsuccess", "duration": 3.11},
-            "99": {"id": "emote-receive-happy", "name": "receivehappy", "duration": 5.0},
-            "100": {"id": "emote-cold", "name": "cold", "duration": 5.17},
-            "101": {"id": "fishing-cast", "name": "fishingcast", "duration": 2.82},
-            "102": {"id": "emote-sit", "name": "sit", "duration": 20.0},
-            "103": {"id": "dance-shuffle", "name": "shuffledance", "duration": 9.0},
-            "104": {"id": "emote-receive-sad", "name": "receivesad", "duration": 5.0},
-            "105": {"id": "idle-loop-tired", "name": "tired", "duration": 11.23},
-            "106": {"id": "dance-hipshake", "name": "hipshake", "duration": 13.38},
-            "107": {"id": "dance-fruity", "name": "fruity", "duration": 18.25},
-            "108": {"id": "dance-cheerleader", "name": "cheerleader", "duration": 17.93},
-            "109": {"id": "dance-tiktok14", "name": "magnetic", "duration": 11.20},
-            "110": {"id": "emote-howl", "name": "nocturnal", "duration": 8.10},
-            "111": {"id": "idle-howl", "name": "moonlit", "duration": 48.62},
-            "112": {"id": "emote-trampoline", "name": "trampoline", "duration": 6.11},
-            "113": {"id": "emote-attention", "name": "attention", "duration": 5.65},
-            "114": {"id": "sit-open", "name": "laidback", "duration": 27.28},
-            "115": {"id": "emote-shrink", "name": "shrink", "duration": 9.99},
-            "116": {"id": "emote-puppet", "name": "puppet", "duration": 17.89},
-            "117": {"id": "dance-aerobics", "name": "pushups", "duration": 9.89},
-            "118": {"id": "dance-duckwalk", "name": "duckwalk", "duration": 12.48},
-            "119": {"id": "dance-handsup", "name": "handsintheair", "duration": 23.18},
-            "120": {"id": "dance-metal", "name": "rockout", "duration": 15.78},
-            "121": {"id": "dance-orangejustice", "name": "orangejuice", "duration": 7.17},
-            "122": {"id": "dance-singleladies", "name": "ringonit", "duration": 22.33},
-            "123": {"id": "dance-smoothwalk", "name": "smoothwalk", "duration": 7.58},
-            "124": {"id": "dance-voguehands", "name": "voguehands", "duration": 10.57},
-            "125": {"id": "emoji-arrogance", "name": "arrogance", "duration": 8.16},
-            "126": {"id": "emoji-give-up", "name": "giveup", "duration": 6.04},
-            "127": {"id": "emoji-hadoken", "name": "fireball", "duration": 4.29},
-            "128": {"id": "emoji-halo", "name": "levitate", "duration": 6.52},
-            "129": {"id": "emoji-lying", "name": "lying", "duration": 7.39},
-            "130": {"id": "emoji-naughty", "name": "naughty", "duration": 5.73},
-            "131": {"id": "emoji-poop", "name": "stinky", "duration": 5.86},
-            "132": {"id": "emoji-pray", "name": "pray", "duration": 6.00},
-            "133": {"id": "emoji-punch", "name": "punch", "duration": 3.36},
-            "134": {"id": "emoji-sick", "name": "sick", "duration": 6.22},
-            "135": {"id": "emoji-smirking", "name": "smirk", "duration": 5.74},
-            "136": {"id": "emoji-sneeze", "name": "sneeze", "duration": 4.33},
-            "137": {"id": "emoji-there", "name": "point", "duration": 3.09},
-            "138": {"id": "emote-death2", "name": "collapse", "duration": 5.54},
-            "139": {"id": "emote-disco", "name": "disco", "duration": 6.14},
-            "140": {"id": "emote-ghost-idle", "name": "ghostfloat", "duration": 20.43},
-            "141": {"id": "emote-handstand", "name": "handstand", "duration": 5.89},
-            "142": {"id": "emote-kicking", "name": "superkick", "duration": 6.21},
-            "143": {"id": "emote-panic", "name": "panic", "duration": 4.5},
-            "144": {"id": "emote-splitsdrop", "name": "splits", "duration": 5.31},
-            "145": {"id": "idle_layingdown", "name": "attentive", "duration": 26.11},
-            "146": {"id": "idle_layingdown2", "name": "relaxed", "duration": 22.59},
-            "147": {"id": "emote-apart", "name": "fallingapart", "duration": 5.98},
-            "148": {"id": "emote-baseball", "name": "homerun", "duration": 8.47},
-            "149": {"id": "emote-boo", "name": "boo", "duration": 5.58},
-            "150": {"id": "emote-bunnyhop", "name": "bunnyhop", "duration": 13.63},
-            "151": {"id": "emote-death", "name": "revival", "duration": 8.00},
-            "152": {"id": "emote-deathdrop", "name": "faintdrop", "duration": 4.18},
-            "153": {"id": "emote-elbowbump", "name": "elbowbump", "duration": 6.44},
-            "154": {"id": "emote-fail1", "name": "fall", "duration": 6.90},
-            "155": {"id": "emote-fail2", "name": "clumsy", "duration": 7.74},
-            "156": {"id": "emote-fainting", "name": "faint", "duration": 18.55},
-            "157": {"id": "emote-hugyourself", "name": "hugyourself", "duration": 6.03},
-            "158": {"id": "emote-jetpack", "name": "jetpack", "duration": 17.77},
-            "159": {"id": "emote-judochop", "name": "judochop", "duration": 5.0},
-            "160": {"id": "emote-jumpb", "name": "jump", "duration": 4.87},
-            "161": {"id": "emote-laughing2", "name": "amused", "duration": 6.60},
-            "162": {"id": "emote-levelup", "name": "levelup", "duration": 7.27},
-            "163": {"id": "emote-monster_fail", "name": "monsterfail", "duration": 5.42},
-            "164": {"id": "idle-dance-headbobbing", "name": "nightfever", "duration": 23.65},
-            "165": {"id": "emote-ninjarun", "name": "ninjarun", "duration": 6.50},
-            "166": {"id": "emoji-peace", "name": "peace", "duration": 3.5},
-            "167": {"id": "emote-peekaboo", "name": "peekaboo", "duration": 4.52},
-            "168": {"id": "emote-proposing", "name": "proposing", "duration": 5.91},
-            "169": {"id": "emote-rainbow", "name": "rainbow", "duration": 8.0},
-            "170": {"id": "emote-robot", "name": "robot", "duration": 10.0},
-            "171": {"id": "emote-rofl", "name": "rofl", "duration": 7.65},
-            "172": {"id": "emote-roll", "name": "roll", "duration": 4.31},
-            "173": {"id": "emote-ropepull", "name": "ropepull", "duration": 10.69},
-            "174": {"id": "emote-secrethandshake", "name": "secrethandshake", "duration": 6.28},
-            "175": {"id": "emote-sumo", "name": "sumofight", "duration": 11.64},
-            "176": {"id": "emote-superpunch", "name": "superpunch", "duration": 5.75},
-            "177": {"id": "emote-superrun", "name": "superrun", "duration": 7.16},
-            "178": {"id": "emote-theatrical", "name": "theatrical", "duration": 11.00},
-            "179": {"id": "emote-wings", "name": "ibelieve", "duration": 14.21},
-            "180": {"id": "emote-frustrated", "name": "irritated", "duration": 6.41},
-            "181": {"id": "idle-floorsleeping", "name": "cozynap", "duration": 14.61},
-            "182": {"id": "idle-floorsleeping2", "name": "relaxing", "duration": 18.83},
-            "183": {"id": "idle-hero", "name": "heropose", "duration": 22.33},
-            "184": {"id": "idle-lookup", "name": "ponder", "duration": 8.75},
-            "185": {"id": "idle-posh", "name": "posh", "duration": 23.29},
-            "186": {"id": "idle-sad", "name": "poutyface", "duration": 25.24},
-            "187": {"id": "emote-dab", "name": "dab", "duration": 3.75},
-            "188": {"id": "dance-gangnamstyle", "name": "gangnamstyle", "duration": 15.0},
-            "189": {"id": "emoji-crying", "name": "sob", "duration": 4.91},
-            "190": {"id": "idle-loop-tapdance", "name": "taploop", "duration": 7.81},
-            "191": {"id": "idle-sleep", "name": "sleepy", "duration": 3.35},
-            "192": {"id": "dance-sexy", "name": "wiggledance", "duration": 13.70},
-            "193": {"id": "emoji-eyeroll", "name": "eyeroll", "duration": 3.75},
-            "194": {"id": "dance-moonwalk", "name": "moonwalk", "duration": 12.0},
-            "195": {"id": "idle-fighter", "name": "fighter", "duration": 18.64},
-            "196": {"id": "idle-dance-tiktok7", "name": "renegade", "duration": 14.05},
-            "197": {"id": "emote-facepalm", "name": "facepalm", "duration": 5.0},
-            "198": {"id": "idle-dance-headbobbing", "name": "feelthebeat", "duration": 23.65},
-            "199": {"id": "emote-pose8", "name": "happy", "duration": 5.62},
-            "200": {"id": "emote-hug", "name": "hug", "duration": 4.53},
-            "201": {"id": "emote-slap", "name": "slap", "duration": 4.06},
-            "202": {"id": "emoji-clapping", "name": "clap", "duration": 2.98},
-            "203": {"id": "emote-exasperated", "name": "exasperated", "duration": 4.10},
-            "204": {"id": "emote-kissing-passionate", "name": "sweetsmooch", "duration": 10.47},
-            "205": {"id": "emote-tapdance", "name": "tapdance", "duration": 6.0},
-            "206": {"id": "emote-suckthumb", "name": "thumbsuck", "duration": 5.23},
-            "207": {"id": "dance-harlemshake", "name": "harlemshake", "duration": 10.0},
-            "208": {"id": "emote-heartfingers", "name": "heartfingers", "duration": 5.18},
-            "209": {"id": "idle-loop-aerobics", "name": "aerobics", "duration": 10.08},
-            "210": {"id": "emote-heartshape", "name": "heartshape", "duration": 7.60},
-            "211": {"id": "emote-hearteyes", "name": "hearteyes", "duration": 5.99},
-            "212": {"id": "dance-wild", "name": "karmadance", "duration": 16.25},
-            "213": {"id": "emoji-scared", "name": "gasp", "duration": 4.06},
-            "214": {"id": "emote-think", "name": "think", "duration": 4.81},
-            "215": {"id": "emoji-dizzy", "name": "stunned", "duration": 5.38},
-            "216": {"id": "emote-embarrassed", "name": "embarrassed", "duration": 9.09},
-            "217": {"id": "emote-disappear", "name": "blastoff", "duration": 5.53},
-            "218": {"id": "idle-loop-annoyed", "name": "annoyed", "duration": 18.62},
-            "219": {"id": "dance-zombie", "name": "dancezombie", "duration": 13.83},
-            "220": {"id": "idle-loop-happy", "name": "chillin", "duration": 19.80},
-            "221": {"id": "emote-frustrated", "name": "frustrated", "duration": 6.41},
-            "222": {"id": "idle-loop-sad", "name": "bummed", "duration": 21.80},
-            "223": {"id": "emoji-ghost", "name": "ghost", "duration": 3.74},
-            "224": {"id": "emoji-mind-blown", "name": "mindblown", "duration": 3.46}
-        }
+        emotes = EMOTES
 
         # Comando por número: !1, !2, etc.
         if msg.startswith("!") and msg[1:].isdigit():
@@ -687,6 +514,7 @@ class BartenderBot(BaseBot):
             # Iniciar llamada extendida
             self.is_in_call = True
             self.call_partner = username
+            self.presence.publish("state", state={"in_call": True, "call_partner": username})
 
             # Fase 1: Contestar teléfono
             await asyncio.sleep(0.5)
@@ -715,9 +543,21 @@ class BartenderBot(BaseBot):
             # Finalizar llamada
             self.is_in_call = False
             self.call_partner = None
+            self.presence.publish("state", state={"in_call": False})
 
             safe_print(f"📞 Llamada completada con {username} (Admin/Owner: {is_admin_or_owner})")
 
+    @instrumentation.traced("on_emote")
+    async def on_emote(self, user: User, emote_id: str, receiver: Union[User, None]) -> None:
+        """Manejador de emotes: alimenta la calibración de duraciones"""
+        # Los emotes que envían los bucles (del cantinero o del bot principal) no dicen nada nuevo sobre la duración
+        if user.id == self.bot_id or user.id in self.presence.peer_loops:
+            EMOTE_CALIBRATION.forget_user(user.id)
+            return
+        EMOTE_CALIBRATION.record_emote(user.id, emote_id)
+
+    @dispatcher.dispatched(key=lambda self, user, *args: user.id)
+    @instrumentation.traced("on_user_join")
     async def on_user_join(self, user: User, position: Union[Position, AnchorPosition]) -> None:
         """Saluda a los usuarios cuando entran a la sala con reintentos"""
         greeting = "Bienvenido a🕷️NOCTURNO 🕷️. El velo se ha abierto solo para ti. Tu presencia es una nueva sombra en nuestra oscuridad."
@@ -0,0 +1,116 @@
+"""Consola de operador no bloqueante: un hilo lee stdin y entrega las líneas al event loop
+
+    texto        se envía al chat de la sala
+    !comando     se ejecuta como el propietario (la respuesta se imprime aquí)
+    /history     últimas líneas introducidas
+    quit         cierra la consola (el bot sigue funcionando)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from collections import deque
+
+try:
+    import readline  # edición de línea e historial con flechas donde esté disponible
+except ImportError:
+    readline = None
+
+HISTORY_SIZE = 200
+
+
+class OperatorConsole:
+    """Consola de stdin que nunca bloquea el event loop"""
+
+    def __init__(self, on_chat, on_command, history_file: str | None = None, prompt: str = "> "):
+        self.on_chat = on_chat            # async (texto)
+        self.on_command = on_command      # async (comando)
+        self.history_file = history_file
+        self.prompt = prompt
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._queue = None
+        self._thread = None
+
+    def _load_history(self):
+        if not self.history_file or not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line:
+                        self.history.append(line)
+                        if readline is not None:
+                            readline.add_history(line)
+        except OSError:
+            pass
+
+    def _save_line(self, line: str):
+        self.history.append(line)
+        if not self.history_file:
+            return
+        try:
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+
+    def _reader(self, loop: asyncio.AbstractEventLoop):
+        """Hilo lector: input() bloquea aquí, no en el event loop"""
+        while True:
+            try:
+                line = input(self.prompt)
+            except (EOFError, KeyboardInterrupt):
+                line = None
+            except Exception:
+                line = None
+            try:
+                loop.call_soon_threadsafe(self._queue.put_nowait, line)
+            except RuntimeError:
+                return      # el event loop ya se cerró
+            if line is None or line.strip().lower() == "quit":
+                return
+
+    async def run(self):
+        """Procesa las líneas de la consola hasta 'quit' o fin de stdin"""
+        if self._thread is None or not self._thread.is_alive():
+            self._load_history()
+            self._queue = asyncio.Queue()
+            self._thread = threading.Thread(
+                target=self._reader, args=(asyncio.get_running_loop(),), name="console-reader", daemon=True
+            )
+            self._thread.start()
+            print("💬 Consola iniciada: texto = chat, !comando = como propietario, /history, quit")
+
+        while True:
+            line = await self._queue.get()
+            if line is None:
+                return
+            line = line.strip()
+            if not line:
+                continue
+            if line.lower() == "quit":
+                print("👋 Consola cerrada (el bot sigue activo)")
+                return
+            if line == "/history":
+                for index, entry in enumerate(list(self.history)[-20:], 1):
+                    print(f"{index:>3}  {entry}")
+                continue
+
+            self._save_line(line)
+            try:
+                if line.startswith("!"):
+                    await self.on_command(line)
+                else:
+                    await self.on_chat(line)
+                    print(f"✅ Enviado: {line}")
+            except Exception as e:
+                print(f"❌ Error de consola: {e}")
+
+
+def stdin_is_interactive() -> bool:
+    try:
+        return sys.stdin is not None and sys.stdin.isatty()
+    except (AttributeError, ValueError):
+        return False
@@ -0,0 +1,169 @@
+"""Despachador de eventos: colas por usuario servidas por un grupo acotado de workers
+
+Los eventos de un mismo usuario se ejecutan en orden, uno detrás de otro; los de usuarios
+distintos corren en paralelo hasta el número de workers. Los usuarios cuyo siguiente evento
+es prioritario (comandos de moderación) se atienden antes que el resto.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import time
+from collections import deque
+
+import metrics
+
+DEFAULT_WORKERS = 16
+MAX_PENDING_PER_USER = 20
+
+# Lista a la que se añade un future por cada evento encolado desde el contexto actual (track_completion)
+_completions = contextvars.ContextVar("dispatch_completions", default=None)
+
+MODERATION_COMMANDS = frozenset(("!kick", "!ban", "!unban", "!mute", "!unmute", "!freeze", "!jail", "!unjail"))
+
+
+def is_moderation(message: str) -> bool:
+    """¿Es el mensaje un comando de moderación? Se compara el comando entero (!banlist no lo es)"""
+    words = message.split(maxsplit=1)
+    return bool(words) and words[0].lower() in MODERATION_COMMANDS
+
+
+class EventDispatcher:
+    """Colas por usuario con un carril prioritario"""
+
+    def __init__(self, name: str, max_pending_per_user: int = MAX_PENDING_PER_USER, logger=print):
+        self.name = name
+        self.max_pending = max_pending_per_user
+        self.logger = logger
+        self._pending = {}                # usuario -> deque de (enviado, prioridad, handler, fábrica)
+        self._busy = set()                # usuarios con un evento en ejecución
+        self._ready = deque()             # usuarios listos, carril normal
+        self._ready_priority = deque()    # usuarios listos cuyo siguiente evento es prioritario
+        self._signal = asyncio.Semaphore(0)
+        self.active_workers = 0
+        self.depth = 0
+
+    @property
+    def running(self) -> bool:
+        return self.active_workers > 0
+
+    def _schedule(self, key):
+        queue = self._pending[key]
+        (self._ready_priority if queue[0][1] else self._ready).append(key)
+        self._signal.release()
+
+    def submit(self, key, factory, priority: bool = False, handler: str = "event") -> bool:
+        """Encola factory() para el usuario `key`. Devuelve False si su cola está llena"""
+        queue = self._pending.get(key)
+        if queue is None:
+            queue = self._pending[key] = deque()
+        if len(queue) >= self.max_pending and not priority:
+            metrics.inc("dispatch_dropped_total", handler=handler)
+            return False
+        queue.append((time.perf_counter(), priority, handler, factory))
+        self.depth += 1
+        if len(queue) == 1 and key not in self._busy:
+            self._schedule(key)
+        return True
+
+    async def worker(self):
+        """Bucle de un worker; se lanza varias veces (una por worker) desde el registro de tareas"""
+        self.active_workers += 1
+        try:
+            while True:
+                await self._signal.acquire()
+                lane = "priority" if self._ready_priority else "normal"
+                key = (self._ready_priority or self._ready).popleft()
+                queue = self._pending[key]
+                submitted, _, handler, factory = queue.popleft()
+                self.depth -= 1
+                self._busy.add(key)
+                metrics.observe("dispatch_wait_seconds", time.perf_counter() - submitted, lane=lane)
+                try:
+                    await factory()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger(f"Error en {handler} ({self.name}): {type(e).__name__}: {e}")
+                finally:
+                    self._busy.discard(key)
+                    if queue:
+                        self._schedule(key)
+                    else:
+                        self._pending.pop(key, None)
+        finally:
+            self.active_workers -= 1
+
+    async def drain(self, timeout: float = 30.0, poll: float = 0.05) -> bool:
+        """Espera a que no queden eventos en cola ni en ejecución"""
+        deadline = time.monotonic() + timeout
+        while self.depth or self._busy:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll)
+        return True
+
+    def collect_metrics(self):
+        """Collector para metrics: eventos en cola"""
+        metrics.set_gauge("queue_depth", self.depth, queue=f"{self.name}:events")
+
+
+@contextlib.contextmanager
+def track_completion(futures: list):
+    """Dentro del bloque, cada evento encolado añade a `futures` uno que se resuelve al terminar su trabajo.
+
+    Los manejadores @dispatched vuelven en cuanto encolan el evento; quien quiera medir
+    la latencia completa (el simulador) espera a estos futures. El resultado es True si el
+    trabajo terminó sin error y False si falló o la cola del usuario estaba llena.
+    """
+    token = _completions.set(futures)
+    try:
+        yield futures
+    finally:
+        _completions.reset(token)
+
+
+def _resolving(factory, done: asyncio.Future):
+    async def run():
+        try:
+            await factory()
+        except BaseException:
+            if not done.done():
+                done.set_result(False)
+            raise
+        if not done.done():
+            done.set_result(True)
+    return run
+
+
+def dispatched(key, priority=None):
+    """Decorador para manejadores de eventos del bot.
+
+    Si self.dispatcher tiene workers, el evento se encola bajo key(*args) y el manejador
+    vuelve enseguida; si no (pruebas, benchmarks, arranque), se ejecuta en línea.
+    """
+    def decorator(func):
+        async def wrapper(self, *args, **kwargs):
+            dispatcher = getattr(self, "dispatcher", None)
+            if dispatcher is None or not dispatcher.running:
+                return await func(self, *args, **kwargs)
+            work = lambda: func(self, *args, **kwargs)
+            futures = _completions.get()
+            if futures is not None:
+                done = asyncio.get_running_loop().create_future()
+                futures.append(done)
+                work = _resolving(work, done)
+            queued = dispatcher.submit(
+                key(self, *args, **kwargs),
+                work,
+                priority=bool(priority and priority(self, *args, **kwargs)),
+                handler=func.__name__,
+            )
+            if not queued and futures is not None:
+                done.set_result(False)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
@@ -0,0 +1,184 @@
+"""Calibración de duraciones de emotes: estimación por emote a partir de lo observado, compartida entre bots
+
+Las duraciones escritas a mano en los catálogos son la estimación inicial (prior). Las muestras
+llegan de on_emote: cuando un usuario repite el mismo emote, el intervalo entre los dos eventos
+es un ciclo completo. La estimación mezcla el prior con la mediana de las muestras según cuántas hay.
+
+Cada bot guarda sus muestras en su propio archivo (data/emote_calibration.<bot>.json) y lee
+los de los demás: los bots son procesos distintos, así que ninguno reescribe lo de otro y las
+muestras se comparten sin contarse dos veces. El archivo común de versiones anteriores
+(data/emote_calibration.json) solo se lee.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import re
+import time
+
+import bounded_store
+import metrics
+
+DEFAULT_DURATION = 10.0
+MAX_SAMPLES = 50              # muestras guardadas por emote y bot
+PRIOR_WEIGHT = 5              # muestras que "vale" el prior en la mezcla
+SAMPLE_BAND = (0.5, 1.5)      # intervalos fuera de [0.5, 1.5] x estimación actual se descartan
+SAVE_INTERVAL = 300           # segundos entre guardados
+
+
+def _file_label(owner: str) -> str:
+    """Nombre del bot apto para un nombre de archivo ("Bot Principal [sala]" -> "Bot_Principal_sala")"""
+    return re.sub(r"[^\w.-]+", "_", owner).strip("_") or "bot"
+
+
+class EmoteCalibration:
+    """Estimaciones de duración por emote_id"""
+
+    def __init__(self, path: str, owner: str):
+        self.path = path
+        self.owner = owner
+        root, ext = os.path.splitext(path)
+        self.own_path = f"{root}.{_file_label(owner)}{ext}"
+        self._pattern = f"{glob.escape(root)}.*{ext}"
+        self.priors = {}
+        self.samples = {}             # emote_id -> [segundos], de este bot
+        self.shared = {}              # emote_id -> [segundos], de los demás bots
+        self._estimates = {}
+        self._last_emote = bounded_store.LRUMap(f"emote_calibration:{owner}", 5000)
+        self._dirty = False
+
+    def seed(self, durations: dict):
+        """Priors desde un catálogo {emote_id: duración}"""
+        for emote_id, duration in durations.items():
+            if duration:
+                self.priors.setdefault(emote_id, float(duration))
+        self._estimates.clear()
+
+    def duration(self, emote_id: str, default: float | None = None) -> float:
+        """Duración estimada del emote (default si no hay prior ni muestras)"""
+        estimate = self._estimates.get(emote_id)
+        if estimate is not None:
+            return estimate
+        prior = self.priors.get(emote_id, default if default is not None else DEFAULT_DURATION)
+        samples = self.samples.get(emote_id, []) + self.shared.get(emote_id, [])
+        if samples:
+            ordered = sorted(samples)
+            median = ordered[len(ordered) // 2]
+            weight = len(samples) / (len(samples) + PRIOR_WEIGHT)
+            estimate = prior * (1 - weight) + median * weight
+        else:
+            estimate = prior
+        if emote_id in self.priors or samples:
+            self._estimates[emote_id] = estimate
+        return estimate
+
+    def observe(self, emote_id: str, seconds: float) -> bool:
+        """Añade una muestra si es plausible frente a la estimación actual"""
+        current = self.duration(emote_id)
+        low, high = SAMPLE_BAND
+        if not (current * low <= seconds <= current * high):
+            return False
+        samples = self.samples.setdefault(emote_id, [])
+        samples.append(round(seconds, 3))
+        del samples[:-MAX_SAMPLES]
+        self._estimates.pop(emote_id, None)
+        self._dirty = True
+        metrics.inc("emote_calibration_samples_total")
+        return True
+
+    def record_emote(self, user_id: str, emote_id: str, now: float | None = None):
+        """on_emote: el intervalo entre dos envíos seguidos del mismo emote por un usuario es un ciclo"""
+        now = time.monotonic() if now is None else now
+        previous = self._last_emote.get(user_id)
+        self._last_emote[user_id] = (emote_id, now)
+        if previous is not None and previous[0] == emote_id:
+            self.observe(emote_id, now - previous[1])
+
+    def forget_user(self, user_id: str):
+        """Olvida el último emote del usuario (sale de la sala o lo anima un bucle del bot)"""
+        self._last_emote.pop(user_id, None)
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _load(path: str) -> dict:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _read(self) -> dict:
+        """{bot: {emote_id: [segundos]}} del archivo común antiguo y de los archivos de cada bot"""
+        owners = dict(self._load(self.path).get("owners", {}))
+        for path in glob.glob(self._pattern):
+            data = self._load(path)
+            if data.get("owner"):
+                owners[data["owner"]] = data.get("samples", {})
+        return owners
+
+    def _absorb(self, owners: dict):
+        """Toma las muestras de los demás bots"""
+        self.shared = {}
+        for owner, section in owners.items():
+            if owner == self.owner:
+                continue
+            for emote_id, values in section.items():
+                self.shared.setdefault(emote_id, []).extend(values)
+        self._estimates.clear()
+
+    def load(self) -> int:
+        """Carga las muestras propias y las de los demás bots. Devuelve cuántos emotes tienen muestras"""
+        owners = self._read()
+        for emote_id, values in owners.get(self.owner, {}).items():
+            self.samples[emote_id] = (list(values) + self.samples.get(emote_id, []))[-MAX_SAMPLES:]
+        self._absorb(owners)
+        return len(set(self.samples) | set(self.shared))
+
+    def _write(self, own: dict | None) -> dict:
+        """Reescribe el archivo de este bot (si own no es None) y devuelve las muestras de todos"""
+        if own is not None:
+            os.makedirs(os.path.dirname(self.own_path) or ".", exist_ok=True)
+            tmp_path = f"{self.own_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 2, "owner": self.owner, "samples": own}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.own_path)
+        owners = self._read()
+        if own is not None:
+            owners[self.owner] = own
+        return owners
+
+    def _take_dirty(self) -> dict | None:
+        """Copia de las muestras propias si hay cambios sin guardar"""
+        if not self._dirty:
+            return None
+        self._dirty = False
+        return {emote_id: list(values) for emote_id, values in self.samples.items()}
+
+    def save(self) -> bool:
+        """Guardado bloqueante (apagado)"""
+        own = self._take_dirty()
+        try:
+            self._absorb(self._write(own))
+            return True
+        except OSError:
+            self._dirty = self._dirty or own is not None
+            return False
+
+    async def save_loop(self, interval: float = SAVE_INTERVAL):
+        """Tarea en segundo plano: guarda lo propio y recoge lo de los demás bots"""
+        while True:
+            await asyncio.sleep(interval)
+            own = self._take_dirty()
+            try:
+                self._absorb(await asyncio.to_thread(self._write, own))
+            except OSError:
+                self._dirty = self._dirty or own is not None
+
+    def collect_metrics(self):
+        """Collector para metrics: emotes con muestras"""
+        metrics.set_gauge("emote_calibrated", len(set(self.samples) | set(self.shared)), owner=self.owner)
@@ -0,0 +1,196 @@
+"""Programación de emotes en bucle contra plazos absolutos del reloj monotónico
+
+En lugar de send_emote() + sleep(duración - 0.3), cada emote tiene un plazo absoluto
+(el final del anterior) y se envía `lead` segundos antes (fijo y configurable, 0.3 s por
+defecto como antes; config.json: emote_lead_ms). El retraso del event loop no se acumula entre vueltas: el plazo siguiente
+es siempre plazo + duración. La duración de cada emote sale de la calibración
+(emote_calibration) que recibe cada reloj: cada bot pasa la suya.
+
+send_emote no espera respuesta del servidor, así que el momento en que vuelve no dice cuándo
+empieza la animación y no sirve para aprender el adelanto. Lo que sí se mide es la deriva:
+momento del envío - momento previsto (plazo - adelanto); positiva si el bucle llegó tarde.
+
+GroupEmoteSession aplica el mismo reloj a un grupo: un solo plazo y, en cada tick, el envío
+a todos los miembros a la vez, para que un baile de sala siga sincronizado.
+"""
+
+import asyncio
+import time
+import weakref
+from collections import deque
+
+import instrumentation
+import metrics
+import room_ops
+
+DEFAULT_LEAD = 0.3            # segundos de adelanto sobre el final del emote anterior
+MAX_LEAD = 2.0
+RESYNC_AFTER = 5.0            # con más retraso que esto (o que la duración) se reinicia el plazo
+STATS_WINDOW = 500            # derivas guardadas por bucle para percentiles
+
+_schedulers = {}              # id -> weakref
+
+
+class EmoteScheduler:
+    """Reloj de un bucle de emotes"""
+
+    def __init__(self, name: str, lead: float = DEFAULT_LEAD, calibration=None):
+        self.name = name
+        self.lead = min(MAX_LEAD, max(0.0, lead))
+        self.calibration = calibration      # EmoteCalibration del bot que corrige las duraciones del catálogo
+        self.deadline = None
+        self.sends = 0
+        self.resyncs = 0
+        self.drifts = deque(maxlen=STATS_WINDOW)
+        self.latencies = deque(maxlen=STATS_WINDOW)
+        _schedulers[id(self)] = weakref.ref(self, lambda _, key=id(self): _schedulers.pop(key, None))
+
+    def reset(self):
+        """Olvida el plazo (pausa, error o cambio de modo): el siguiente emote sale enseguida"""
+        self.deadline = None
+
+    async def play(self, send, emote_id: str, duration: float | None, active=None) -> float | None:
+        """Espera al momento de envío, ejecuta send() y fija el plazo del siguiente. Devuelve la deriva.
+
+        duration puede ser None si el reloj tiene calibración: se usa la duración que esta estime.
+
+        active: función opcional que se consulta tras la espera; si devuelve False no se envía
+        nada y se devuelve None (el bucle se detuvo mientras esperaba).
+        """
+        lead = self.lead
+        if self.calibration is not None:
+            duration = self.calibration.duration(emote_id, duration)
+        now = time.monotonic()
+        if self.deadline is not None and now - self.deadline > min(duration, RESYNC_AFTER):
+            # Demasiado atrasado para recuperar sin cortar animaciones: empezar de nuevo
+            self.resyncs += 1
+            self.deadline = None
+        if self.deadline is not None:
+            fire_at = self.deadline - lead
+            if fire_at > now:
+                await asyncio.sleep(fire_at - now)
+        if active is not None and not active():
+            self.reset()
+            return None
+
+        started = time.monotonic()
+        await send()
+        landed = time.monotonic()
+
+        if self.deadline is None:
+            # Primer emote tras arrancar o reiniciar: no hay animación anterior con la que medir
+            self.deadline = landed + duration
+            self.sends += 1
+            self.latencies.append(landed - started)
+            return 0.0
+        drift = started - (self.deadline - lead)
+        self.sends += 1
+        self.drifts.append(drift)
+        self.latencies.append(landed - started)
+        metrics.observe("emote_drift_seconds", abs(drift), loop=self.name)
+        self.deadline += duration
+        return drift
+
+    def stats(self) -> dict:
+        drifts = sorted(abs(d) for d in self.drifts)
+        count = len(drifts)
+        return {
+            "loop": self.name,
+            "sends": self.sends,
+            "resyncs": self.resyncs,
+            "late": sum(1 for d in self.drifts if d > self.lead),
+            "drift_p50_ms": round(drifts[count // 2] * 1000, 1) if count else 0.0,
+            "drift_p95_ms": round(drifts[min(count - 1, int(count * 0.95))] * 1000, 1) if count else 0.0,
+            "drift_max_ms": round(drifts[-1] * 1000, 1) if count else 0.0,
+            "send_ms": round(sum(self.latencies) / len(self.latencies) * 1000, 1) if self.latencies else 0.0,
+        }
+
+
+def stats() -> list:
+    """Estadísticas de todos los bucles vivos"""
+    return [ref().stats() for ref in list(_schedulers.values()) if ref() is not None]
+
+
+# ============================================================================
+# SESIONES DE EMOTE EN GRUPO
+# ============================================================================
+
+SESSION_CONCURRENCY = 16      # envíos en vuelo por tick de grupo
+SESSION_RATE = 0.0            # envíos por segundo dentro de un tick (0 = sin pausar, todos en el mismo tick)
+
+
+class GroupEmoteSession:
+    """Un reloj por grupo: en cada tick se envía el emote a todos los miembros a la vez.
+
+    is_member(user_id) decide si un miembro sigue en el grupo (por ejemplo, que su emote activo
+    sea este); los que dejan de serlo salen en el siguiente tick sin reiniciar la sesión.
+    spawn(nombre, factory) lanza la tarea que envía el emote a los que se unen con la sesión en
+    marcha (TaskRegistry.start del bot); sin él se usa una tarea propia.
+    """
+
+    def __init__(self, client, emote_id: str, duration: float, is_member,
+                 concurrency: int = SESSION_CONCURRENCY, rate: float = SESSION_RATE, lead: float = DEFAULT_LEAD,
+                 calibration=None, spawn=None):
+        self._client = client             # callable que devuelve el cliente Highrise actual
+        self.emote_id = emote_id
+        self.duration = duration
+        self.is_member = is_member
+        self.concurrency = concurrency
+        self.rate = rate
+        self.members = {}                 # user_id -> None, en orden de llegada
+        self.scheduler = EmoteScheduler("group", lead, calibration)
+        self.running = False
+        self.spawn = spawn
+        self._joining = []                # miembros nuevos pendientes de su primer envío
+        self._join_task = None
+
+    def join(self, user_id: str):
+        """Añade un miembro; si la sesión ya corre, arranca su animación sin esperar al siguiente tick"""
+        self.members[user_id] = None
+        if not self.running:
+            return
+        self._joining.append(user_id)
+        if self.spawn is not None:
+            self._join_task = self.spawn(f"emote_session:{self.emote_id}:join", self._send_joined)
+        elif self._join_task is None or self._join_task.done():
+            self._join_task = asyncio.create_task(instrumentation.untraced(self._send_joined()))
+
+    def leave(self, user_id: str):
+        self.members.pop(user_id, None)
+
+    def live_members(self) -> list:
+        for user_id in [uid for uid in self.members if not self.is_member(uid)]:
+            del self.members[user_id]
+        return list(self.members)
+
+    async def _send(self, members: list) -> list:
+        """Envío con el ritmo y la concurrencia de la sesión; cuenta los fallidos"""
+        failed = await room_ops.run_paced(
+            members, lambda uid: self._client().send_emote(self.emote_id, uid),
+            rate=self.rate, concurrency=self.concurrency,
+        )
+        if failed:
+            metrics.inc("emote_fanout_failures_total", len(failed))
+        return failed
+
+    async def _send_joined(self):
+        """Primer envío a los que se unieron con la sesión en marcha, por lotes hasta vaciar la cola"""
+        while self._joining:
+            joined, self._joining = self._joining, []
+            await self._send([uid for uid in dict.fromkeys(joined) if uid in self.members])
+
+    async def _fan_out(self):
+        started = time.perf_counter()
+        await self._send(self.live_members())
+        metrics.observe("emote_fanout_seconds", time.perf_counter() - started)
+
+    async def run(self):
+        """Bucle de la sesión; termina cuando no queda ningún miembro"""
+        self.running = True
+        try:
+            while self.live_members():
+                await self.scheduler.play(
+                    self._fan_out, self.emote_id, self.duration, lambda: bool(self.live_members()),
+                )
+        finally:
+            self.running = False
@@ -0,0 +1,254 @@
+"""Diario de solo-anexado para la economía de corazones
+
+Cada cambio de corazones se anexa como un registro binario de tamaño fijo (little-endian):
+
+    crc32 u32 | seq u64 | timestamp f64 | tipo u8 | relleno 3 | delta i32
+    | emisor 32 bytes | receptor 32 bytes | saldo resultante i64
+
+El registro guarda el saldo resultante, así que reproducir el diario sobre cualquier estado
+anterior (snapshot o archivos de texto) da el saldo actual: la reproducción es idempotente.
+Las escrituras se acumulan en memoria y se vuelcan con un solo fsync por lote.
+Al compactar, los registros ya cubiertos por un guardado completo pasan al historial
+(data/hearts_history.journal), que queda como registro de auditoría.
+
+Uso para auditar:
+    python heart_journal.py data/hearts_history.journal data/hearts.journal [user_id]
+"""
+
+import asyncio
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime
+
+import metrics
+
+FLUSH_INTERVAL = 1.0          # segundos máximos que un registro espera en memoria
+FLUSH_BATCH = 256             # registros que fuerzan un volcado inmediato
+COMPACT_INTERVAL = 600        # segundos entre compactaciones
+
+KIND_GIVE, KIND_HEARTALL, KIND_DAILY, KIND_ADJUST = 1, 2, 3, 4
+KIND_NAMES = {KIND_GIVE: "give", KIND_HEARTALL: "heartall", KIND_DAILY: "daily", KIND_ADJUST: "adjust"}
+_KINDS = {name: kind for kind, name in KIND_NAMES.items()}
+
+_BODY = struct.Struct("<QdB3xi32s32sq")
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _CRC.size + _BODY.size
+
+
+class JournalRecord:
+    __slots__ = ("seq", "timestamp", "kind", "delta", "giver", "receiver", "balance")
+
+    def __init__(self, seq, timestamp, kind, delta, giver, receiver, balance):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.kind = kind
+        self.delta = delta
+        self.giver = giver
+        self.receiver = receiver
+        self.balance = balance
+
+    def pack(self) -> bytes:
+        body = _BODY.pack(
+            self.seq, self.timestamp, self.kind, self.delta,
+            self.giver.encode("utf-8"), self.receiver.encode("utf-8"), self.balance,
+        )
+        return _CRC.pack(zlib.crc32(body)) + body
+
+    def describe(self) -> str:
+        when = datetime.fromtimestamp(self.timestamp).isoformat(timespec="seconds")
+        giver = self.giver or "-"
+        return f"#{self.seq} {when} {KIND_NAMES.get(self.kind, self.kind)} {giver} -> {self.receiver} {self.delta:+d} = {self.balance}"
+
+
+def read_records(path: str) -> tuple:
+    """(registros válidos, bytes válidos). Se detiene en el primer registro roto o incompleto"""
+    records = []
+    if not os.path.exists(path):
+        return records, 0
+    with open(path, "rb") as f:
+        data = f.read()
+    valid = 0
+    for offset in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        (crc,) = _CRC.unpack_from(data, offset)
+        body = data[offset + _CRC.size:offset + RECORD_SIZE]
+        if zlib.crc32(body) != crc:
+            break
+        seq, timestamp, kind, delta, giver, receiver, balance = _BODY.unpack(body)
+        records.append(JournalRecord(
+            seq, timestamp, kind, delta,
+            giver.rstrip(b"\0").decode("utf-8", "replace"), receiver.rstrip(b"\0").decode("utf-8", "replace"), balance,
+        ))
+        valid = offset + RECORD_SIZE
+    return records, valid
+
+
+def _last_seq(path: str) -> int:
+    """Secuencia del último registro de un archivo (lee solo el final)"""
+    if not os.path.exists(path):
+        return 0
+    size = os.path.getsize(path)
+    size -= size % RECORD_SIZE
+    with open(path, "rb") as f:
+        while size >= RECORD_SIZE:
+            f.seek(size - RECORD_SIZE)
+            raw = f.read(RECORD_SIZE)
+            body = raw[_CRC.size:]
+            if zlib.crc32(body) == _CRC.unpack_from(raw)[0]:
+                return _BODY.unpack(body)[0]
+            size -= RECORD_SIZE
+    return 0
+
+
+class HeartJournal:
+    """Diario activo más historial compactado"""
+
+    def __init__(self, path: str, history_path: str):
+        self.path = path
+        self.history_path = history_path
+        self.seq = 0
+        self._file = None
+        self._pending = []
+        self._early = []                # cambios anotados antes de open(): se escriben al abrir
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()     # el fsync en hilo y la compactación no se solapan
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self) -> list:
+        """Abre el diario, descarta una cola rota y devuelve los registros a reproducir"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        records, valid = read_records(self.path)
+        if os.path.exists(self.path) and os.path.getsize(self.path) != valid:
+            with open(self.path, "r+b") as f:
+                f.truncate(valid)
+        self.seq = records[-1].seq if records else _last_seq(self.history_path)
+        self._file = open(self.path, "ab")
+        # Los cambios hechos antes de abrir van detrás de los del disco (no se reproducen: ya están en memoria)
+        for timestamp, kind, delta, giver, receiver, balance in self._early:
+            self.seq += 1
+            self._pending.append(JournalRecord(self.seq, timestamp, kind, delta, giver, receiver, balance).pack())
+        self._early.clear()
+        if len(self._pending) >= FLUSH_BATCH:
+            self._wakeup.set()
+        return records
+
+    def append(self, kind: str, receiver: str, delta: int, balance: int, giver: str | None = None):
+        """Anexa un cambio de saldo. O(1): el volcado a disco es por lotes"""
+        if self._file is None:
+            self._early.append((time.time(), _KINDS[kind], delta, giver or "", receiver, balance))
+            return
+        self.seq += 1
+        record = JournalRecord(self.seq, time.time(), _KINDS[kind], delta, giver or "", receiver, balance)
+        self._pending.append(record.pack())
+        if len(self._pending) >= FLUSH_BATCH:
+            self._wakeup.set()
+
+    def _take_pending(self) -> tuple:
+        """(bytes, registros) pendientes; la lista queda vacía para los siguientes append"""
+        count = len(self._pending)
+        data = b"".join(self._pending)
+        self._pending.clear()
+        return data, count
+
+    def _write_pending(self) -> int:
+        if not self._pending or self._file is None:
+            return 0
+        data, count = self._take_pending()
+        self._file.write(data)
+        self._file.flush()
+        return count
+
+    async def flush(self):
+        """Escribe lo pendiente y hace fsync fuera del event loop"""
+        async with self._lock:
+            count = self._write_pending()
+            if count:
+                started = time.perf_counter()
+                await asyncio.to_thread(os.fsync, self._file.fileno())
+                metrics.observe("persistence_flush_seconds", time.perf_counter() - started, target="heart_journal")
+                metrics.inc("heart_journal_records_total", count)
+
+    def flush_sync(self):
+        """Volcado bloqueante (apagado)"""
+        if self._write_pending():
+            os.fsync(self._file.fileno())
+
+    async def flush_loop(self):
+        """Tarea en segundo plano: vuelca cada FLUSH_INTERVAL o al llenarse el lote"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def compact(self, checkpoint_seq: int) -> int:
+        """Mueve al historial los registros con seq <= checkpoint_seq (ya cubiertos por un guardado).
+
+        Lo pendiente se toma en el loop; la lectura, las escrituras y los fsync van en un hilo.
+        """
+        async with self._lock:
+            if self._file is None:
+                return 0
+            pending, count = self._take_pending()
+            moved = await asyncio.to_thread(self._compact, checkpoint_seq, pending)
+            if count:
+                metrics.inc("heart_journal_records_total", count)
+            if moved:
+                metrics.inc("heart_journal_compactions_total")
+            return moved
+
+    def _compact(self, checkpoint_seq: int, pending: bytes) -> int:
+        if pending:
+            self._file.write(pending)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        records, _ = read_records(self.path)
+        covered = [r for r in records if r.seq <= checkpoint_seq]
+        if not covered:
+            return 0
+        remaining = [r for r in records if r.seq > checkpoint_seq]
+        # Si una compactación anterior se cortó tras escribir el historial, no duplicar
+        archived = _last_seq(self.history_path)
+        with open(self.history_path, "ab") as history:
+            history.write(b"".join(r.pack() for r in covered if r.seq > archived))
+            history.flush()
+            os.fsync(history.fileno())
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(r.pack() for r in remaining))
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "ab")
+        return len(covered)
+
+    def close(self):
+        if self._file is not None:
+            self.flush_sync()
+            self._file.close()
+            self._file = None
+
+
+def audit(paths, user_id: str | None = None) -> list:
+    """Registros de varios archivos (historial primero), opcionalmente filtrados por usuario"""
+    result = []
+    for path in paths:
+        records, _ = read_records(path)
+        result.extend(r for r in records if user_id is None or user_id in (r.giver, r.receiver))
+    result.sort(key=lambda r: r.seq)
+    return result
+
+
+if __name__ == "__main__":
+    files = [arg for arg in sys.argv[1:] if os.path.exists(arg)]
+    filters = [arg for arg in sys.argv[1:] if not os.path.exists(arg)]
+    for entry in audit(files, filters[0] if filters else None):
+        print(entry.describe())
@@ -0,0 +1,222 @@
+"""Instrumentación de manejadores: latencia por comando separada en cómputo local y espera de API"""
+
+import contextvars
+import json
+import time
+from collections import deque
+
+import metrics
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+ROLLING_WINDOW = 500          # muestras por comando para los percentiles
+MAX_TRACE_CALLS = 20          # llamadas de API guardadas por traza lenta
+MAX_KEYS = 300                # comandos distintos con percentiles propios
+
+_enabled = True
+_slow_threshold = 1.0         # segundos
+_slow_logger = print
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_samples = {}                 # clave -> deque de (wall, compute, api)
+
+
+def configure(enabled: bool | None = None, slow_threshold_ms: float | None = None, logger=None):
+    """Ajusta la instrumentación en caliente"""
+    global _enabled, _slow_threshold, _slow_logger
+    if enabled is not None:
+        _enabled = bool(enabled)
+    if slow_threshold_ms is not None:
+        _slow_threshold = max(0.0, float(slow_threshold_ms) / 1000)
+    if logger is not None:
+        _slow_logger = logger
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def slow_threshold_ms() -> float:
+    return _slow_threshold * 1000
+
+
+# ============================================================================
+# TRAZAS
+# ============================================================================
+
+class Trace:
+    """Tiempos acumulados de una ejecución de manejador"""
+
+    __slots__ = ("handler", "key", "parent", "start", "compute", "api", "api_calls", "extra")
+
+    def __init__(self, handler: str, key: str, parent):
+        self.handler = handler
+        self.key = key
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.compute = 0.0
+        self.api = 0.0
+        self.api_calls = []
+        self.extra = {}
+
+
+class TimedCoroutine:
+    """Envuelve una corrutina y suma a trace.compute el tiempo de cada paso (cómputo local)"""
+
+    __slots__ = ("_coro", "_trace")
+
+    def __init__(self, coro, trace):
+        self._coro = coro
+        self._trace = trace
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    def send(self, value):
+        start = time.perf_counter()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._trace.compute += time.perf_counter() - start
+
+    def throw(self, *args):
+        start = time.perf_counter()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._trace.compute += time.perf_counter() - start
+
+    def close(self):
+        return self._coro.close()
+
+
+def record_api(method: str, elapsed: float):
+    """Suma una llamada de API a la traza activa y a sus trazas padre"""
+    trace = _current_trace.get()
+    while trace is not None:
+        trace.api += elapsed
+        if len(trace.api_calls) < MAX_TRACE_CALLS:
+            trace.api_calls.append((method, round(elapsed * 1000, 1)))
+        trace = trace.parent
+
+
+metrics.API_OBSERVERS.append(record_api)
+
+
+async def untraced(coro):
+    """Ejecuta coro sin traza activa: para tareas nuevas creadas desde un manejador.
+
+    create_task copia el contexto, así que la tarea heredaría la traza del manejador,
+    la mantendría viva y seguiría sumándole tiempo de API después de registrarla.
+    """
+    _current_trace.set(None)
+    return await coro
+
+
+def _finish(trace: Trace):
+    if trace.parent is not None:
+        # Traza anidada (handle_command dentro de on_chat): su clave y contexto pasan a la de
+        # fuera, que ya incluye su tiempo, y el evento se registra una sola vez
+        trace.parent.key = trace.key
+        trace.parent.extra.update(trace.extra)
+        return
+    wall = time.perf_counter() - trace.start
+    samples = _samples.get(trace.key)
+    if samples is None:
+        if len(_samples) >= MAX_KEYS:
+            trace.key = "other"
+        samples = _samples.setdefault(trace.key, deque(maxlen=ROLLING_WINDOW))
+    samples.append((wall, trace.compute, trace.api))
+
+    metrics.observe("command_latency_seconds", wall, command=trace.key)
+    metrics.observe("command_compute_seconds", trace.compute, command=trace.key)
+    metrics.observe("command_api_seconds", trace.api, command=trace.key)
+
+    if wall >= _slow_threshold:
+        record = {
+            "handler": trace.handler,
+            "key": trace.key,
+            "wall_ms": round(wall * 1000, 1),
+            "compute_ms": round(trace.compute * 1000, 1),
+            "await_ms": round((wall - trace.compute) * 1000, 1),
+            "api_ms": round(trace.api * 1000, 1),
+            "api_calls": trace.api_calls,
+        }
+        record.update(trace.extra)
+        try:
+            _slow_logger(json.dumps(record, ensure_ascii=False))
+        except Exception:
+            pass
+
+
+def traced(handler: str, key=None, context=None):
+    """Decorador para manejadores async.
+
+    key(*args) devuelve la etiqueta del comando; context(*args) añade datos a la traza lenta.
+    """
+    def decorator(func):
+        async def wrapper(*args, **kwargs):
+            if not _enabled:
+                return await func(*args, **kwargs)
+
+            label = key(*args, **kwargs) if key else handler
+            trace = Trace(handler, label, _current_trace.get())
+            token = _current_trace.set(trace)
+            try:
+                return await TimedCoroutine(func(*args, **kwargs), trace)
+            finally:
+                _current_trace.reset(token)
+                if context:
+                    trace.extra.update(context(*args, **kwargs))
+                _finish(trace)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+# ============================================================================
+# ESTADÍSTICAS
+# ============================================================================
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def stats() -> dict:
+    """Percentiles móviles por comando (en milisegundos)"""
+    result = {}
+    for command, samples in _samples.items():
+        walls = sorted(s[0] for s in samples)
+        result[command] = {
+            "count": len(samples),
+            "p50_ms": round(_percentile(walls, 0.50) * 1000, 1),
+            "p95_ms": round(_percentile(walls, 0.95) * 1000, 1),
+            "p99_ms": round(_percentile(walls, 0.99) * 1000, 1),
+            "compute_ms": round(sum(s[1] for s in samples) / len(samples) * 1000, 2),
+            "api_ms": round(sum(s[2] for s in samples) / len(samples) * 1000, 1),
+        }
+    return result
+
+
+def slowest(limit: int = 5) -> list:
+    """Comandos con mayor p95"""
+    ranked = sorted(stats().items(), key=lambda item: item[1]["p95_ms"], reverse=True)
+    return ranked[:limit]
+
+
+def reset():
+    _samples.clear()
@@ -11,16 +11,50 @@ from typing import Dict, List, Optional, Set, Tuple, Union
 from highrise import BaseBot, User, Reaction, AnchorPosition
 from highrise.models import SessionMetadata, CurrencyItem, Item, Error, Position
 
+import announcements
+import bounded_store
+import console
+import dispatcher
+import emote_calibration
+import emote_catalog
+import emote_scheduler
+import heart_journal
+import instrumentation
+import message_coalescer
+import metrics
+import pagination
+import presence
+import room_ops
+import rooms
+import snapshot
+import startup
+import task_registry
+import user_store
+import wallet_ledger
+
 # ============================================================================
 # CONFIGURACIÓN Y CONSTANTES
 # ============================================================================
 
+# Sala de esta copia del módulo (rooms.py); como bot suelto, las rutas y config.json de siempre
+ROOM = rooms.current()
+BOT_NAME = ROOM.label("Bot Principal")
+DATA_DIR = ROOM.path("data")
+VIP_FILE = ROOM.path("data/vip.txt", "vip")
+HEARTS_FILE = ROOM.path("data/hearts.txt", "economy")
+ACTIVITY_FILE = ROOM.path("data/activity.txt", "economy")
+USER_INFO_FILE = ROOM.path("data/user_info.json", "economy")
+TELEPORT_POINTS_FILE = ROOM.path("data/teleport_points.txt")
+SAVED_OUTFITS_FILE = ROOM.path("data/saved_outfits.json")
+INVENTORY_FILE = ROOM.path("data/bot_inventory.json")
+LOG_FILE = ROOM.path("bot_log.txt")
+RESPONSES_FILE = ROOM.path("bot_responses.txt")
+CONSOLE_MESSAGE_FILE = ROOM.path("console_message.txt")
+
 def load_config():
-    """Carga la configuración desde config.json"""
+    """Carga la configuración desde config.json (con los ajustes de la sala si se ejecuta desde rooms.py)"""
     try:
-        with open("config.json", "r", encoding="utf-8") as f:
-            config = json.load(f)
-        return config
+        return ROOM.load_config()
     except Exception as e:
         print(f"Error cargando configuración: {e}")
         return {}
@@ -36,23 +70,48 @@ FORBIDDEN_ZONES = config.get("forbidden_zones", [])
 BOT_WALLET = config.get("bot_wallet", 0)
 
 # Variables globales
-VIP_USERS = set()
-BANNED_USERS = {}
-MUTED_USERS = {}
-USER_HEARTS = {}
-USER_ACTIVITY = {}
-USER_INFO = {}
-USER_NAMES = {}
-TELEPORT_POINTS = {}
-ACTIVE_EMOTES = {}
+VIP_USERS = ROOM.shared_object("vip", "vip_users", set)
+BANNED_USERS = pagination.WatchedDict()
+MUTED_USERS = pagination.WatchedDict()
+USER_HEARTS = ROOM.shared_object("economy", "user_hearts", dict)
+USER_ACTIVITY = ROOM.shared_object("economy", "user_activity", dict)
+USER_INFO = ROOM.shared_object("economy", "user_info", dict)
+# Sin límite: se persiste (hearts.txt, activity.txt, snapshot) y un nombre descartado se perdería para siempre
+USER_NAMES = ROOM.shared_object("economy", "user_names", dict)
+TELEPORT_POINTS = pagination.WatchedDict()
+ACTIVE_EMOTES = bounded_store.LRUMap("active_emotes", config.get("active_emotes_max", 500))
+STOP_EMOTE = "idle"
 USER_JOIN_TIMES = {}
 SAVED_OUTFITS = {}
 JAIL_USERS = set()  # Usuarios que fueron enviados a la cárcel por admin/owner
 
+# Usuarios inactivos archivados en disco; se vuelven a cargar al necesitarlos
+USERS = ROOM.shared_object(
+    "economy", "users", lambda: user_store.TieredUsers(USER_INFO, USER_HEARTS, USER_ACTIVITY, USER_NAMES))
+USER_ARCHIVE_FILE = ROOM.path("data/user_archive.db", "economy")
+
+# Listados paginados (!emote list, !tplist, !banlist, ...) renderizados una vez por versión de los datos
+LISTINGS = pagination.PageCache()
+
+# Diario de la economía de corazones (se reproduce al arrancar sobre el snapshot)
+HEARTS_JOURNAL = ROOM.shared_object("economy", "hearts_journal", lambda: heart_journal.HeartJournal(
+    ROOM.path("data/hearts.journal", "economy"), ROOM.path("data/hearts_history.journal", "economy")))
+# La sala dueña lo activa al terminar de cargar la economía (snapshot, archivo y diario); las demás
+# salas del grupo lo esperan antes de atender comandos para que su snapshot no pise sus cambios
+ECONOMY_LOADED = ROOM.shared_object("economy", "loaded", asyncio.Event)
+
 # Constantes de reintentos
 MAX_RETRIES = 3
 RETRY_DELAY = 5
 
+# Snapshot binario del estado (arranque rápido); los archivos de texto siguen siendo la fuente de importación
+SNAPSHOT_FILE = ROOM.path("data/state.snap")
+SNAPSHOT_SOURCES = [
+    VIP_FILE, TELEPORT_POINTS_FILE, HEARTS_FILE,
+    ACTIVITY_FILE, USER_INFO_FILE, SAVED_OUTFITS_FILE,
+]
+SNAPSHOT_INTERVAL = 300
+
 # ============================================================================
 # SISTEMA DE LOGGING
 # ============================================================================
@@ -63,7 +122,7 @@ def log_event(event_type: str, message: str):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_message = f"[{timestamp}] [{event_type}] {message}\n"
 
-        with open("bot_log.txt", "a", encoding="utf-8") as f:
+        with open(LOG_FILE, "a", encoding="utf-8") as f:
             f.write(log_message)
 
         if event_type in ["ERROR", "WARNING", "ADMIN", "MOD"]:
@@ -75,15 +134,15 @@ def log_bot_response(message: str):
     """Registra las respuestas del bot para el panel web"""
     try:
         timestamp = datetime.now().strftime("%H:%M:%S")
-        with open("bot_responses.txt", "a", encoding="utf-8") as f:
+        with open(RESPONSES_FILE, "a", encoding="utf-8") as f:
             f.write(f"[{timestamp}] {message}\n")
         
         # Mantener solo las últimas 100 líneas
         try:
-            with open("bot_responses.txt", "r", encoding="utf-8") as f:
+            with open(RESPONSES_FILE, "r", encoding="utf-8") as f:
                 lines = f.readlines()
             if len(lines) > 100:
-                with open("bot_responses.txt", "w", encoding="utf-8") as f:
+                with open(RESPONSES_FILE, "w", encoding="utf-8") as f:
                     f.writelines(lines[-100:])
         except:
             pass
@@ -106,10 +165,13 @@ def safe_print(message: str):
 # SISTEMA DE PERSISTENCIA DE DATOS
 # ============================================================================
 
+@metrics.timed("persistence_flush_seconds", target="user_info")
 def save_user_info():
     """Guarda información de usuarios"""
+    if not ROOM.owns("economy"):
+        return
     try:
-        os.makedirs("data", exist_ok=True)
+        os.makedirs(os.path.dirname(USER_INFO_FILE), exist_ok=True)
         serializable_data = {}
         for user_id, data in USER_INFO.items():
             serializable_data[user_id] = {}
@@ -119,36 +181,82 @@ def save_user_info():
                 else:
                     serializable_data[user_id][key] = value
 
-        with open("data/user_info.json", "w", encoding="utf-8") as f:
+        with open(USER_INFO_FILE, "w", encoding="utf-8") as f:
             json.dump(serializable_data, f, indent=2, ensure_ascii=False)
         print(f"Información de usuarios guardada: {len(USER_INFO)} usuarios")
     except Exception as e:
         print(f"Error guardando información de usuarios: {e}")
 
-def save_leaderboard_data():
-    """Guarda datos del leaderboard"""
+@metrics.timed("persistence_flush_seconds", target="leaderboard")
+def save_leaderboard_data(state: dict | None = None):
+    """Guarda datos del leaderboard (las salas que comparten la economía dejan el guardado a la dueña).
+
+    state: copia de snapshot_state() para guardar desde un hilo; sin ella se usan los globales.
+    """
+    if not ROOM.owns("economy"):
+        return True
+    state = state or {"user_hearts": USER_HEARTS, "user_activity": USER_ACTIVITY, "user_names": USER_NAMES}
+    user_hearts, user_activity, user_names = state["user_hearts"], state["user_activity"], state["user_names"]
     try:
-        os.makedirs("data", exist_ok=True)
+        os.makedirs(os.path.dirname(HEARTS_FILE), exist_ok=True)
 
         # Guardar corazones
-        with open("data/hearts.txt", "w", encoding="utf-8") as f:
+        with open(HEARTS_FILE, "w", encoding="utf-8") as f:
             f.write("# Corazones de usuarios (user_id:hearts:username)\n")
-            for user_id, hearts in USER_HEARTS.items():
-                username = USER_NAMES.get(user_id, f"User_{user_id[:8]}")
+            for user_id, hearts in user_hearts.items():
+                username = user_names.get(user_id, f"User_{user_id[:8]}")
                 f.write(f"{user_id}:{hearts}:{username}\n")
 
         # Guardar actividad
-        with open("data/activity.txt", "w", encoding="utf-8") as f:
+        with open(ACTIVITY_FILE, "w", encoding="utf-8") as f:
             f.write("# Actividad de usuarios (user_id:messages:last_activity:username)\n")
-            for user_id, data in USER_ACTIVITY.items():
-                username = USER_NAMES.get(user_id, f"User_{user_id[:8]}")
+            for user_id, data in user_activity.items():
+                username = user_names.get(user_id, f"User_{user_id[:8]}")
                 last_activity = data["last_activity"].isoformat() if isinstance(data["last_activity"], datetime) else str(data["last_activity"])
                 f.write(f"{user_id}:{data['messages']}:{last_activity}:{username}\n")
 
-        print(f"Datos del leaderboard guardados: {len(USER_HEARTS)} corazones, {len(USER_ACTIVITY)} actividad")
+        print(f"Datos del leaderboard guardados: {len(user_hearts)} corazones, {len(user_activity)} actividad")
+        return True
     except Exception as e:
         print(f"Error guardando datos del leaderboard: {e}")
+        return False
 
+@metrics.timed("persistence_flush_seconds", target="snapshot")
+def snapshot_state(copy: bool = False) -> dict:
+    """Estado persistente para write_snapshot; con copy=True, una copia que se puede guardar desde un hilo"""
+    if not copy:
+        return {
+            "vip_users": VIP_USERS,
+            "teleport_points": TELEPORT_POINTS,
+            "user_names": USER_NAMES,
+            "user_hearts": USER_HEARTS,
+            "user_activity": USER_ACTIVITY,
+            "user_info": USER_INFO,
+            "saved_outfits": SAVED_OUTFITS,
+        }
+    return {
+        "vip_users": set(VIP_USERS),
+        "teleport_points": dict(TELEPORT_POINTS),
+        "user_names": dict(USER_NAMES),
+        "user_hearts": dict(USER_HEARTS),
+        "user_activity": {uid: dict(data) for uid, data in USER_ACTIVITY.items()},
+        "user_info": {uid: dict(data) for uid, data in USER_INFO.items()},
+        "saved_outfits": {num: list(items) for num, items in SAVED_OUTFITS.items()},
+    }
+
+def save_snapshot(state: dict | None = None):
+    """Guarda el snapshot binario con todo el estado persistente (o la copia `state` de snapshot_state)"""
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        state = state or snapshot_state()
+        size = snapshot.write_snapshot(SNAPSHOT_FILE, state)
+        print(f"Snapshot guardado: {size} bytes, {len(state['user_info'])} usuarios")
+        return True
+    except Exception as e:
+        print(f"Error guardando snapshot: {e}")
+        return False
+
+@metrics.timed("persistence_flush_seconds", target="inventory")
 async def save_bot_inventory(bot_instance):
     """Guarda el inventario del bot"""
     try:
@@ -164,8 +272,8 @@ async def save_bot_inventory(bot_instance):
                 for item in inventory
             ]
 
-            os.makedirs("data", exist_ok=True)
-            with open("data/bot_inventory.json", "w", encoding="utf-8") as f:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            with open(INVENTORY_FILE, "w", encoding="utf-8") as f:
                 json.dump(inventory_data, f, indent=2, ensure_ascii=False)
 
             safe_print(f"✅ Inventario del bot guardado: {len(inventory_data)} items")
@@ -184,249 +292,70 @@ DISABLED_EMOTE_IDS = {
     "emoji-hello"                # hello
 }
 
-emotes = {
-    "1": {"id": "emote-looping", "name": "fairytwirl", "duration": 9.89, "is_free": True},
-    "2": {"id": "idle-floating", "name": "fairyfloat", "duration": 27.60, "is_free": True},
-    "3": {"id": "emote-launch", "name": "launch", "duration": 10.88, "is_free": True},
-    "4": {"id": "emote-cutesalute", "name": "cutesalute", "duration": 3.79, "is_free": True},
-    "5": {"id": "emote-salute", "name": "atattention", "duration": 4.79, "is_free": True},
-    "6": {"id": "dance-tiktok11", "name": "tiktok", "duration": 11.37, "is_free": True},
-    "7": {"id": "emote-kissing", "name": "smooch", "duration": 6.69, "is_free": True},
-    "8": {"id": "dance-employee", "name": "pushit", "duration": 8.55, "is_free": True},
-    "9": {"id": "emote-gift", "name": "foryou", "duration": 6.09, "is_free": True},
-    "10": {"id": "dance-touch", "name": "touch", "duration": 13.15, "is_free": True},
-    "11": {"id": "dance-kawai", "name": "kawaii", "duration": 10.85, "is_free": True},
-    "12": {"id": "sit-relaxed", "name": "repose", "duration": 31.21, "is_free": True},
-    "13": {"id": "emote-sleigh", "name": "sleigh", "duration": 12.51, "is_free": True},
-    "14": {"id": "emote-hyped", "name": "hyped", "duration": 7.62, "is_free": True},
-    "15": {"id": "dance-jinglebell", "name": "jingle", "duration": 12.09, "is_free": True},
-    "16": {"id": "idle-toilet", "name": "gottago", "duration": 33.48, "is_free": True},
-    "17": {"id": "emote-timejump", "name": "timejump", "duration": 5.51, "is_free": True},
-    "18": {"id": "idle-wild", "name": "scritchy", "duration": 27.35, "is_free": True},
-    "19": {"id": "idle-nervous", "name": "bitnervous", "duration": 22.81, "is_free": True},
-    "20": {"id": "emote-iceskating", "name": "iceskating", "duration": 8.41, "is_free": True},
-    "21": {"id": "emote-celebrate", "name": "partytime", "duration": 4.35, "is_free": True},
-    "22": {"id": "emote-pose10", "name": "arabesque", "duration": 5.00, "is_free": True},
-    "23": {"id": "emote-shy2", "name": "bashful", "duration": 6.34, "is_free": True},
-    "24": {"id": "emote-headblowup", "name": "revelations", "duration": 13.66, "is_free": True},
-    "25": {"id": "emote-creepycute", "name": "watchyourback", "duration": 9.01, "is_free": True},
-    "26": {"id": "dance-creepypuppet", "name": "creepypuppet", "duration": 7.79, "is_free": True},
-    "27": {"id": "dance-anime", "name": "saunter", "duration": 9.60, "is_free": True},
-    "28": {"id": "emote-pose6", "name": "surprise", "duration": 6.46, "is_free": True},
-    "29": {"id": "emote-celebrationstep", "name": "celebration", "duration": 5.18, "is_free": True},
-    "30": {"id": "dance-pinguin", "name": "penguin", "duration": 12.81, "is_free": True},
-    "31": {"id": "emote-boxer", "name": "boxer", "duration": 6.75, "is_free": True},
-    "32": {"id": "idle-guitar", "name": "airguitar", "duration": 14.15, "is_free": True},
-    "33": {"id": "emote-stargazer", "name": "stargaze", "duration": 7.93, "is_free": True},
-    "34": {"id": "emote-pose9", "name": "ditzy", "duration": 6.00, "is_free": True},
-    "35": {"id": "idle-uwu", "name": "uwu", "duration": 25.50, "is_free": True},
-    "36": {"id": "dance-wrong", "name": "wrong", "duration": 13.60, "is_free": True},
-    "37": {"id": "emote-fashionista", "name": "fashion", "duration": 6.33, "is_free": True},
-    "38": {"id": "dance-icecream", "name": "icecream", "duration": 16.58, "is_free": True},
-    "39": {"id": "idle-dance-tiktok4", "name": "sayso", "duration": 16.55, "is_free": True},
-    "40": {"id": "idle_zombie", "name": "zombie", "duration": 31.39, "is_free": True},
-    "41": {"id": "emote-astronaut", "name": "astronaut", "duration": 13.93, "is_free": True},
-    "42": {"id": "emote-punkguitar", "name": "punk", "duration": 10.59, "is_free": True},
-    "43": {"id": "emote-gravity", "name": "zerogravity", "duration": 9.02, "is_free": True},
-    "44": {"id": "emote-pose5", "name": "beautiful", "duration": 5.49, "is_free": True},
-    "46": {"id": "idle-dance-casual", "name": "casual", "duration": 9.57, "is_free": True},
-    "47": {"id": "emote-pose1", "name": "wink", "duration": 4.71, "is_free": True},
-    "48": {"id": "emote-pose3", "name": "fightme", "duration": 5.57, "is_free": True},
-    "50": {"id": "emote-cute", "name": "cute", "duration": 7.20, "is_free": True},
-    "51": {"id": "emote-cutey", "name": "cutey", "duration": 4.07, "is_free": True},
-    "52": {"id": "emote-greedy", "name": "greedy", "duration": 5.72, "is_free": True},
-    "53": {"id": "dance-tiktok9", "name": "viralgroove", "duration": 13.04, "is_free": True},
-    "54": {"id": "dance-weird", "name": "weird", "duration": 22.87, "is_free": True},
-    "55": {"id": "dance-tiktok10", "name": "shuffle", "duration": 9.41, "is_free": True},
-    "56": {"id": "emoji-gagging", "name": "gagging", "duration": 6.84, "is_free": True},
-    "57": {"id": "emoji-celebrate", "name": "raise", "duration": 4.78, "is_free": True},
-    "58": {"id": "dance-tiktok8", "name": "savage", "duration": 13.10, "is_free": True},
-    "59": {"id": "dance-blackpink", "name": "blackpink", "duration": 7.97, "is_free": True},
-    "60": {"id": "emote-model", "name": "model", "duration": 7.43, "is_free": True},
-    "61": {"id": "dance-tiktok2", "name": "dontstartnow", "duration": 11.37, "is_free": True},
-    "62": {"id": "dance-pennywise", "name": "pennywise", "duration": 4.16, "is_free": True},
-    "63": {"id": "emote-bow", "name": "bow", "duration": 5.10, "is_free": True},
-    "64": {"id": "dance-russian", "name": "russian", "duration": 11.39, "is_free": True},
-    "65": {"id": "emote-curtsy", "name": "curtsy", "duration": 3.99, "is_free": True},
-    "66": {"id": "emote-snowball", "name": "snowball", "duration": 6.32, "is_free": True},
-    "67": {"id": "emote-hot", "name": "hot", "duration": 5.57, "is_free": True},
-    "68": {"id": "emote-snowangel", "name": "snowangel", "duration": 7.33, "is_free": True},
-    "69": {"id": "emote-charging", "name": "charging", "duration": 9.53, "is_free": True},
-    "70": {"id": "dance-shoppingcart", "name": "letsgoshopping", "duration": 5.56, "is_free": True},
-    "71": {"id": "emote-confused", "name": "confused", "duration": 9.58, "is_free": True},
-    "72": {"id": "idle-enthusiastic", "name": "enthused", "duration": 17.53, "is_free": True},
-    "73": {"id": "emote-telekinesis", "name": "telekinesis", "duration": 11.01, "is_free": True},
-    "74": {"id": "emote-float", "name": "float", "duration": 9.26, "is_free": True},
-    "75": {"id": "emote-teleporting", "name": "teleporting", "duration": 12.89, "is_free": True},
-    "76": {"id": "emote-swordfight", "name": "swordfight", "duration": 7.71, "is_free": True},
-    "77": {"id": "emote-maniac", "name": "maniac", "duration": 5.94, "is_free": True},
-    "78": {"id": "emote-energyball", "name": "energyball", "duration": 8.28, "is_free": True},
-    "79": {"id": "emote-snake", "name": "worm", "duration": 6.63, "is_free": True},
-    "80": {"id": "idle_singing", "name": "singalong", "duration": 11.31, "is_free": True},
-    "81": {"id": "emote-frog", "name": "frog", "duration": 16.14, "is_free": True},
-    "82": {"id": "dance-macarena", "name": "macarena", "duration": 15.0, "is_free": True},
-    "83": {"id": "emote-kissing-passionate", "name": "kiss", "duration": 9.5, "is_free": True},
-    "84": {"id": "emoji-shake-head", "name": "shakehead", "duration": 3.5, "is_free": True},
-    "85": {"id": "idle-sad", "name": "sad", "duration": 25.24, "is_free": True},
-    "86": {"id": "emoji-nod", "name": "nod", "duration": 2.5, "is_free": True},
-    "87": {"id": "emote-laughing2", "name": "laughing", "duration": 6.60, "is_free": True},
-    "88": {"id": "emoji-hello", "name": "hello", "duration": 3.0, "is_free": True},
-    "89": {"id": "emoji-thumbsup", "name": "thumbsup", "duration": 2.5, "is_free": True},
-    "90": {"id": "mining-fail", "name": "miningfail", "duration": 3.41, "is_free": True},
-    "91": {"id": "emote-shy", "name": "shy", "duration": 5.15, "is_free": True},
-    "92": {"id": "fishing-pull", "name": "fishingpull", "duration": 2.81, "is_free": True},
-    "93": {"id": "dance-thewave", "name": "thewave", "duration": 8.0, "is_free": True},
-    "94": {"id": "idle-angry", "name": "angry", "duration": 26.07, "is_free": True},
-    "95": {"id": "emote-rough", "name": "rough", "duration": 6.0, "is_free": True},
-    "96": {"id": "fishing-idle", "name": "fishingidle", "duration": 17.87, "is_free": True},
-    "97": {"id": "emote-dropped", "name": "dropped", "duration": 4.5, "is_free": True},
-    "98": {"id": "mining-success", "name": "miningsuccess", "duration": 3.11, "is_free": True},
-    "99": {"id": "emote-receive-happy", "name": "receivehappy", "duration": 5.0, "is_free": True},
-    "100": {"id": "emote-cold", "name": "cold", "duration": 5.17, "is_free": True},
-    "101": {"id": "fishing-cast", "name": "fishingcast", "duration": 2.82, "is_free": True},
-    "102": {"id": "emote-sit", "name": "sit", "duration": 20.0, "is_free": True},
-    "103": {"id": "dance-shuffle", "name": "shuffledance", "duration": 9.0, "is_free": True},
-    "104": {"id": "emote-receive-sad", "name": "receivesad", "duration": 5.0, "is_free": True},
-    "105": {"id": "idle-loop-tired", "name": "tired", "duration": 11.23, "is_free": True},
-    "106": {"id": "dance-hipshake", "name": "hipshake", "duration": 13.38, "is_free": True},
-    "107": {"id": "dance-fruity", "name": "fruity", "duration": 18.25, "is_free": True},
-    "108": {"id": "dance-cheerleader", "name": "cheerleader", "duration": 17.93, "is_free": True},
-    "109": {"id": "dance-tiktok14", "name": "magnetic", "duration": 11.20, "is_free": True},
-    "110": {"id": "emote-howl", "name": "nocturnal", "duration": 8.10, "is_free": True},
-    "111": {"id": "idle-howl", "name": "moonlit", "duration": 48.62, "is_free": True},
-    "112": {"id": "emote-trampoline", "name": "trampoline", "duration": 6.11, "is_free": True},
-    "113": {"id": "emote-attention", "name": "attention", "duration": 5.65, "is_free": True},
-    "114": {"id": "sit-open", "name": "laidback", "duration": 27.28, "is_free": True},
-    "115": {"id": "emote-shrink", "name": "shrink", "duration": 9.99, "is_free": True},
-    "116": {"id": "emote-puppet", "name": "puppet", "duration": 17.89, "is_free": True},
-    "117": {"id": "dance-aerobics", "name": "pushups", "duration": 9.89, "is_free": True},
-    "118": {"id": "dance-duckwalk", "name": "duckwalk", "duration": 12.48, "is_free": True},
-    "119": {"id": "dance-handsup", "name": "handsintheair", "duration": 23.18, "is_free": True},
-    "120": {"id": "dance-metal", "name": "rockout", "duration": 15.78, "is_free": True},
-    "121": {"id": "dance-orangejustice", "name": "orangejuice", "duration": 7.17, "is_free": True},
-    "122": {"id": "dance-singleladies", "name": "ringonit", "duration": 22.33, "is_free": True},
-    "123": {"id": "dance-smoothwalk", "name": "smoothwalk", "duration": 7.58, "is_free": True},
-    "124": {"id": "dance-voguehands", "name": "voguehands", "duration": 10.57, "is_free": True},
-    "125": {"id": "emoji-arrogance", "name": "arrogance", "duration": 8.16, "is_free": True},
-    "126": {"id": "emoji-give-up", "name": "giveup", "duration": 6.04, "is_free": True},
-    "127": {"id": "emoji-hadoken", "name": "fireball", "duration": 4.29, "is_free": True},
-    "128": {"id": "emoji-halo", "name": "levitate", "duration": 6.52, "is_free": True},
-    "129": {"id": "emoji-lying", "name": "lying", "duration": 7.39, "is_free": True},
-    "130": {"id": "emoji-naughty", "name": "naughty", "duration": 5.73, "is_free": True},
-    "131": {"id": "emoji-poop", "name": "stinky", "duration": 5.86, "is_free": True},
-    "132": {"id": "emoji-pray", "name": "pray", "duration": 6.00, "is_free": True},
-    "133": {"id": "emoji-punch", "name": "punch", "duration": 3.36, "is_free": True},
-    "134": {"id": "emoji-sick", "name": "sick", "duration": 6.22, "is_free": True},
-    "135": {"id": "emoji-smirking", "name": "smirk", "duration": 5.74, "is_free": True},
-    "136": {"id": "emoji-sneeze", "name": "sneeze", "duration": 4.33, "is_free": True},
-    "137": {"id": "emoji-there", "name": "point", "duration": 3.09, "is_free": True},
-    "138": {"id": "emote-death2", "name": "collapse", "duration": 5.54, "is_free": True},
-    "139": {"id": "emote-disco", "name": "disco", "duration": 6.14, "is_free": True},
-    "140": {"id": "emote-ghost-idle", "name": "ghostfloat", "duration": 20.43, "is_free": True},
-    "141": {"id": "emote-handstand", "name": "handstand", "duration": 5.89, "is_free": True},
-    "142": {"id": "emote-kicking", "name": "superkick", "duration": 6.21, "is_free": True},
-    "143": {"id": "emote-panic", "name": "panic", "duration": 4.5, "is_free": True},
-    "144": {"id": "emote-splitsdrop", "name": "splits", "duration": 5.31, "is_free": True},
-    "145": {"id": "idle_layingdown", "name": "attentive", "duration": 26.11, "is_free": True},
-    "146": {"id": "idle_layingdown2", "name": "relaxed", "duration": 22.59, "is_free": True},
-    "147": {"id": "emote-apart", "name": "fallingapart", "duration": 5.98, "is_free": True},
-    "148": {"id": "emote-baseball", "name": "homerun", "duration": 8.47, "is_free": True},
-    "149": {"id": "emote-boo", "name": "boo", "duration": 5.58, "is_free": True},
-    "150": {"id": "emote-bunnyhop", "name": "bunnyhop", "duration": 13.63, "is_free": True},
-    "151": {"id": "emote-death", "name": "revival", "duration": 8.00, "is_free": True},
-    "152": {"id": "emote-deathdrop", "name": "faintdrop", "duration": 4.18, "is_free": True},
-    "153": {"id": "emote-elbowbump", "name": "elbowbump", "duration": 6.44, "is_free": True},
-    "154": {"id": "emote-fail1", "name": "fall", "duration": 6.90, "is_free": True},
-    "155": {"id": "emote-fail2", "name": "clumsy", "duration": 7.74, "is_free": True},
-    "156": {"id": "emote-fainting", "name": "faint", "duration": 18.55, "is_free": True},
-    "157": {"id": "emote-hugyourself", "name": "hugyourself", "duration": 6.03, "is_free": True},
-    "158": {"id": "emote-jetpack", "name": "jetpack", "duration": 17.77, "is_free": True},
-    "159": {"id": "emote-judochop", "name": "judochop", "duration": 5.0, "is_free": True},
-    "160": {"id": "emote-jumpb", "name": "jump", "duration": 4.87, "is_free": True},
-    "161": {"id": "emote-laughing2", "name": "amused", "duration": 6.60, "is_free": True},
-    "162": {"id": "emote-levelup", "name": "levelup", "duration": 7.27, "is_free": True},
-    "163": {"id": "emote-monster_fail", "name": "monsterfail", "duration": 5.42, "is_free": True},
-    "164": {"id": "idle-dance-headbobbing", "name": "nightfever", "duration": 23.65, "is_free": True},
-    "165": {"id": "emote-ninjarun", "name": "ninjarun", "duration": 6.50, "is_free": True},
-    "166": {"id": "emoji-peace", "name": "peace", "duration": 3.5, "is_free": True},
-    "167": {"id": "emote-peekaboo", "name": "peekaboo", "duration": 4.52, "is_free": True},
-    "168": {"id": "emote-proposing", "name": "proposing", "duration": 5.91, "is_free": True},
-    "169": {"id": "emote-rainbow", "name": "rainbow", "duration": 8.0, "is_free": True},
-    "170": {"id": "emote-robot", "name": "robot", "duration": 10.0, "is_free": True},
-    "171": {"id": "emote-rofl", "name": "rofl", "duration": 7.65, "is_free": True},
-    "172": {"id": "emote-roll", "name": "roll", "duration": 4.31, "is_free": True},
-    "173": {"id": "emote-ropepull", "name": "ropepull", "duration": 10.69, "is_free": True},
-    "174": {"id": "emote-secrethandshake", "name": "secrethandshake", "duration": 6.28, "is_free": True},
-    "175": {"id": "emote-sumo", "name": "sumofight", "duration": 11.64, "is_free": True},
-    "176": {"id": "emote-superpunch", "name": "superpunch", "duration": 5.75, "is_free": True},
-    "177": {"id": "emote-superrun", "name": "superrun", "duration": 7.16, "is_free": True},
-    "178": {"id": "emote-theatrical", "name": "theatrical", "duration": 11.00, "is_free": True},
-    "179": {"id": "emote-wings", "name": "ibelieve", "duration": 14.21, "is_free": True},
-    "180": {"id": "emote-frustrated", "name": "irritated", "duration": 6.41, "is_free": True},
-    "181": {"id": "idle-floorsleeping", "name": "cozynap", "duration": 14.61, "is_free": True},
-    "182": {"id": "idle-floorsleeping2", "name": "relaxing", "duration": 18.83, "is_free": True},
-    "183": {"id": "idle-hero", "name": "heropose", "duration": 22.33, "is_free": True},
-    "184": {"id": "idle-lookup", "name": "ponder", "duration": 8.75, "is_free": True},
-    "185": {"id": "idle-posh", "name": "posh", "duration": 23.29, "is_free": True},
-    "186": {"id": "idle-sad", "name": "poutyface", "duration": 25.24, "is_free": True},
-    "187": {"id": "emote-dab", "name": "dab", "duration": 3.75, "is_free": True},
-    "188": {"id": "dance-gangnamstyle", "name": "gangnamstyle", "duration": 15.0, "is_free": True},
-    "189": {"id": "emoji-crying", "name": "sob", "duration": 4.91, "is_free": True},
-    "190": {"id": "idle-loop-tapdance", "name": "taploop", "duration": 7.81, "is_free": True},
-    "191": {"id": "idle-sleep", "name": "sleepy", "duration": 3.35, "is_free": True},
-    "192": {"id": "dance-sexy", "name": "wiggledance", "duration": 13.70, "is_free": True},
-    "193": {"id": "emoji-eyeroll", "name": "eyeroll", "duration": 3.75, "is_free": True},
-    "194": {"id": "dance-moonwalk", "name": "moonwalk", "duration": 12.0, "is_free": True},
-    "195": {"id": "idle-fighter", "name": "fighter", "duration": 18.64, "is_free": True},
-    "196": {"id": "idle-dance-tiktok7", "name": "renegade", "duration": 14.05, "is_free": True},
-    "197": {"id": "emote-facepalm", "name": "facepalm", "duration": 5.0, "is_free": True},
-    "198": {"id": "idle-dance-headbobbing", "name": "feelthebeat", "duration": 23.65, "is_free": True},
-    "199": {"id": "emote-pose8", "name": "happy", "duration": 5.62, "is_free": True},
-    "200": {"id": "emote-hug", "name": "hug", "duration": 4.53, "is_free": True},
-    "201": {"id": "emote-slap", "name": "slap", "duration": 4.06, "is_free": True},
-    "202": {"id": "emoji-clapping", "name": "clap", "duration": 2.98, "is_free": True},
-    "203": {"id": "emote-exasperated", "name": "exasperated", "duration": 4.10, "is_free": True},
-    "204": {"id": "emote-kissing-passionate", "name": "sweetsmooch", "duration": 10.47, "is_free": True},
-    "205": {"id": "emote-tapdance", "name": "tapdance", "duration": 6.0, "is_free": True},
-    "206": {"id": "emote-suckthumb", "name": "thumbsuck", "duration": 5.23, "is_free": True},
-    "207": {"id": "dance-harlemshake", "name": "harlemshake", "duration": 10.0, "is_free": True},
-    "208": {"id": "emote-heartfingers", "name": "heartfingers", "duration": 5.18, "is_free": True},
-    "209": {"id": "idle-loop-aerobics", "name": "aerobics", "duration": 10.08, "is_free": True},
-    "210": {"id": "emote-heartshape", "name": "heartshape", "duration": 7.60, "is_free": True},
-    "211": {"id": "emote-hearteyes", "name": "hearteyes", "duration": 5.99, "is_free": True},
-    "212": {"id": "dance-wild", "name": "karmadance", "duration": 16.25, "is_free": True},
-    "213": {"id": "emoji-scared", "name": "gasp", "duration": 4.06, "is_free": True},
-    "214": {"id": "emote-think", "name": "think", "duration": 4.81, "is_free": True},
-    "215": {"id": "emoji-dizzy", "name": "stunned", "duration": 5.38, "is_free": True},
-    "216": {"id": "emote-embarrassed", "name": "embarrassed", "duration": 9.09, "is_free": True},
-    "217": {"id": "emote-disappear", "name": "blastoff", "duration": 5.53, "is_free": True},
-    "218": {"id": "idle-loop-annoyed", "name": "annoyed", "duration": 18.62, "is_free": True},
-    "219": {"id": "dance-zombie", "name": "dancezombie", "duration": 13.83, "is_free": True},
-    "220": {"id": "idle-loop-happy", "name": "chillin", "duration": 19.80, "is_free": True},
-    "221": {"id": "emote-frustrated", "name": "frustrated", "duration": 6.41, "is_free": True},
-    "222": {"id": "idle-loop-sad", "name": "bummed", "duration": 21.80, "is_free": True},
-    "223": {"id": "emoji-ghost", "name": "ghost", "duration": 3.74, "is_free": True},
-    "224": {"id": "emoji-mind-blown", "name": "mindblown", "duration": 3.46, "is_free": True}
-}
+emotes = emote_catalog.EMOTES
+
+# Duraciones calibradas con lo observado (compartidas con el cantinero); el catálogo es la estimación inicial
+EMOTE_CALIBRATION = emote_calibration.EmoteCalibration("data/emote_calibration.json", BOT_NAME)
+EMOTE_CALIBRATION.seed({e["id"]: e.get("duration") for e in emotes.values()})
+# Adelanto fijo con el que los bucles envían el siguiente emote antes de que acabe el anterior
+EMOTE_LEAD = config.get("emote_lead_ms", emote_scheduler.DEFAULT_LEAD * 1000) / 1000
+
+def find_emote(key: str, allow_number: bool = True) -> Optional[dict]:
+    """Busca un emote por número, nombre o id (sin distinguir mayúsculas)"""
+    if allow_number and key in emotes:
+        return emotes[key]
+    key = key.lower()
+    for e in emotes.values():
+        if e["name"].lower() == key or e["id"].lower() == key:
+            return e
+    return None
 
 # ============================================================================
 # CLASE PRINCIPAL DEL BOT
 # ============================================================================
 
+class ConnectionStopped(Exception):
+    """El bot alojado por run.py/rooms.py cierra su conexión (el supervisor la reinicia)"""
+
+
 class Bot(BaseBot):
     def __init__(self):
         super().__init__()
         self.last_announcement = 0
-        self.user_positions = {}
+        self.user_positions = bounded_store.TTLMap("user_positions", ttl=3600, maxsize=5000)
         self.connection_retries = 0
         self.bot_mode = "idle"
         self.current_emote_task = None
-        self.flashmode_cooldown = {}
+        self.flashmode_cooldown = bounded_store.TTLMap("flashmode_cooldown", ttl=60)
         self.session_active = False
         self.reconnection_in_progress = False
-        self.copied_emotes = {}  # {número: {"emote_id": str, "name": str, "from_user": str}}
+        self.emote_sessions = {}  # {emote_id: GroupEmoteSession}
+        self.copied_emotes = bounded_store.LRUMap("copied_emotes", 100)  # {número: {"emote_id": str, "name": str, "from_user": str}}
         self.copied_emote_mode = False
         self.current_copied_emote = None
+        # Los manejadores esperan a este evento; on_start lo limpia hasta cargar los datos
+        self.ready = asyncio.Event()
+        self.ready.set()
+        self.data_loaded = False
+        # run.supervise_hosted lo activa: el bot comparte el proceso con otros y no puede usar sys.exit
+        self.hosted = False
+        # Una sola instancia viva por tarea aunque on_start o la reconexión se repitan
+        self.tasks = task_registry.TaskRegistry(BOT_NAME, logger=lambda line: log_event("TASK", line))
+        # Eventos en colas por usuario; los workers se lanzan con las tareas en segundo plano
+        self.dispatcher = dispatcher.EventDispatcher(BOT_NAME, logger=lambda line: log_event("ERROR", line))
+        self.outbox = message_coalescer.Outbox(
+            BOT_NAME, window=config.get("coalesce_window_ms", 150) / 1000, logger=lambda line: log_event("ERROR", line))
+        # Saldo de oro en memoria; BOT_WALLET de config.json solo se usa hasta la primera conciliación
+        self.wallet = wallet_ledger.WalletLedger(lambda: self.highrise, fallback=BOT_WALLET, name=BOT_NAME,
+                                                 logger=lambda line: log_event("WALLET", line))
+        # Anuncios automáticos: turnos compartidos con el cantinero (announcements.json)
+        self.announcements = announcements.AnnouncementScheduler(
+            "main", self.announce, occupancy=self.occupancy,
+            path=config.get("announcements_file", announcements.DEFAULT_PATH),
+            channel=ROOM.path(announcements.CHANNEL_DIR), logger=lambda line: log_event("BOT", line))
+        # Lista de sala y estado compartidos con el cantinero a través del launcher
+        self.presence = presence.PresenceBus("main", logger=lambda line: log_event("BOT", line))
+        self.room_users = None  # usuarios en el último get_room_users de esta sala (metrics.instrument_bot)
 
     # ========================================================================
     # MÉTODOS DE INICIALIZACIÓN Y CONEXIÓN
@@ -443,15 +372,17 @@ class Bot(BaseBot):
             try:
                 await asyncio.sleep(30)  # Verificar cada 30 segundos
                 
-                # Verificar si el bot está en la sala
+                # Verificar si el bot está en la sala (con la lista del cantinero si es reciente)
                 try:
-                    room_users = await self.highrise.get_room_users()
-                    if isinstance(room_users, Error):
-                        raise Exception("Error obteniendo usuarios de la sala")
-                    
+                    users = self.presence.shared_users(presence.ROSTER_MAX_AGE)
+                    if users is None:
+                        room_users = await self.highrise.get_room_users()
+                        if isinstance(room_users, Error):
+                            raise Exception("Error obteniendo usuarios de la sala")
+                        users = self.presence.publish_roster(room_users.content)
+
                     # Verificar si el bot está en la lista de usuarios
-                    users = room_users.content
-                    bot_in_room = any(u.id == self.bot_id for u, _ in users)
+                    bot_in_room = self.bot_id in users
                     
                     if not bot_in_room:
                         log_event("WARNING", "Bot no encontrado en la sala, intentando reconectar...")
@@ -483,14 +414,13 @@ class Bot(BaseBot):
                 if not isinstance(room_users, Error):
                     safe_print("✅ Reconexión exitosa!")
                     log_event("BOT", "Reconexión exitosa")
+                    metrics.inc("reconnects_total")
                     
-                    # Reiniciar tareas en segundo plano si es necesario
-                    asyncio.create_task(self.start_announcements())
-                    asyncio.create_task(self.check_console_messages())
-                    asyncio.create_task(self.periodic_inventory_save())
+                    # Relanzar solo las tareas que ya no estén vivas
+                    await self.start_background_tasks()
                     
                     if self.bot_mode == "auto":
-                        asyncio.create_task(self.start_auto_emote_cycle())
+                        self.current_emote_task = self.tasks.start("auto_emote_cycle", self.start_auto_emote_cycle)
                         
                     return True
                     
@@ -509,54 +439,156 @@ class Bot(BaseBot):
             self.session_active = True
             log_event("BOT", f"Bot ID almacenado: {self.bot_id}")
 
+            # Métricas para /metrics del launcher; chat y susurros pasan por el buzón de salida
+            self.highrise = self.outbox.unwrap(self.highrise)
+            metrics.instrument_bot(self)
+            self.highrise = self.outbox.wrap(self.highrise)
+            metrics.add_collector(self.collect_metrics)
+            metrics.add_collector(self.outbox.collect_metrics)
+            metrics.add_collector(self.tasks.collect_metrics)
+            metrics.add_collector(bounded_store.collect_metrics)
+            metrics.add_collector(self.dispatcher.collect_metrics)
+            metrics.add_collector(EMOTE_CALIBRATION.collect_metrics)
+            instrumentation.configure(
+                enabled=config.get("instrumentation_enabled", True),
+                slow_threshold_ms=config.get("slow_command_threshold_ms", 1000),
+                logger=lambda line: log_event("SLOW", line),
+            )
+
             if await self.connect_with_retry():
                 safe_print("Bot conectado exitosamente!")
-                self.load_data()
-
-                # Iniciar tareas en segundo plano
-                asyncio.create_task(self.start_announcements())
-                asyncio.create_task(self.check_console_messages())
-                asyncio.create_task(self.periodic_inventory_save())
-                asyncio.create_task(self.auto_reconnect_loop())
-
-                # Configurar apariencia inicial
-                await self.setup_initial_bot_appearance()
-                await save_bot_inventory(self)
-
-                # Iniciar ciclo automático de emotes (sin esperar a que termine)
-                self.bot_mode = "auto"
-                asyncio.create_task(self.start_auto_emote_cycle())
-                safe_print("🎭 Ciclo automático de 224 emotes iniciado")
-                log_event("BOT", "Ciclo automático de 224 emotes iniciado")
+                boot = startup.BootPipeline(
+                    BOT_NAME, ready_after=("load_data", "user_archive", "hearts_journal", "economy"), ready=self.ready)
+                boot.step("outfit", self.setup_initial_outfit)
+                boot.step("spawn", self.teleport_to_spawn)
+                if self.data_loaded:
+                    # Reconexión: los datos en memoria son los vigentes (recargarlos pisaría los cambios
+                    # hechos desde el último guardado y el diario ya abierto no los repondría)
+                    boot.step("background_tasks", self.start_background_tasks)
+                else:
+                    self.ready.clear()
+                    # Pasos independientes en paralelo: los datos se cargan en un hilo
+                    # mientras se envían el outfit y el teletransporte
+                    boot.step("load_data", self.load_data, thread=True)
+                    boot.step("inventory", lambda: save_bot_inventory(self))
+                    boot.step("user_archive", self.open_user_archive, after=("load_data",), thread=True)
+                    boot.step("hearts_journal", self.replay_hearts_journal, after=("load_data", "user_archive"))
+                    boot.step("economy", self.sync_shared_economy, after=("hearts_journal",))
+                    boot.step("background_tasks", self.start_background_tasks, after=("hearts_journal",))
+                    boot.step("emote_calibration", EMOTE_CALIBRATION.load, thread=True)
+                    boot.step("emote_cycle", self.start_emote_cycle_task, after=("spawn", "emote_calibration"))
+                await boot.run()
+                self.data_loaded = True
+
+                safe_print(f"⏱️ {boot.summary()}")
+                log_event("BOOT", json.dumps(boot.report(), ensure_ascii=False))
+                log_event("BOT", f"Bot inicializado (ID: {self.bot_id})")
             else:
                 print("No se pudo conectar al servidor")
-                sys.exit(1)
+                self.stop(1, "no se pudo conectar al servidor")
+        except ConnectionStopped:
+            raise
         except Exception as e:
             print(f"Error en on_start: {e}")
+        finally:
+            self.ready.set()
 
         safe_print("🤖 ¡Bot iniciado! Usa !help para ver los comandos.")
 
+    async def start_background_tasks(self):
+        """Lanza las tareas periódicas del bot (las que ya estén vivas no se duplican)"""
+        for index in range(config.get("dispatch_workers", dispatcher.DEFAULT_WORKERS)):
+            self.tasks.start(f"dispatch_worker_{index}", self.dispatcher.worker)
+        self.tasks.start("announcements", self.start_announcements)
+        self.tasks.start("console_messages", self.check_console_messages)
+        self.tasks.start("inventory_save", self.periodic_inventory_save)
+        self.tasks.start("snapshot_save", self.periodic_snapshot_save)
+        self.tasks.start("auto_reconnect", self.auto_reconnect_loop)
+        if self.presence.address is not None:
+            self.tasks.start("presence_bus", self.presence.run)
+            self.tasks.start("presence_loops", lambda: self.presence.share_loops(lambda: {self.bot_id, *ACTIVE_EMOTES}))
+        self.tasks.start("store_purge", bounded_store.purge_loop)
+        # El archivo de usuarios y el diario de corazones compartidos los mantiene la sala dueña
+        if ROOM.owns("economy"):
+            self.tasks.start("user_archive", self.periodic_user_archive)
+            self.tasks.start("hearts_journal_flush", HEARTS_JOURNAL.flush_loop)
+            self.tasks.start("hearts_journal_compact", self.periodic_journal_compaction)
+        # La consola se abre una sola vez por proceso (tras 'quit' no se reabre al reconectar)
+        if config.get("console_enabled", False) and console.stdin_is_interactive() and "console" not in self.tasks.entries:
+            self.tasks.start("console", self.console_chat_input, restart=False)
+        self.tasks.start("emote_calibration_save", EMOTE_CALIBRATION.save_loop)
+        self.tasks.start("wallet_reconcile", lambda: self.wallet.reconcile_loop(
+            config.get("wallet_reconcile_seconds", wallet_ledger.RECONCILE_INTERVAL)))
+
+    async def start_emote_cycle_task(self):
+        """Inicia el ciclo automático de emotes (sin esperar a que termine)"""
+        self.bot_mode = "auto"
+        self.current_emote_task = self.tasks.start("auto_emote_cycle", self.start_auto_emote_cycle)
+        safe_print("🎭 Ciclo automático de 224 emotes iniciado")
+        log_event("BOT", "Ciclo automático de 224 emotes iniciado")
+
+    def occupancy(self):
+        """Usuarios en esta sala: la lista compartida si es reciente, si no el último get_room_users"""
+        users = self.presence.shared_users(presence.ROSTER_MAX_AGE)
+        return len(users) if users is not None else self.room_users
+
+    def collect_metrics(self):
+        """Actualiza los gauges del bot antes de cada snapshot de métricas"""
+        metrics.set_gauge("active_emote_loops", len(ACTIVE_EMOTES), bot=BOT_NAME)
+        users = self.occupancy()
+        if users is not None:
+            metrics.set_gauge("room_users", users, bot=BOT_NAME)
+        # La economía compartida se cuenta una vez, en la sala que la carga
+        if ROOM.owns("economy"):
+            USERS.collect_metrics(bot=BOT_NAME)
+
     # ========================================================================
     # SISTEMA DE CARGA Y GUARDADO DE DATOS
     # ========================================================================
 
     def load_data(self):
-        """Carga datos desde archivos"""
+        """Carga datos desde el snapshot binario o, si no está al día, desde los archivos de texto"""
+        os.makedirs(DATA_DIR, exist_ok=True)
+        if snapshot.is_fresh(SNAPSHOT_FILE, SNAPSHOT_SOURCES):
+            try:
+                started = time.perf_counter()
+                state = snapshot.read_snapshot(
+                    SNAPSHOT_FILE, item_factory=lambda t, i, a: Item(type=t, id=i, amount=a)
+                )
+                # Los datos compartidos entre salas los carga solo la sala dueña
+                if ROOM.owns("vip"):
+                    VIP_USERS.update(state["vip_users"])
+                TELEPORT_POINTS.update(state["teleport_points"])
+                if ROOM.owns("economy"):
+                    USER_NAMES.update(state["user_names"])
+                    USER_HEARTS.update(state["user_hearts"])
+                    USER_ACTIVITY.update(state["user_activity"])
+                    USER_INFO.update(state["user_info"])
+                SAVED_OUTFITS.update(state["saved_outfits"])
+                elapsed = (time.perf_counter() - started) * 1000
+                safe_print(f"✅ Snapshot cargado en {elapsed:.1f} ms: {len(USER_INFO)} usuarios, {len(USER_HEARTS)} corazones, {len(VIP_USERS)} VIP, {len(TELEPORT_POINTS)} puntos")
+                return
+            except snapshot.SnapshotError as e:
+                safe_print(f"⚠️ Snapshot no válido ({e}), cargando archivos de texto")
+
+        self.load_text_data()
+        # Importar al formato binario para el próximo arranque
+        save_snapshot()
+
+    def load_text_data(self):
+        """Carga datos desde los archivos de texto"""
         try:
-            # Crear directorio data si no existe
-            os.makedirs("data", exist_ok=True)
-            
             # Cargar VIP
-            if os.path.exists("data/vip.txt"):
-                with open("data/vip.txt", "r", encoding="utf-8") as f:
+            if ROOM.owns("vip") and os.path.exists(VIP_FILE):
+                with open(VIP_FILE, "r", encoding="utf-8") as f:
                     for line in f:
                         if line.strip() and not line.startswith("#"):
                             VIP_USERS.add(line.strip())
             safe_print(f"✅ Datos VIP cargados: {len(VIP_USERS)} usuarios")
 
             # Cargar puntos de teletransporte
-            if os.path.exists("data/teleport_points.txt"):
-                with open("data/teleport_points.txt", "r", encoding="utf-8") as f:
+            if os.path.exists(TELEPORT_POINTS_FILE):
+                with open(TELEPORT_POINTS_FILE, "r", encoding="utf-8") as f:
                     for line in f:
                         if line.strip() and not line.startswith("#"):
                             try:
@@ -570,8 +602,8 @@ class Bot(BaseBot):
             safe_print(f"✅ Puntos de teletransporte cargados: {len(TELEPORT_POINTS)} puntos")
             
             # Cargar corazones
-            if os.path.exists("data/hearts.txt"):
-                with open("data/hearts.txt", "r", encoding="utf-8") as f:
+            if ROOM.owns("economy") and os.path.exists(HEARTS_FILE):
+                with open(HEARTS_FILE, "r", encoding="utf-8") as f:
                     for line in f:
                         if line.strip() and not line.startswith("#"):
                             try:
@@ -587,8 +619,8 @@ class Bot(BaseBot):
             safe_print(f"✅ Corazones cargados: {len(USER_HEARTS)} usuarios")
             
             # Cargar actividad
-            if os.path.exists("data/activity.txt"):
-                with open("data/activity.txt", "r", encoding="utf-8") as f:
+            if ROOM.owns("economy") and os.path.exists(ACTIVITY_FILE):
+                with open(ACTIVITY_FILE, "r", encoding="utf-8") as f:
                     for line in f:
                         if line.strip() and not line.startswith("#"):
                             try:
@@ -608,8 +640,8 @@ class Bot(BaseBot):
             safe_print(f"✅ Actividad cargada: {len(USER_ACTIVITY)} usuarios")
             
             # Cargar información de usuarios
-            if os.path.exists("data/user_info.json"):
-                with open("data/user_info.json", "r", encoding="utf-8") as f:
+            if ROOM.owns("economy") and os.path.exists(USER_INFO_FILE):
+                with open(USER_INFO_FILE, "r", encoding="utf-8") as f:
                     loaded_data = json.load(f)
                     for user_id, data in loaded_data.items():
                         USER_INFO[user_id] = data
@@ -623,9 +655,9 @@ class Bot(BaseBot):
             safe_print(f"✅ Info de usuarios cargada: {len(USER_INFO)} usuarios")
             
             # Cargar outfits guardados
-            if os.path.exists("data/saved_outfits.json"):
+            if os.path.exists(SAVED_OUTFITS_FILE):
                 from highrise.models import Item
-                with open("data/saved_outfits.json", "r", encoding="utf-8") as f:
+                with open(SAVED_OUTFITS_FILE, "r", encoding="utf-8") as f:
                     outfits_data = json.load(f)
                     for num_str, items_data in outfits_data.items():
                         outfit_items = [Item(type=item["type"], id=item["id"], amount=item.get("amount", 1)) for item in items_data]
@@ -637,20 +669,23 @@ class Bot(BaseBot):
             import traceback
             traceback.print_exc()
 
+    @metrics.timed("persistence_flush_seconds", target="all")
     def save_data(self):
         """Guarda datos en archivos"""
         try:
-            os.makedirs("data", exist_ok=True)
+            os.makedirs(DATA_DIR, exist_ok=True)
 
             # Guardar VIP
-            with open("data/vip.txt", "w", encoding="utf-8") as f:
-                f.write("# Usuarios VIP (un username por línea)\n")
-                for username in sorted(VIP_USERS):
-                    f.write(f"{username}\n")
-            safe_print(f"✅ Datos VIP guardados: {len(VIP_USERS)} usuarios")
+            if ROOM.owns("vip"):
+                os.makedirs(os.path.dirname(VIP_FILE), exist_ok=True)
+                with open(VIP_FILE, "w", encoding="utf-8") as f:
+                    f.write("# Usuarios VIP (un username por línea)\n")
+                    for username in sorted(VIP_USERS):
+                        f.write(f"{username}\n")
+                safe_print(f"✅ Datos VIP guardados: {len(VIP_USERS)} usuarios")
 
             # Guardar puntos de teletransporte
-            with open("data/teleport_points.txt", "w", encoding="utf-8") as f:
+            with open(TELEPORT_POINTS_FILE, "w", encoding="utf-8") as f:
                 f.write("# Puntos de teletransporte (nombre|x|y|z)\n")
                 for name, coords in sorted(TELEPORT_POINTS.items()):
                     f.write(f"{name}|{coords['x']}|{coords['y']}|{coords['z']}\n")
@@ -662,7 +697,7 @@ class Bot(BaseBot):
                 for num, outfit in SAVED_OUTFITS.items():
                     outfits_data[str(num)] = [{"type": item.type, "id": item.id, "amount": item.amount} for item in outfit]
                 
-                with open("data/saved_outfits.json", "w", encoding="utf-8") as f:
+                with open(SAVED_OUTFITS_FILE, "w", encoding="utf-8") as f:
                     json.dump(outfits_data, f, indent=2, ensure_ascii=False)
                 safe_print(f"✅ Outfits guardados: {len(SAVED_OUTFITS)}")
 
@@ -736,10 +771,13 @@ class Bot(BaseBot):
 
     def get_user_hearts(self, user_id: str) -> int:
         """Obtiene corazones del usuario"""
+        USERS.ensure(user_id)
         return USER_HEARTS.get(user_id, 0)
 
-    def add_user_hearts(self, user_id: str, hearts: int, username: str | None = None):
-        """Añade corazones al usuario"""
+    def add_user_hearts(self, user_id: str, hearts: int, username: str | None = None,
+                        giver_id: str | None = None, kind: str = "give"):
+        """Añade corazones al usuario y anota el cambio en el diario"""
+        USERS.ensure(user_id)
         if user_id not in USER_HEARTS:
             USER_HEARTS[user_id] = 0
         USER_HEARTS[user_id] += hearts
@@ -747,10 +785,11 @@ class Bot(BaseBot):
         if username:
             USER_NAMES[user_id] = username
 
-        save_leaderboard_data()
+        HEARTS_JOURNAL.append(kind, user_id, hearts, USER_HEARTS[user_id], giver_id)
 
     def update_activity(self, user_id: str):
         """Actualiza actividad del usuario"""
+        USERS.ensure(user_id)
         if user_id not in USER_ACTIVITY:
             USER_ACTIVITY[user_id] = {"messages": 0, "last_activity": datetime.now()}
         USER_ACTIVITY[user_id]["messages"] += 1
@@ -761,6 +800,7 @@ class Bot(BaseBot):
 
     def update_user_info(self, user_id: str, username: str):
         """Actualiza información del usuario"""
+        USERS.ensure(user_id)
         if user_id not in USER_INFO:
             USER_INFO[user_id] = {
                 "username": username,
@@ -805,6 +845,7 @@ class Bot(BaseBot):
 
     def get_user_total_time(self, user_id: str) -> int:
         """Obtiene el tiempo total del usuario en la sala"""
+        USERS.ensure(user_id)
         if user_id in USER_INFO:
             return USER_INFO[user_id].get("total_time_in_room", 0)
         return 0
@@ -833,7 +874,7 @@ class Bot(BaseBot):
                     "!wave @user [cantidad] - Saludar\n"
                     "!game love @user1 @user2 - Amorómetro|||"
                     "🎭 EMOTES:\n"
-                    "!emote list - Lista emotes\n"
+                    "!emote list [página] - Lista emotes\n"
                     "[número] - Hacer emote\n"
                     "[emote] - Hacer emote\n"
                     "!emote @user [emote] - Emote a usuario\n"
@@ -847,7 +888,7 @@ class Bot(BaseBot):
                     "!flash [x] [y] [z] - Flash entre pisos\n"
                     "!bring @user - Traer usuario\n"
                     "!goto @user [punto] - Enviar usuario a punto\n"
-                    "!tplist - Puntos de teleporte\n"
+                    "!tplist [página] - Puntos de teleporte\n"
                     "!tp [nombre] - Ir a punto\n"
                     "[nombre_punto] - Ir a punto\n"
                     "!tele list - Lista ubicaciones\n"
@@ -868,8 +909,8 @@ class Bot(BaseBot):
                     "!unmute @user - Quitar silencio\n"
                     "!jail @user - Enviar a cárcel\n"
                     "!unjail @user - Liberar de cárcel\n"
-                    "!banlist - Lista baneados\n"
-                    "!mutelist - Lista silenciados\n"
+                    "!banlist [página] - Lista baneados\n"
+                    "!mutelist [página] - Lista silenciados\n"
                     "!privilege @user - Ver privilegios|||"
                     "🤖 BOT:\n"
                     "!bot @user - Atacar con bot\n"
@@ -880,7 +921,7 @@ class Bot(BaseBot):
                     "!copyoutfit - Copiar tu outfit|||"
                     "👔 APARIENCIA:\n"
                     "!outfit [número] - Cambiar outfit\n"
-                    "!inventory - Ver inventario\n"
+                    "!inventory [página] - Ver inventario\n"
                     "!inventory @user - Ver outfit usuario\n"
                     "!give @user [item] - Dar item|||"
                     "🎵 DJ & MÚSICA:\n"
@@ -891,7 +932,7 @@ class Bot(BaseBot):
                     "💰 DINERO:\n"
                     "!tip all [1-5] - Dar oro a todos\n"
                     "!tip only [X] - Dar oro a X usuarios\n"
-                    "!wallet - Balance bot|||"
+                    "!wallet [sync] - Balance bot|||"
                     "🏆 LOGROS & RANKING:\n"
                     "!leaderboard heart - Top corazones\n"
                     "!leaderboard active - Top actividad\n"
@@ -916,6 +957,9 @@ class Bot(BaseBot):
                     "!boom @user - Explotar|||"
                     "🔧 SISTEMA:\n"
                     "!restart - Reiniciar bot\n"
+                    "!perf - Latencias por comando\n"
+                    "!tasks - Tareas en segundo plano\n"
+                    "!drift - Deriva de bucles de emotes\n"
                     "!help - Ver comandos\n"
                     "!help interaction - Ayuda interacción\n"
                     "!help teleport - Ayuda teleporte\n"
@@ -939,14 +983,14 @@ class Bot(BaseBot):
                     "!wave @user - Saludar\n"
                     "!game love @user1 @user2 - Amorómetro|||"
                     "🎭 EMOTES:\n"
-                    "!emote list - Lista emotes\n"
+                    "!emote list [página] - Lista emotes\n"
                     "[número] - Hacer emote\n"
                     "[emote] - Hacer emote\n"
                     "!stop - Detener tu emote\n"
                     "!stop @user - Detener emote usuario|||"
                     "⚡ TELETRANSPORTE:\n"
                     "!flash [x] [y] [z] - Flash entre pisos\n"
-                    "!tplist - Puntos de teleporte\n"
+                    "!tplist [página] - Puntos de teleporte\n"
                     "!tp [nombre] - Ir a punto\n"
                     "[nombre_punto] - Ir a punto\n"
                     "!tele list - Lista ubicaciones\n"
@@ -992,13 +1036,13 @@ class Bot(BaseBot):
                     "!wave @user - Saludar\n"
                     "!game love @user1 @user2 - Amorómetro|||"
                     "🎭 EMOTES:\n"
-                    "!emote list - Lista emotes\n"
+                    "!emote list [página] - Lista emotes\n"
                     "[número] - Hacer emote\n"
                     "[emote] - Hacer emote\n"
                     "!stop - Detener tu emote|||"
                     "⚡ TELETRANSPORTE:\n"
                     "!flash [x] [y] [z] - Flash entre pisos\n"
-                    "!tplist - Puntos de teleporte\n"
+                    "!tplist [página] - Puntos de teleporte\n"
                     "!tp [nombre] - Ir a punto\n"
                     "[nombre_punto] - Ir a punto\n"
                     "!tele list - Lista ubicaciones|||"
@@ -1053,6 +1097,28 @@ class Bot(BaseBot):
             print(f"Error en teleport_user: {e}")
             return False
 
+    def resolve_point(self, name: str) -> Optional[dict]:
+        """Punto guardado (!tplist) o zona configurada (vip, dj, directivo)"""
+        if name in TELEPORT_POINTS:
+            return TELEPORT_POINTS[name]
+        zones = {"vip": VIP_ZONE, "dj": DJ_ZONE, "directivo": DIRECTIVO_ZONE}
+        return zones.get(name)
+
+    async def run_group_teleport(self, user_ids: list, point: dict, zone_name: str, username: str, spread: float = 0.0):
+        """Teletransporte en grupo con ritmo acotado; anuncia movidos y fallidos al terminar"""
+        result = await room_ops.teleport_group(
+            self.highrise, user_ids, point, spread=spread,
+            rate=config.get("group_teleport_rate", room_ops.DEFAULT_RATE),
+            concurrency=config.get("group_teleport_concurrency", room_ops.DEFAULT_CONCURRENCY),
+        )
+        summary = f"🚁 {result.moved} usuarios fueron enviados a '{zone_name}' por @{username}"
+        if result.failed:
+            summary += f" ({len(result.failed)} fallidos)"
+        await self.highrise.chat(summary)
+        log_event("TELEPORT", f"{username} envió {result.moved}/{len(user_ids)} usuarios a '{zone_name}' en {result.elapsed:.1f}s")
+        for failed_id, reason in result.failed:
+            log_event("WARNING", f"No se pudo mover a {USER_NAMES.get(failed_id, failed_id)}: {reason}")
+
     async def send_emote_loop(self, user_id: str, emote_id: str):
         """Inicia la emoción en un bucle infinito"""
         ACTIVE_EMOTES[user_id] = emote_id
@@ -1062,11 +1128,14 @@ class Bot(BaseBot):
             if user_id in ACTIVE_EMOTES: del ACTIVE_EMOTES[user_id]
             return
 
-        while user_id in ACTIVE_EMOTES and ACTIVE_EMOTES[user_id] == emote_id and ACTIVE_EMOTES[user_id] is not None:
+        def active():
+            return ACTIVE_EMOTES.get(user_id) == emote_id and not self.in_emote_session(user_id, emote_id)
+
+        scheduler = emote_scheduler.EmoteScheduler("user", EMOTE_LEAD, EMOTE_CALIBRATION)
+        duration = emote_info.get("duration", 5)
+        while active():
             try:
-                await self.highrise.send_emote(emote_id, user_id)
-                duration = emote_info.get("duration", 5)
-                await asyncio.sleep(max(0.1, duration - 0.3))
+                await scheduler.play(lambda: self.highrise.send_emote(emote_id, user_id), emote_id, duration, active)
             except Exception as e:
                 print(f"Error en send_emote_loop: {e}")
                 break
@@ -1074,27 +1143,83 @@ class Bot(BaseBot):
         if user_id in ACTIVE_EMOTES and ACTIVE_EMOTES[user_id] is None:
             del ACTIVE_EMOTES[user_id]
 
-    async def stop_emote_loop(self, user_id: str):
-        """Detiene la emoción en el bucle"""
-        if user_id in ACTIVE_EMOTES:
-            ACTIVE_EMOTES[user_id] = None
-            try:
-                stop_animations = ["idle", "idle-loop-happy", "idle-loop-sad", "idle-loop-tired"]
-                for stop_anim in stop_animations:
-                    try:
-                        await self.highrise.send_emote(stop_anim, user_id)
-                        await asyncio.sleep(0.1)
-                    except Exception:
-                        continue
-            except Exception as e:
-                print(f"Error general en stop_animations: {e}")
+    def in_emote_session(self, user_id: str, emote_id: str) -> bool:
+        session = self.emote_sessions.get(emote_id)
+        return session is not None and user_id in session.members
+
+    def start_emotes(self, user_ids: list, emote_id: str):
+        """Arranca un emote en bucle para varios usuarios.
+
+        Con más de un usuario (o si ya hay grupo con ese emote) se usa una sesión de grupo:
+        un solo reloj que envía a todos en el mismo tick. Con uno solo, su bucle individual.
+        """
+        session = self.emote_sessions.get(emote_id)
+        if session is None and len(user_ids) > 1:
+            emote_info = next((e for e in emotes.values() if e["id"] == emote_id), {})
+            session = emote_scheduler.GroupEmoteSession(
+                lambda: self.highrise, emote_id, emote_info.get("duration", 5),
+                is_member=lambda uid: ACTIVE_EMOTES.get(uid) == emote_id,
+                concurrency=config.get("emote_session_concurrency", emote_scheduler.SESSION_CONCURRENCY),
+                rate=config.get("emote_session_rate", emote_scheduler.SESSION_RATE), lead=EMOTE_LEAD,
+                calibration=EMOTE_CALIBRATION, spawn=lambda name, factory: self.tasks.start(name, factory, restart=False),
+            )
+            self.emote_sessions[emote_id] = session
+            self.tasks.start(f"emote_session:{emote_id}", lambda: self.run_emote_session(session), restart=False)
 
-            await asyncio.sleep(1.0)
-            if user_id in ACTIVE_EMOTES:
-                del ACTIVE_EMOTES[user_id]
+        for uid in user_ids:
+            if session is not None:
+                ACTIVE_EMOTES[uid] = emote_id
+                session.join(uid)
+            else:
+                asyncio.create_task(instrumentation.untraced(self.send_emote_loop(uid, emote_id)))
 
-    async def handle_command(self, user: User, message: str, is_whisper: bool) -> None:
-        """Procesa comandos del usuario"""
+    async def run_emote_session(self, session):
+        try:
+            await session.run()
+        finally:
+            if self.emote_sessions.get(session.emote_id) is session:
+                del self.emote_sessions[session.emote_id]
+
+    async def stop_emote_loop(self, user_id: str, present: bool = True):
+        """Detiene la emoción en el bucle; si el usuario sigue en la sala, lo devuelve a idle"""
+        if user_id not in ACTIVE_EMOTES:
+            return
+        # El bucle sale en su siguiente vuelta al no encontrar su emote
+        del ACTIVE_EMOTES[user_id]
+        if present:
+            try:
+                await self.highrise.send_emote(STOP_EMOTE, user_id)
+            except Exception as e:
+                print(f"Error deteniendo animación: {e}")
+
+    async def stop_all_emote_loops(self) -> int:
+        """Detiene todos los bucles a la vez y envía idle en paralelo solo a quien sigue en la sala"""
+        stopped = [uid for uid, emote_id in ACTIVE_EMOTES.items() if emote_id is not None]
+        ACTIVE_EMOTES.clear()
+        if not stopped:
+            return 0
+        response = await self.highrise.get_room_users()
+        if isinstance(response, Error):
+            present = stopped
+        else:
+            in_room = {u.id for u, _ in response.content}
+            present = [uid for uid in stopped if uid in in_room]
+        failed = await room_ops.send_emote_group(
+            self.highrise, present, STOP_EMOTE,
+            rate=config.get("group_emote_rate", room_ops.DEFAULT_RATE),
+            concurrency=config.get("group_emote_concurrency", room_ops.DEFAULT_CONCURRENCY),
+        )
+        if failed:
+            log_event("WARNING", f"No se pudo detener la animación de {len(failed)} usuarios")
+        return len(stopped)
+
+    @instrumentation.traced(
+        "handle_command",
+        key=lambda self, user, message, *args, **kwargs: metrics.command_key(message.strip()),
+        context=lambda self, user, message, *args, **kwargs: {"user": user.username},
+    )
+    async def handle_command(self, user: User, message: str, is_whisper: bool, reply=None) -> None:
+        """Procesa comandos del usuario. reply(texto), si se indica, recibe las respuestas en lugar del chat"""
         global VIP_ZONE
         msg = message.strip()
         user_id = user.id
@@ -1117,6 +1242,10 @@ class Bot(BaseBot):
             if msg.startswith("!"):
                 log_bot_response(f"@{username}: {msg}")
                 log_bot_response(f"BOT → {text}")
+
+            if reply is not None:
+                reply(text)
+                return
             
             # Si es un comando que debe ser público, siempre enviar al chat
             if force_public:
@@ -1233,7 +1362,7 @@ class Bot(BaseBot):
             emote_name = next((e["name"] for e in emotes.values() if e["id"] == emote_id), emote_id)
             
             # Guardar emote copiado con número incremental (SIN outfit)
-            emote_number = len(self.copied_emotes) + 1
+            emote_number = max(self.copied_emotes, default=0) + 1
             self.copied_emotes[emote_number] = {
                 "emote_id": emote_id,
                 "name": emote_name,
@@ -1291,31 +1420,22 @@ class Bot(BaseBot):
             self.bot_mode = "copied"
             
             # Iniciar bucle infinito del emote copiado
-            self.current_emote_task = asyncio.create_task(self.start_copied_emote_loop(emote_data["emote_id"]))
+            self.current_emote_task = asyncio.create_task(
+                instrumentation.untraced(self.start_copied_emote_loop(emote_data["emote_id"])))
             
             await send_response(f"🎭 Emote '{emote_data['name']}' activado en bucle infinito\n💡 Para cambiar, usa !automode o !emotecopy con otro número")
             await self.highrise.chat(f"🎭 Bot ejecutando emote '{emote_data['name']}' en bucle")
             log_event("BOT", f"Modo emote copiado activado: '{emote_data['name']}'")
             return
 
-        # Comando !emote list
-        if msg == "!emote list":
-            total_emotes = len(emotes)
-            free_emotes = sum(1 for e in emotes.values() if e["is_free"])
-            emote_list = f"🎭 LISTA DE EMOTES ({total_emotes} total, {free_emotes} gratuitos):\n\n"
-            
-            # Mostrar en grupos de 10
-            emote_items = list(emotes.items())
-            for i in range(0, len(emote_items), 10):
-                batch = emote_items[i:i+10]
-                batch_text = ""
-                for num, data in batch:
-                    status = "✅" if data["is_free"] else "🔒"
-                    batch_text += f"{status} #{num} - {data['name']}\n"
-                await send_response(emote_list + batch_text if i == 0 else batch_text)
-                await asyncio.sleep(0.3)
-            
-            await send_response("💡 Usa: [número] o [nombre] para hacer un emote")
+        # Comando !emote list [página]
+        if msg == "!emote list" or msg.startswith("!emote list "):
+            def render():
+                free_emotes = sum(1 for e in emotes.values() if e["is_free"])
+                lines = [f"{'✅' if data['is_free'] else '🔒'} #{num} {data['name']}" for num, data in emotes.items()]
+                return pagination.paginate(f"🎭 EMOTES ({len(emotes)}, {free_emotes} gratis)", lines,
+                                           "💡 Usa: [número] o [nombre] para hacer un emote", command="!emote list")
+            await send_response(LISTINGS.page("emotes", 0, render, pagination.page_number(msg[12:].strip())))
             return
 
         # Ejecución de emotes
@@ -1336,7 +1456,7 @@ class Bot(BaseBot):
                     users = response.content
                     user_obj = next((u for u, _ in users if u.id == user.id), None)
                     if user_obj:
-                        asyncio.create_task(self.send_emote_loop(user.id, emote["id"]))
+                        self.start_emotes([user.id], emote["id"])
                         await send_response( f"🎭 Iniciaste la animación: {emote['name']} (#{emote_number})")
                     else:
                         await send_response( f"❌ @{user.username}: No estás en la sala.")
@@ -1381,20 +1501,14 @@ class Bot(BaseBot):
                 if not target_user: await send_response( f"❌ ¡Usuario {target_username} no encontrado!"); return
                 target_user_ids = [target_user.id]
 
-            emote = emotes.get(emote_key)
-            if not emote:
-                for e in emotes.values():
-                    if e["name"].lower() == emote_key.lower() or e["id"].lower() == emote_key.lower():
-                        emote = e
-                        break
+            emote = find_emote(emote_key)
 
             if emote:
                 # Verificar si el emote está deshabilitado
                 if emote["id"] in DISABLED_EMOTE_IDS:
                     await send_response("🚫 Emote deshabilitado")
                 elif emote["is_free"]:
-                    for target_id in target_user_ids:
-                        asyncio.create_task(self.send_emote_loop(target_id, emote["id"]))
+                    self.start_emotes(target_user_ids, emote["id"])
                     await send_response( f"🎭 Animación '{emote['name']}' activada")
                 else:
                     await send_response( f"❌ La animación '{emote_key}' no es gratuita.")
@@ -1403,11 +1517,7 @@ class Bot(BaseBot):
             return
 
         # Ejecución rápida de emotes sin !emote
-        emote_found = False
-        for e in emotes.values():
-            if e["name"].lower() == msg.lower() or e["id"].lower() == msg.lower():
-                emote_found = True
-                break
+        emote_found = find_emote(msg, allow_number=False) is not None
         if msg and not msg.startswith("!") and not msg.isdigit() and emote_found:
             parts = msg.split()
             target_user_ids = [user.id]
@@ -1455,7 +1565,7 @@ class Bot(BaseBot):
                             else: await send_response( f"❌ ¡Usuario {target_username} no encontrado!"); return
                     if not target_user_ids: await send_response("❌ ¡No se encontraron usuarios objetivo!"); return
 
-            emote = next((e for e in emotes.values() if e["name"].lower() == emote_name.lower() or e["id"].lower() == emote_name.lower()), None)
+            emote = find_emote(emote_name, allow_number=False)
             if emote:
                 # Verificar si el emote está deshabilitado
                 if emote["id"] in DISABLED_EMOTE_IDS:
@@ -1463,8 +1573,7 @@ class Bot(BaseBot):
                 elif emote["is_free"]:
                     if include_self and user.id not in target_user_ids:
                         target_user_ids.append(user.id)
-                    for target_user_id in target_user_ids:
-                        asyncio.create_task(self.send_emote_loop(target_user_id, emote["id"]))
+                    self.start_emotes(target_user_ids, emote["id"])
                     await send_response( f"🎭 Animación '{emote_name}' activada")
                 else:
                     await send_response( f"❌ La animación '{emote_name}' no es gratuita.")
@@ -1481,9 +1590,8 @@ class Bot(BaseBot):
             stop_target = msg[6:].strip()
             if stop_target == "all":
                 if not self.is_admin(user_id): await send_response("❌ ¡Solo administradores pueden detener todas las animaciones!"); return
-                active_users = list(ACTIVE_EMOTES.keys())
-                for active_user_id in active_users: await self.stop_emote_loop(active_user_id)
-                await send_response( f"🛑 Detuviste todas las animaciones en la sala.")
+                stopped = await self.stop_all_emote_loops()
+                await send_response( f"🛑 Detuviste todas las animaciones en la sala ({stopped}).")
             elif stop_target.startswith("@"):
                 if not (self.is_vip(user_id) or self.is_admin(user_id)): await send_response("❌ ¡Solo VIP y administradores pueden detener animaciones de otros!"); return
                 target_username = stop_target[1:]
@@ -1500,9 +1608,8 @@ class Bot(BaseBot):
             return
         if msg == "!stopall":
             if self.is_admin(user_id):
-                active_users = list(ACTIVE_EMOTES.keys())
-                for active_user_id in active_users: await self.stop_emote_loop(active_user_id)
-                await send_response( f"🛑 Detuviste todas las animaciones en la sala.")
+                stopped = await self.stop_all_emote_loops()
+                await send_response( f"🛑 Detuviste todas las animaciones en la sala ({stopped}).")
             else: await send_response("❌ Solo administradores pueden usar este comando.")
             return
 
@@ -1562,7 +1669,8 @@ class Bot(BaseBot):
             elif len(parts) > 1:
                 lb_type = parts[1].lower()
                 if lb_type == "heart":
-                    top = sorted(USER_HEARTS.items(), key=lambda x: x[1], reverse=True)[:10]
+                    top = USERS.top_hearts(10)
+                    for uid, _ in top: USERS.ensure(uid)
                     response = await self.highrise.get_room_users()
                     if isinstance(response, Error):
                         await send_response("❌ Error obteniendo usuarios")
@@ -1578,7 +1686,8 @@ class Bot(BaseBot):
                     if count == 0: lines.append("Sin datos")
                     await send_response("\n".join(lines))
                 elif lb_type == "active":
-                    top = sorted(USER_ACTIVITY.items(), key=lambda x: x[1]["messages"], reverse=True)[:10]
+                    top = USERS.top_messages(10)
+                    for uid, _ in top: USERS.ensure(uid)
                     response = await self.highrise.get_room_users()
                     if isinstance(response, Error):
                         await send_response("❌ Error obteniendo usuarios")
@@ -1587,9 +1696,9 @@ class Bot(BaseBot):
                     id_to_name = {u.id: u.username for u, _ in response.content}
                     lines = ["💬 Top por actividad:"]
                     count = 0
-                    for i, (uid, data) in enumerate(top, 1):
+                    for i, (uid, messages) in enumerate(top, 1):
                         uname = id_to_name.get(uid) or USER_NAMES.get(uid) or f"User_{uid[:8]}"
-                        lines.append(f"{i}. {uname}: {data['messages']}")
+                        lines.append(f"{i}. {uname}: {messages}")
                         count += 1
                     if count == 0: lines.append("Sin datos")
                     await send_response("\n".join(lines))
@@ -1610,7 +1719,7 @@ class Bot(BaseBot):
             heart_count = 0
             for u, _ in users:
                 if not any(name in u.username.lower() for name in ["bot", "glux", "highrise"]):
-                    self.add_user_hearts(u.id, 1, u.username)
+                    self.add_user_hearts(u.id, 1, u.username, giver_id=user_id, kind="heartall")
                     await self.highrise.react("heart", u.id)
                     heart_count += 1
                     await asyncio.sleep(0.1)
@@ -1636,7 +1745,7 @@ class Bot(BaseBot):
 
                 if is_admin_or_owner:
                     if hearts_count > 100: await send_response("❌ ¡Máximo 100 corazones por comando!"); return
-                    self.add_user_hearts(target_user_obj.id, hearts_count, target_username)
+                    self.add_user_hearts(target_user_obj.id, hearts_count, target_username, giver_id=user_id)
                     heart_message = f"💖 {username} envió {hearts_count} ❤️ a {target_username}"
                     await send_response(heart_message)
                     for _ in range(hearts_count):
@@ -1647,7 +1756,7 @@ class Bot(BaseBot):
                     if hearts_count > 5:
                         await send_response("❌ ¡Los VIP pueden enviar máximo 5 corazones por comando!")
                         return
-                    self.add_user_hearts(target_user_obj.id, hearts_count, target_username)
+                    self.add_user_hearts(target_user_obj.id, hearts_count, target_username, giver_id=user_id)
                     heart_message = f"💖 {username} envió {hearts_count} ❤️ a {target_username}"
                     await send_response(heart_message)
                     for _ in range(hearts_count):
@@ -1810,7 +1919,7 @@ class Bot(BaseBot):
         if msg.startswith("!inventory"):
             if not (self.is_admin(user_id) or user_id == OWNER_ID): await send_response("❌ ¡Solo propietario y administradores pueden usar este comando!"); return
             parts = msg.split()
-            if len(parts) == 2 and parts[1].startswith("@"):
+            if len(parts) in (2, 3) and parts[1].startswith("@"):
                 target_username = parts[1].replace("@", "")
                 response = await self.highrise.get_room_users()
                 if isinstance(response, Error):
@@ -1827,8 +1936,12 @@ class Bot(BaseBot):
                     return
                 outfit = inv_response.outfit
                 if outfit:
-                    await send_response( f"👔 OUTFIT de {target_username}:")
-                    for i, item in enumerate(outfit, 1): await send_response( f"{i}. {item.type}: {item.id}"); await asyncio.sleep(0.2)
+                    version = tuple(item.id for item in outfit)
+                    render = lambda: pagination.paginate(
+                        f"👔 OUTFIT de {target_username}", [f"{i}. {item.type}: {item.id}" for i, item in enumerate(outfit, 1)],
+                        command=f"!inventory @{target_username}")
+                    page = pagination.page_number(parts[2] if len(parts) == 3 else None)
+                    await send_response(LISTINGS.page(f"outfit:{target_user.id}", version, render, page))
                 else: await send_response( f"👔 {target_username} no tiene outfit equipado")
             else:
                 inventory_response = await self.highrise.get_inventory()
@@ -1838,9 +1951,12 @@ class Bot(BaseBot):
                     return
                 inventory = inventory_response.items
                 if inventory:
-                    total_items = len(inventory)
-                    await send_response( f"👔 INVENTARIO: {total_items} items")
-                    for i, item in enumerate(inventory, 1): await send_response( f"{i}. {item.type}: {item.id}"); await asyncio.sleep(0.2)
+                    version = tuple((item.id, item.amount) for item in inventory)
+                    render = lambda: pagination.paginate(
+                        f"👔 INVENTARIO: {len(inventory)} items", [f"{i}. {item.type}: {item.id}" for i, item in enumerate(inventory, 1)],
+                        command="!inventory")
+                    page = pagination.page_number(parts[1] if len(parts) == 2 else None)
+                    await send_response(LISTINGS.page("inventory", version, render, page))
                 else: await send_response("📦 Inventario vacío")
             return
 
@@ -1864,9 +1980,9 @@ class Bot(BaseBot):
             return
 
         # Comando !wallet (Owner)
-        if msg == "!wallet":
+        if msg == "!wallet" or msg == "!wallet sync":
             if user_id != OWNER_ID: await send_response("❌ ¡Solo el propietario puede ver el balance del bot!"); return
-            balance = await self.get_bot_wallet_balance()
+            balance = await self.wallet.reconcile() if msg == "!wallet sync" else await self.get_bot_wallet_balance()
             await self.highrise.chat(f"💰 Balance del bot: {balance} oro")
             return
 
@@ -1874,7 +1990,61 @@ class Bot(BaseBot):
         if msg.startswith("!restart"):
             if user_id != OWNER_ID: await send_response("❌ ¡Solo el propietario puede reiniciar el bot!"); return
             await send_response("🔄 Reiniciando bot..."); await send_response("⚠️ El bot se detendrá en 3 segundos!"); await send_response("💡 Usa restart_bot.bat para reinicio automático!")
-            asyncio.create_task(self.delayed_restart())
+            self.highrise.tg.create_task(instrumentation.untraced(self.delayed_restart()))
+            return
+
+        # Comando !perf (Admin/Owner) - latencias por comando
+        if msg == "!perf" or msg.startswith("!perf "):
+            if not (self.is_admin(user_id) or user_id == OWNER_ID): await send_response("❌ ¡Solo propietario y administradores pueden usar este comando!"); return
+            parts = msg.split()
+            if len(parts) >= 2 and parts[1] in ("on", "off"):
+                instrumentation.configure(enabled=parts[1] == "on")
+                await send_response(f"📈 Instrumentación {'activada' if parts[1] == 'on' else 'desactivada'}")
+                return
+            if len(parts) >= 3 and parts[1] == "slow":
+                try:
+                    instrumentation.configure(slow_threshold_ms=float(parts[2]))
+                    await send_response(f"🐢 Umbral de comandos lentos: {instrumentation.slow_threshold_ms():.0f} ms")
+                except ValueError:
+                    await send_response("❌ Usa: !perf slow [milisegundos]")
+                return
+            slowest = instrumentation.slowest(5)
+            if not slowest:
+                await send_response("📈 Sin datos de latencia todavía")
+                return
+            estado = "ON" if instrumentation.is_enabled() else "OFF"
+            lines = [f"📈 LATENCIAS (p50/p95/p99 ms) [{estado}]"]
+            for command, data in slowest:
+                lines.append(f"{command}: {data['p50_ms']:.0f}/{data['p95_ms']:.0f}/{data['p99_ms']:.0f} (api {data['api_ms']:.0f}, cpu {data['compute_ms']:.1f})")
+            await send_response("\n".join(lines))
+            return
+
+        # Comando !tasks (Admin/Owner) - tareas en segundo plano
+        if msg == "!tasks":
+            if not (self.is_admin(user_id) or user_id == OWNER_ID): await send_response("❌ ¡Solo propietario y administradores pueden usar este comando!"); return
+            tasks = self.tasks.snapshot()
+            if not tasks:
+                await send_response("🧵 No hay tareas registradas")
+                return
+            lines = ["🧵 TAREAS (estado, cpu s / espera s, reinicios)"]
+            for task in tasks:
+                lines.append(f"{task['name']}: {task['state']} {task['cpu_s']:.2f}/{task['await_s']:.0f} ↻{task['restarts']}")
+            await send_response("\n".join(lines))
+            return
+
+        # Comando !drift (Admin/Owner) - deriva de los bucles de emotes
+        if msg == "!drift":
+            if not (self.is_admin(user_id) or user_id == OWNER_ID): await send_response("❌ ¡Solo propietario y administradores pueden usar este comando!"); return
+            loops = sorted(emote_scheduler.stats(), key=lambda item: item["sends"], reverse=True)[:10]
+            if not loops:
+                await send_response("🎭 No hay bucles de emotes activos")
+                return
+            # Deriva: retraso de cada envío sobre su momento previsto; "hueco": salió después de acabar el emote anterior
+            lines = [f"🎭 DERIVA (p50/p95/máx ms, envío ms, hueco/envíos; adelanto {EMOTE_LEAD * 1000:.0f} ms)"]
+            for loop in loops:
+                lines.append(f"{loop['loop']}: {loop['drift_p50_ms']:.0f}/{loop['drift_p95_ms']:.0f}/{loop['drift_max_ms']:.0f} "
+                             f"envío {loop['send_ms']:.0f} {loop['late']}/{loop['sends']} ↻{loop['resyncs']}")
+            await send_response("\n".join(lines))
             return
 
         # Comando !say (Admin/Owner)
@@ -1948,7 +2118,7 @@ class Bot(BaseBot):
                 self.current_copied_emote = None
                 
                 # Iniciar ciclo automático
-                self.current_emote_task = asyncio.create_task(self.start_auto_emote_cycle())
+                self.current_emote_task = self.tasks.start("auto_emote_cycle", self.start_auto_emote_cycle)
                 await send_response("🎭 ¡Modo AUTOMÁTICO activado!\n📊 Ejecutando 224 emotes en ciclo")
                 await self.highrise.chat("🎭 Modo AUTOMÁTICO activado por admin")
                 log_event("BOT", f"Modo automático activado por {user.username}")
@@ -2006,13 +2176,13 @@ class Bot(BaseBot):
             # Guardar a archivo JSON
             try:
                 import os
-                os.makedirs("data", exist_ok=True)
+                os.makedirs(DATA_DIR, exist_ok=True)
                 import json
                 outfits_data = {}
                 for num, outfit in SAVED_OUTFITS.items():
                     outfits_data[num] = [{"type": item.type, "id": item.id, "amount": item.amount} for item in outfit]
                 
-                with open("data/saved_outfits.json", "w", encoding="utf-8") as f:
+                with open(SAVED_OUTFITS_FILE, "w", encoding="utf-8") as f:
                     json.dump(outfits_data, f, indent=2, ensure_ascii=False)
                 
                 safe_print(f"✅ Outfit #{outfit_number} guardado en archivo")
@@ -2046,7 +2216,7 @@ class Bot(BaseBot):
                 config = load_config()
                 config["directivo_zone"] = new_directivo_zone
                 # Guardar a archivo
-                with open("config.json", "w", encoding="utf-8") as f: 
+                with open(ROOM.config_path, "w", encoding="utf-8") as f: 
                     json.dump(config, f, indent=2, ensure_ascii=False)
                 # Actualizar variable global
                 global DIRECTIVO_ZONE
@@ -2104,7 +2274,7 @@ class Bot(BaseBot):
                         for u in available_users:
                             tip_bars = self.convert_to_gold_bars(amount)
                             if tip_bars and tip_bars in valid_tips:
-                                await self.highrise.tip_user(u.id, tip_bars)
+                                await self.wallet.tip(u.id, tip_bars)
                         await self.highrise.chat(f"💰 ¡Bot dio {amount} oro a todos los {user_count} jugadores en la sala!")
                     except Exception as e: await send_response( f"❌ Error dando oro: {e}")
 
@@ -2127,7 +2297,7 @@ class Bot(BaseBot):
                         for u in selected_users:
                             tip_bars = self.convert_to_gold_bars(5)
                             if tip_bars and tip_bars in valid_tips:
-                                await self.highrise.tip_user(u.id, tip_bars)
+                                await self.wallet.tip(u.id, tip_bars)
                         user_names = ", ".join([u.username for u in selected_users])
                         await self.highrise.chat(f"💰 Bot dio 5 oro a {num_users} usuarios aleatorios: {user_names}")
                     except Exception as e: await send_response( f"❌ Error al dar oro: {e}")
@@ -2336,15 +2506,14 @@ class Bot(BaseBot):
             return
 
         # Comando !banlist
-        if msg == "!banlist":
+        if msg == "!banlist" or msg.startswith("!banlist "):
             if not (self.is_admin(user_id) or user_id == OWNER_ID): await send_response("❌ ¡Solo administradores y propietario pueden ver banlist!"); return
             if BANNED_USERS:
-                ban_list = "🚫 USUARIOS BANEADOS:\n"
-                for i, (uid, ban_data) in enumerate(BANNED_USERS.items(), 1):
-                    username = USER_NAMES.get(uid, f"User_{uid[:8]}")
-                    ban_time = ban_data.get("time", "indefinido")
-                    ban_list += f"{i}. {username} (hasta {ban_time})\n"
-                await send_response(ban_list)
+                render = lambda: pagination.paginate("🚫 USUARIOS BANEADOS", [
+                    f"{i}. {USER_NAMES.get(uid, f'User_{uid[:8]}')} (hasta {ban_data.get('time', 'indefinido')})"
+                    for i, (uid, ban_data) in enumerate(BANNED_USERS.items(), 1)
+                ], command="!banlist")
+                await send_response(LISTINGS.page("banlist", BANNED_USERS.version, render, pagination.page_number(msg[9:].strip())))
             else:
                 await send_response("✅ No hay usuarios baneados")
             return
@@ -2365,16 +2534,8 @@ class Bot(BaseBot):
                 target_username = msg[msg.index("@")+1:].strip().split()[0]
                 
                 # Buscar el emote
-                emote = None
                 emote_key = emote_part.strip().lower()
-                
-                if emote_key.isdigit() and emote_key in emotes:
-                    emote = emotes[emote_key]
-                else:
-                    for e in emotes.values():
-                        if e["name"].lower() == emote_key or e["id"].lower() == emote_key:
-                            emote = e
-                            break
+                emote = find_emote(emote_key, allow_number=emote_key.isdigit())
                 
                 if not emote:
                     await send_response(f"❌ Emote '{emote_part}' no encontrado. Usa !emote list")
@@ -2414,14 +2575,14 @@ class Bot(BaseBot):
             return
 
         # Comando !mutelist
-        if msg == "!mutelist":
+        if msg == "!mutelist" or msg.startswith("!mutelist "):
             if not (self.is_admin(user_id) or user_id == OWNER_ID): await send_response("❌ ¡Solo administradores y propietario pueden ver mutelist!"); return
             if MUTED_USERS:
-                mute_list = "🔇 USUARIOS SILENCIADOS:\n"
-                for i, (uid, mute_time) in enumerate(MUTED_USERS.items(), 1):
-                    username = USER_NAMES.get(uid, f"User_{uid[:8]}")
-                    mute_list += f"{i}. {username} (hasta {mute_time})\n"
-                await send_response( mute_list)
+                render = lambda: pagination.paginate("🔇 USUARIOS SILENCIADOS", [
+                    f"{i}. {USER_NAMES.get(uid, f'User_{uid[:8]}')} (hasta {mute_time})"
+                    for i, (uid, mute_time) in enumerate(MUTED_USERS.items(), 1)
+                ], command="!mutelist")
+                await send_response(LISTINGS.page("mutelist", MUTED_USERS.version, render, pagination.page_number(msg[10:].strip())))
             else: await send_response("✅ No hay usuarios silenciados")
             return
 
@@ -2438,22 +2599,21 @@ class Bot(BaseBot):
             return
 
         # Comando !tplist
-        if msg == "!tplist":
+        if msg == "!tplist" or msg.startswith("!tplist "):
             if TELEPORT_POINTS:
-                tele_message = "📍 PUNTOS DE TELETRANSPORTE:\n"
-                for name in TELEPORT_POINTS.keys():
-                    tele_message += f"🔹 {name}\n"
-                tele_message += "\n💡 Usa: !tp [nombre] o escribe el nombre directamente"
-                await send_response(tele_message)
+                render = lambda: pagination.paginate(
+                    "📍 PUNTOS DE TELETRANSPORTE", [f"🔹 {name}" for name in TELEPORT_POINTS],
+                    "💡 Usa: !tp [nombre] o escribe el nombre directamente", command="!tplist")
+                await send_response(LISTINGS.page("tplist", TELEPORT_POINTS.version, render, pagination.page_number(msg[8:].strip())))
             else: await send_response("📍 No hay puntos de teletransporte creados")
             return
-        if msg == "!tele list":
+        if msg == "!tele list" or msg.startswith("!tele list "):
             if TELEPORT_POINTS:
-                tele_message = "🗺️ UBICACIONES DE TELETRANSPORTE:\n"
-                for i, (name, coords) in enumerate(TELEPORT_POINTS.items(), 1):
-                    tele_message += f"{i}. {name} (X:{coords['x']:.1f}, Y:{coords['y']:.1f}, Z:{coords['z']:.1f})\n"
-                tele_message += "\n💡 Usa: !tp [nombre]"
-                await send_response( tele_message)
+                render = lambda: pagination.paginate("🗺️ UBICACIONES DE TELETRANSPORTE", [
+                    f"{i}. {name} (X:{coords['x']:.1f}, Y:{coords['y']:.1f}, Z:{coords['z']:.1f})"
+                    for i, (name, coords) in enumerate(TELEPORT_POINTS.items(), 1)
+                ], "💡 Usa: !tp [nombre]", command="!tele list")
+                await send_response(LISTINGS.page("tele_list", TELEPORT_POINTS.version, render, pagination.page_number(msg[11:].strip())))
             else: await send_response("📍 No hay ubicaciones de teletransporte creadas")
             return
 
@@ -2505,7 +2665,7 @@ class Bot(BaseBot):
                 config = load_config()
                 config["vip_zone"] = new_vip_zone
                 # Guardar a archivo
-                with open("config.json", "w", encoding="utf-8") as f: 
+                with open(ROOM.config_path, "w", encoding="utf-8") as f: 
                     json.dump(config, f, indent=2, ensure_ascii=False)
                 # Actualizar variable global
                 global VIP_ZONE
@@ -2537,7 +2697,7 @@ class Bot(BaseBot):
                 config = load_config()
                 config["dj_zone"] = new_dj_zone
                 # Guardar a archivo
-                with open("config.json", "w", encoding="utf-8") as f: 
+                with open(ROOM.config_path, "w", encoding="utf-8") as f: 
                     json.dump(config, f, indent=2, ensure_ascii=False)
                 # Actualizar variable global
                 global DJ_ZONE
@@ -2567,7 +2727,7 @@ class Bot(BaseBot):
                     return
                 config = load_config()
                 config["spawn_point"] = spawn_point
-                with open("config.json", "w", encoding="utf-8") as f: json.dump(config, f, indent=2, ensure_ascii=False)
+                with open(ROOM.config_path, "w", encoding="utf-8") as f: json.dump(config, f, indent=2, ensure_ascii=False)
                 await send_response( f"📍 Punto de inicio del bot establecido en: X={spawn_point['x']}, Y={spawn_point['y']}, Z={spawn_point['z']}")
             else: await send_response("¡Error obteniendo posición del usuario!")
             return
@@ -2603,18 +2763,26 @@ class Bot(BaseBot):
             else:
                 await send_response("❌ Error obteniendo posición del objetivo")
                 return
-            await self.highrise.teleport(bot_user.id, new_position)
-            await send_response(f"🤖 Bot teletransportado a @{target_username}!")
-            try:
-                await self.highrise.send_emote("emoji-punch", bot_user.id)
-                await asyncio.sleep(0.5)
-                await self.highrise.send_emote("emote-death", target_user.id)
-                await send_response(f"🥊 Bot golpeó a @{target_username}!")
-            except Exception as emote_error: log_event("WARNING", f"No se pudo hacer emote: {emote_error}")
-            await asyncio.sleep(3)
-            original_position = Position(original_x, original_y, original_z)
-            await self.highrise.teleport(bot_user.id, original_position)
-            await send_response("✅ Bot retornó a su posición original")
+            if self.tasks.is_running("bot_attack"):
+                await send_response("⏳ El bot ya está atacando, espera a que vuelva")
+                return
+
+            async def attack():
+                await self.highrise.teleport(bot_user.id, new_position)
+                await send_response(f"🤖 Bot teletransportado a @{target_username}!")
+                try:
+                    await self.highrise.send_emote("emoji-punch", bot_user.id)
+                    await asyncio.sleep(0.5)
+                    await self.highrise.send_emote("emote-death", target_user.id)
+                    await send_response(f"🥊 Bot golpeó a @{target_username}!")
+                except Exception as emote_error: log_event("WARNING", f"No se pudo hacer emote: {emote_error}")
+                await asyncio.sleep(3)
+                original_position = Position(original_x, original_y, original_z)
+                await self.highrise.teleport(bot_user.id, original_position)
+                await send_response("✅ Bot retornó a su posición original")
+
+            # La secuencia dura unos segundos: se ejecuta aparte para no retener la cola del usuario
+            self.tasks.start("bot_attack", attack, restart=False)
             return
 
         # Comando !bring (Admin/Owner)
@@ -2654,8 +2822,7 @@ class Bot(BaseBot):
             admin_count = sum(1 for u, _ in users if self.is_admin(u.id))
             mod_count = sum(1 for u, _ in users if self.is_moderator(u.id) and not self.is_admin(u.id))
             vip_count = sum(1 for u, _ in users if self.is_vip_by_username(u.username))
-            total_messages = sum(data.get("messages", 0) for data in USER_ACTIVITY.values())
-            total_hearts = sum(USER_HEARTS.values())
+            total_hearts, total_messages = USERS.totals()
             stats_msg = f"📊 ESTADÍSTICAS DE LA SALA:\n👥 Usuarios: {total_users}\n🛡️ Admins: {admin_count}\n⚖️ Mods: {mod_count}\n⭐ VIPs: {vip_count}\n💬 Mensajes: {total_messages}\n💖 Corazones: {total_hearts}"
             await self.highrise.chat(stats_msg)
             return
@@ -2723,6 +2890,7 @@ class Bot(BaseBot):
         if msg == "!daily":
             current_time = datetime.now()
             last_daily_key = f"{user_id}_last_daily"
+            USERS.ensure(user_id)
             if last_daily_key in USER_INFO.get(user_id, {}):
                 last_claim_str = USER_INFO[user_id][last_daily_key]
                 last_claim = datetime.fromisoformat(last_claim_str.replace('Z', '+00:00'))
@@ -2731,7 +2899,7 @@ class Bot(BaseBot):
                     await send_response(f"⏰ Ya reclamaste tu recompensa diaria\n🕐 Vuelve en {hours_left}h")
                     return
             daily_hearts = 10
-            self.add_user_hearts(user_id, daily_hearts, user.username)
+            self.add_user_hearts(user_id, daily_hearts, user.username, kind="daily")
             if user_id not in USER_INFO: USER_INFO[user_id] = {}
             USER_INFO[user_id][last_daily_key] = current_time.isoformat()
             save_user_info()
@@ -2810,7 +2978,7 @@ class Bot(BaseBot):
             else: await send_response("❌ Usa: !comando @usuario")
             return
 
-        # Comando !sendall [zona] - Enviar a todos los usuarios a una zona (Admin/Owner)
+        # Comando !sendall [zona] [separación] - Enviar a todos los usuarios a una zona (Admin/Owner)
         if msg.startswith("!sendall "):
             if not (self.is_admin(user_id) or user_id == OWNER_ID):
                 await send_response("❌ ¡Solo admins y propietario pueden usar !sendall!")
@@ -2818,16 +2986,22 @@ class Bot(BaseBot):
             
             parts = msg.split()
             if len(parts) < 2:
-                await send_response("❌ Usa: !sendall [zona]\n💡 Usa !tplist para ver zonas disponibles")
+                await send_response("❌ Usa: !sendall [zona] [separación]\n💡 Usa !tplist para ver zonas disponibles")
                 return
             
             zone_name = parts[1].lower()
-            
-            if zone_name not in TELEPORT_POINTS:
+            point = self.resolve_point(zone_name)
+            if point is None:
                 await send_response(f"❌ Zona '{zone_name}' no encontrada. Usa !tplist")
                 return
-            
-            point = TELEPORT_POINTS[zone_name]
+            try:
+                spread = float(parts[2]) if len(parts) > 2 else config.get("sendall_spread", 0.0)
+            except ValueError:
+                await send_response("❌ La separación debe ser un número (ej: !sendall vip 1)")
+                return
+            if self.tasks.is_running("group_teleport"):
+                await send_response("⏳ Ya hay un envío en grupo en curso")
+                return
             
             try:
                 response = await self.highrise.get_room_users()
@@ -2835,31 +3009,24 @@ class Bot(BaseBot):
                     await send_response("❌ Error obteniendo usuarios")
                     return
                 
-                users = response.content
-                moved_count = 0
-                
-                for u, _ in users:
-                    # Saltar admin, owner y bots
-                    if u.id == OWNER_ID or self.is_admin(u.id):
-                        continue
-                    if any(name in u.username.lower() for name in ["bot", "glux", "highrise"]):
-                        continue
-                    
-                    try:
-                        teleport_position = Position(point["x"], point["y"], point["z"])
-                        await self.highrise.teleport(u.id, teleport_position)
-                        moved_count += 1
-                        await asyncio.sleep(0.2)  # Delay para evitar rate limit
-                    except Exception as e:
-                        safe_print(f"⚠️ Error moviendo a {u.username}: {e}")
-                        continue
-                
-                await self.highrise.chat(f"🚁 {moved_count} usuarios fueron enviados a '{zone_name}' por @{username}")
-                await send_response(f"✅ {moved_count} usuarios enviados a '{zone_name}'")
-                log_event("TELEPORT", f"{username} envió {moved_count} usuarios a '{zone_name}'")
+                # Saltar admin, owner y bots
+                targets = [
+                    u.id for u, _ in response.content
+                    if u.id != OWNER_ID and not self.is_admin(u.id)
+                    and not any(name in u.username.lower() for name in ["bot", "glux", "highrise"])
+                ]
             except Exception as e:
                 await send_response(f"❌ Error: {e}")
                 log_event("ERROR", f"Error en !sendall: {e}")
+                return
+
+            await send_response(f"🚁 Enviando {len(targets)} usuarios a '{zone_name}'...")
+            # El envío sigue en segundo plano; el resultado se anuncia al terminar
+            self.tasks.start(
+                "group_teleport",
+                lambda: self.run_group_teleport(targets, point, zone_name, username, spread),
+                restart=False,
+            )
             return
 
         # Comando !goto @user [punto] - Teletransportar usuario a punto guardado (Admin/Owner)
@@ -3145,8 +3312,12 @@ class Bot(BaseBot):
             else: await send_response( f"❌ Usuario {target_username} no encontrado en la sala")
             return
 
+    @dispatcher.dispatched(key=lambda self, user, message: user.id,
+                           priority=lambda self, user, message: dispatcher.is_moderation(message))
+    @instrumentation.traced("on_chat")
     async def on_chat(self, user: User, message: str) -> None:
         """Manejador de mensajes públicos"""
+        await self.ready.wait()
         msg = message.strip()
         user_id = user.id
         username = user.username
@@ -3155,8 +3326,15 @@ class Bot(BaseBot):
 
         # Detectar mención al bot cantinero
         if "@CANTINERO_BOT" in msg or "@cantinero" in msg.lower():
+            # Estado del cantinero por el bus de presencia (None si no hay launcher o aún no se sabe)
+            cantinero = self.presence.peer("cantinero")
             await asyncio.sleep(0.3)
-            await self.highrise.chat(f"📞 *marcando al cantinero* ¡@{username} está llamando a la barra!")
+            if cantinero is not None and not cantinero["online"]:
+                await self.highrise.chat(f"📞 @{username}, el cantinero no está en la barra ahora mismo. ¡Inténtalo más tarde!")
+            elif cantinero is not None and cantinero["state"].get("in_call"):
+                await self.highrise.chat(f"📞 @{username}, la línea del cantinero está ocupada con @{cantinero['state'].get('call_partner')}")
+            else:
+                await self.highrise.chat(f"📞 *marcando al cantinero* ¡@{username} está llamando a la barra!")
             log_event("CALL", f"{username} mencionó al bot cantinero")
             # El bot cantinero responderá automáticamente con sistema extendido
             return
@@ -3184,8 +3362,12 @@ class Bot(BaseBot):
         self.update_activity(user_id)
         await self.handle_command(user, msg, is_whisper=treat_as_whisper)
 
+    @dispatcher.dispatched(key=lambda self, user, message: user.id,
+                           priority=lambda self, user, message: dispatcher.is_moderation(message))
+    @instrumentation.traced("on_whisper")
     async def on_whisper(self, user: User, message: str) -> None:
         """Manejador de susurros"""
+        await self.ready.wait()
         msg = message.strip()
         user_id = user.id
         username = user.username
@@ -3199,8 +3381,11 @@ class Bot(BaseBot):
         log_event("WHISPER", f"{username}: {message}")
         await self.handle_command(user, msg, is_whisper=True)
 
+    @dispatcher.dispatched(key=lambda self, user, *args: user.id)
+    @instrumentation.traced("on_user_join")
     async def on_user_join(self, user: User, position: Position | AnchorPosition) -> None:
         """Usuario entra a la sala"""
+        await self.ready.wait()
         user_id = user.id
         username = user.username
 
@@ -3227,8 +3412,11 @@ class Bot(BaseBot):
                     safe_print(f"❌ Error enviando bienvenida a {username} después de {max_attempts} intentos: {e}")
                     log_event("WARNING", f"Fallo bienvenida a {username}: {e}")
 
+    @dispatcher.dispatched(key=lambda self, user, *args: user.id)
+    @instrumentation.traced("on_user_leave")
     async def on_user_leave(self, user: User) -> None:
         """Usuario sale de la sala"""
+        await self.ready.wait()
         user_id = user.id
 
         if user_id in USER_JOIN_TIMES:
@@ -3239,12 +3427,15 @@ class Bot(BaseBot):
                 USER_INFO[user_id]["total_time_in_room"] += time_in_room
             del USER_JOIN_TIMES[user_id]
 
-        await self.stop_emote_loop(user_id)
+        await self.stop_emote_loop(user_id, present=False)
+        EMOTE_CALIBRATION.forget_user(user_id)
         save_user_info()
 
+    @dispatcher.dispatched(key=lambda self, sender, *args: sender.id)
+    @instrumentation.traced("on_tip")
     async def on_tip(self, sender: User, receiver: User, tip: CurrencyItem | Item) -> None:
         """Manejador de propinas - Sistema VIP automático por donación"""
-        global BOT_WALLET
+        await self.ready.wait()
         
         if receiver.id == self.bot_id:
             # Verificar que sea una propina de oro (CurrencyItem) y no un item regular
@@ -3268,17 +3459,24 @@ class Bot(BaseBot):
                     await self.highrise.send_whisper(sender.id, f"💡 Dona exactamente 100 oro para obtener VIP automáticamente")
                 
                 # Actualizar balance del bot
-                BOT_WALLET += tip_amount
-                log_event("TIP", f"{sender.username} donó {tip_amount} oro al bot (Balance: {BOT_WALLET})")
+                self.wallet.credit(tip_amount)
+                log_event("TIP", f"{sender.username} donó {tip_amount} oro al bot (Balance: {self.wallet.current()})")
             else:
                 # Si es un Item regular (no oro)
                 log_event("TIP", f"{sender.username} envió un item al bot (no oro)")
                 await self.highrise.send_whisper(sender.id, "💝 ¡Gracias por el regalo!")
 
+    @instrumentation.traced("on_emote")
     async def on_emote(self, user: User, emote_id: str, receiver: User | None) -> None:
-        """Manejador de emotes"""
-        pass
+        """Manejador de emotes: alimenta la calibración de duraciones"""
+        # Los emotes que envían los bucles (de este bot o del cantinero) no dicen nada nuevo sobre la duración
+        if user.id == self.bot_id or user.id in ACTIVE_EMOTES or user.id in self.presence.peer_loops:
+            EMOTE_CALIBRATION.forget_user(user.id)
+            return
+        EMOTE_CALIBRATION.record_emote(user.id, emote_id)
 
+    @dispatcher.dispatched(key=lambda self, user, *args: user.id)
+    @instrumentation.traced("on_user_move")
     async def on_user_move(self, user: User, destination: Position | AnchorPosition) -> None:
         """Manejador de movimiento de usuario para flashmode automático y sistema anti-escape de cárcel
         Activa flashmode cuando el usuario sube o baja desde/hacia altura Y >= 10.0 bloques
@@ -3365,58 +3563,98 @@ class Bot(BaseBot):
     # ========================================================================
 
     async def start_announcements(self):
-        """Sistema de anuncios automáticos públicos"""
+        """Mensajes de bienvenida y después los anuncios programados"""
         welcome_message_1 = "🌌 BIENVENIDO A NOCTURNO ⛈️💙\nUna sala donde lo oculto brilla más que la luz...\n💬 Vive la noche, haz nuevos amigos y deja tu huella👣."
         welcome_message_2 = "✨ Sumérgete en la oscuridad... y descubre lo más brillante de ti💯\n‼️(Cualquier incomodidad o sugerencia comuniqué con @Alber_JG_69 o @Xx__Daikel__xX)‼️"
         await self.highrise.chat(welcome_message_1)
         await asyncio.sleep(1)
         await self.highrise.chat(welcome_message_2)
 
-        announcements = [
-            "🎮 Usa !help para ver la lista de todos los comandos",
-            "💖 Envía corazones a amigos con !heart @username",
-            "🏆 Revisa el ranking con !leaderboard",
-            "🎯 Juega al medidor de amor: !game love @user1 @user2"
-        ]
-        announcement_index = 0
-        vip_counter = 0
+        # El resto de anuncios sale por turnos compartidos con el cantinero (announcements.json)
+        await self.announcements.run()
 
-        # Esperar 60 segundos para alternar con bot cantinero
-        await asyncio.sleep(60)
-
-        while True:
-            try:
-                await self.highrise.chat(announcements[announcement_index])
-                safe_print(f"📢 Anuncio público enviado: {announcements[announcement_index][:50]}...")
-                announcement_index = (announcement_index + 1) % len(announcements)
-
-                vip_counter += 1
-                if vip_counter == 4:
-                    await self.highrise.chat("💎 ¡Conviértete en VIP por 100 oro y obtén capacidades exclusivas!")
-                    vip_counter = 0
-                
-                self.last_announcement = time.time()
-            except Exception as e:
-                print(f"Error en anuncios: {e}")
-            
-            # Esperar 2 minutos (120 segundos) para el siguiente mensaje
-            await asyncio.sleep(120)
+    async def announce(self, text: str):
+        await self.highrise.chat(text)
+        safe_print(f"📢 Anuncio público enviado: {text[:50]}...")
+        self.last_announcement = time.time()
 
     async def check_console_messages(self):
         """Verifica mensajes desde consola"""
         while True:
             try:
-                if os.path.exists("console_message.txt"):
-                    with open("console_message.txt", "r", encoding="utf-8") as f:
+                if os.path.exists(CONSOLE_MESSAGE_FILE):
+                    with open(CONSOLE_MESSAGE_FILE, "r", encoding="utf-8") as f:
                         message = f.read().strip()
                     if message:
                         await self.highrise.chat(message)
                         print(f"💬 Mensaje de consola enviado: {message}")
-                        os.remove("console_message.txt")
+                        os.remove(CONSOLE_MESSAGE_FILE)
             except Exception as e:
                 print(f"Error verificando mensajes de consola: {e}")
             await asyncio.sleep(1)
 
+    async def periodic_snapshot_save(self):
+        """Guarda el snapshot binario periódicamente"""
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            save_snapshot()
+
+    def open_user_archive(self):
+        """Abre el archivo de usuarios inactivos"""
+        if not ROOM.owns("economy"):
+            return
+        discarded = USERS.open(USER_ARCHIVE_FILE, config.get("user_archive_days", user_store.DEFAULT_MAX_AGE_DAYS))
+        if discarded:
+            safe_print(f"🗄️ {discarded} usuarios duplicados eliminados del archivo (gana la copia en memoria)")
+
+    async def periodic_user_archive(self):
+        """Archiva periódicamente a los usuarios inactivos y guarda el estado reducido"""
+        while True:
+            moved = await USERS.archive_inactive(present=list(USER_JOIN_TIMES))
+            if moved:
+                save_user_info()
+                save_leaderboard_data()
+                save_snapshot()
+                log_event("ARCHIVE", f"{moved} usuarios inactivos archivados ({len(USER_INFO)} en memoria)")
+            await asyncio.sleep(user_store.ARCHIVE_INTERVAL)
+
+    async def replay_hearts_journal(self):
+        """Aplica sobre los datos cargados los cambios de corazones anotados desde el último guardado"""
+        if HEARTS_JOURNAL.is_open or not ROOM.owns("economy"):
+            return
+        records = HEARTS_JOURNAL.open()
+        # Un usuario archivado después de un cambio ya lo lleva en su copia: no se trae a memoria por él
+        archived = USERS.archived_at(record.receiver for record in records)
+        replayed = 0
+        for record in records:
+            if record.timestamp <= archived.get(record.receiver, 0):
+                continue
+            USERS.ensure(record.receiver)
+            USER_HEARTS[record.receiver] = record.balance
+            replayed += 1
+        if records:
+            safe_print(f"📒 Diario de corazones: {replayed} de {len(records)} cambios reproducidos (seq {HEARTS_JOURNAL.seq})")
+
+    async def sync_shared_economy(self):
+        """La sala dueña avisa de que la economía está cargada; las demás salas esperan ese aviso"""
+        if ROOM.owns("economy"):
+            ECONOMY_LOADED.set()
+        else:
+            await ECONOMY_LOADED.wait()
+
+    async def periodic_journal_compaction(self):
+        """Guarda los corazones completos y pasa al historial los registros ya cubiertos"""
+        while True:
+            await asyncio.sleep(heart_journal.COMPACT_INTERVAL)
+            # La copia del estado se toma en el loop, a la vez que el checkpoint; el formateo,
+            # las escrituras y los fsync van a un hilo para no parar el bot
+            checkpoint = HEARTS_JOURNAL.seq
+            state = snapshot_state(copy=True)
+            if await asyncio.to_thread(lambda: save_leaderboard_data(state) and save_snapshot(state)):
+                moved = await HEARTS_JOURNAL.compact(checkpoint)
+                if moved:
+                    log_event("JOURNAL", f"{moved} registros de corazones compactados (checkpoint {checkpoint})")
+
     async def periodic_inventory_save(self):
         """Guarda inventario periódicamente"""
         while True:
@@ -3435,13 +3673,17 @@ class Bot(BaseBot):
                 emote_duration = e.get("duration", 5.0)
                 break
         
+        def active():
+            return self.bot_mode == "copied" and self.copied_emote_mode
+
+        scheduler = emote_scheduler.EmoteScheduler("copied", EMOTE_LEAD, EMOTE_CALIBRATION)
         try:
-            while self.bot_mode == "copied" and self.copied_emote_mode:
+            while active():
                 try:
-                    await self.highrise.send_emote(emote_id, self.bot_id)
-                    await asyncio.sleep(max(0.1, emote_duration - 0.3))
+                    await scheduler.play(lambda: self.highrise.send_emote(emote_id, self.bot_id), emote_id, emote_duration, active)
                 except Exception as e:
                     safe_print(f"❌ Error ejecutando emote copiado: {e}")
+                    scheduler.reset()
                     await asyncio.sleep(1.0)
                     continue
         except Exception as e:
@@ -3450,8 +3692,6 @@ class Bot(BaseBot):
 
     async def start_auto_emote_cycle(self):
         """Ciclo automático de emotes con gestión de salud"""
-        await asyncio.sleep(3)
-        
         # Desactivar modo de emote copiado si estaba activo
         self.copied_emote_mode = False
         self.current_copied_emote = None
@@ -3465,6 +3705,7 @@ class Bot(BaseBot):
         
         consecutive_transport_errors = 0
         max_transport_errors = 3
+        scheduler = emote_scheduler.EmoteScheduler("auto", EMOTE_LEAD, EMOTE_CALIBRATION)
         
         try:
             cycle_count = 0
@@ -3490,16 +3731,21 @@ class Bot(BaseBot):
                         continue
                     
                     try:
-                        await self.highrise.send_emote(emote_id, self.bot_id)
+                        drift = await scheduler.play(
+                            lambda: self.highrise.send_emote(emote_id, self.bot_id),
+                            emote_id, emote_duration, lambda: self.bot_mode == "auto",
+                        )
+                        if drift is None:
+                            safe_print("⏸️ Ciclo automático detenido (modo cambiado)")
+                            return
                         consecutive_transport_errors = 0
                         emotes_run += 1
                         
                         if emotes_run % 20 == 0:
                             safe_print(f"🎭 Emote #{emotes_run}/{len(free_emotes)}: {emote_name}")
                         
-                        await asyncio.sleep(max(0.1, emote_duration - 0.3))
-                        
                     except Exception as e:
+                        scheduler.reset()
                         error_msg = str(e)
                         
                         # Detectar errores de transporte
@@ -3534,7 +3780,8 @@ class Bot(BaseBot):
                     safe_print(f"⏭️ Emotes omitidos por problemas: {emotes_skipped}")
                 
                 safe_print(f"✅ Ciclo #{cycle_count} completado. Ejecutados: {emotes_run}, Omitidos: {emotes_skipped}")
-                await asyncio.sleep(2.0)
+                if not emotes_run:
+                    await asyncio.sleep(2.0)
                 
         except Exception as e:
             safe_print(f"❌ ERROR CRÍTICO en ciclo automático: {e}")
@@ -3542,27 +3789,31 @@ class Bot(BaseBot):
 
     async def setup_initial_bot_appearance(self):
         """Configura apariencia inicial del bot"""
+        await asyncio.gather(self.setup_initial_outfit(), self.teleport_to_spawn())
+        log_event("BOT", f"Bot inicializado en modo idle (ID: {self.bot_id})")
+
+    async def setup_initial_outfit(self):
+        """Aplica el outfit inicial de config.json"""
         try:
-            await asyncio.sleep(2)
             if "bot_initial_outfit" in config:
                 outfit_id = config["bot_initial_outfit"]
                 await self.change_bot_outfit(outfit_id)
                 safe_print(f"🎽 Outfit inicial configurado: {outfit_id}")
-            
-            if "spawn_point" in config and config["spawn_point"]:
-                spawn = config["spawn_point"]
-                try:
-                    spawn_position = Position(spawn["x"], spawn["y"], spawn["z"])
-                    await self.highrise.teleport(self.bot_id, spawn_position)
-                    safe_print(f"📍 Bot teletransportado al punto de inicio: X={spawn['x']}, Y={spawn['y']}, Z={spawn['z']}")
-                    log_event("BOT", f"Bot posicionado en spawn point: {spawn}")
-                except Exception as e:
-                    safe_print(f"⚠️ Error teletransportando al spawn: {e}")
-            
-            log_event("BOT", f"Bot inicializado en modo idle (ID: {self.bot_id})")
         except Exception as e:
             log_event("ERROR", f"Error en setup: {e}")
 
+    async def teleport_to_spawn(self):
+        """Teletransporta el bot al spawn_point de config.json"""
+        if "spawn_point" in config and config["spawn_point"]:
+            spawn = config["spawn_point"]
+            try:
+                spawn_position = Position(spawn["x"], spawn["y"], spawn["z"])
+                await self.highrise.teleport(self.bot_id, spawn_position)
+                safe_print(f"📍 Bot teletransportado al punto de inicio: X={spawn['x']}, Y={spawn['y']}, Z={spawn['z']}")
+                log_event("BOT", f"Bot posicionado en spawn point: {spawn}")
+            except Exception as e:
+                safe_print(f"⚠️ Error teletransportando al spawn: {e}")
+
     async def change_bot_outfit(self, outfit_id: str):
         """Cambia outfit del bot"""
         try:
@@ -3593,7 +3844,17 @@ class Bot(BaseBot):
         await asyncio.sleep(3)
         print("🛑 ¡Bot detenido!")
         self.save_data()
-        sys.exit(0)
+        self.stop(0, "reinicio pedido con !restart")
+
+    def stop(self, code: int, reason: str):
+        """Termina el bot: como proceso propio sale con `code`; alojado, cierra solo su conexión.
+
+        La excepción se lanza dentro del TaskGroup de la conexión (on_start o una tarea de
+        self.highrise.tg), así que bot_runner termina y supervise_hosted la reinicia.
+        """
+        if not self.hosted:
+            sys.exit(code)
+        raise ConnectionStopped(reason)
 
     def convert_to_gold_bars(self, amount: int) -> str:
         """Convierte la cantidad de oro en barras de oro para tips"""
@@ -3612,17 +3873,8 @@ class Bot(BaseBot):
         return ",".join(tip) if tip else ""
 
     async def get_bot_wallet_balance(self):
-        """Obtiene el balance real de la billetera del bot"""
-        try:
-            wallet_response = await self.highrise.get_wallet()
-            if isinstance(wallet_response, Error):
-                print(f"Error obteniendo wallet: {wallet_response}")
-                return BOT_WALLET
-            wallet = wallet_response.content
-            return wallet[0].amount if wallet else BOT_WALLET
-        except Exception as e:
-            print(f"Error obteniendo balance de billetera: {e}")
-            return BOT_WALLET
+        """Obtiene el balance de la billetera del bot desde el libro local"""
+        return await self.wallet.get_balance()
 
     async def show_user_info(self, user: User, public_response: bool = False):
         """Muestra información del jugador"""
@@ -3758,23 +4010,24 @@ class Bot(BaseBot):
         except Exception as e: log_event("ERROR", f"Error obteniendo bot user: {e}"); return None
 
     async def console_chat_input(self):
-        """Entrada de consola para enviar mensajes"""
-        print("💬 Chat de consola iniciado! Ingresa 'quit' para salir.")
-        while True:
-            try:
-                message = input("> ")
-                if message.lower() == 'quit': break
-                elif message.strip(): await self.highrise.chat(message); print(f"✅ Enviado: {message}")
-            except KeyboardInterrupt: break
-            except Exception as e: print(f"❌ Error de envío: {e}")
+        """Consola de operador: chat y comandos como propietario sin bloquear el event loop"""
+        async def run_as_owner(command: str):
+            owner = User(id=OWNER_ID, username=USER_NAMES.get(OWNER_ID, "owner"))
+            await self.handle_command(owner, command, is_whisper=True, reply=lambda text: safe_print(f"🤖 {text}"))
+
+        operator_console = console.OperatorConsole(
+            on_chat=lambda text: self.highrise.chat(text),
+            on_command=run_as_owner,
+            history_file=ROOM.path("data/console_history.txt"),
+        )
+        await operator_console.run()
 
 # ============================================================================
 # MANEJADOR DE SEÑALES
 # ============================================================================
 
-def signal_handler(sig, frame):
-    """Guarda datos al salir"""
-    print("\n🛑 Señal de salida recibida. Guardando datos...")
+def save_all_data():
+    """Guarda todo el estado persistente (señal de salida o apagado del launcher de proceso único)"""
     current_time = time.time()
     for user_id, join_time in USER_JOIN_TIMES.items():
         if user_id in USER_INFO:
@@ -3782,16 +4035,27 @@ def signal_handler(sig, frame):
             USER_INFO[user_id]["total_time_in_room"] += time_in_room
     try:
         # Guardar puntos de teletransporte
-        os.makedirs("data", exist_ok=True)
-        with open("data/teleport_points.txt", "w", encoding="utf-8") as f:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        with open(TELEPORT_POINTS_FILE, "w", encoding="utf-8") as f:
             f.write("# Puntos de teletransporte (nombre|x|y|z)\n")
             for name, coords in TELEPORT_POINTS.items():
                 f.write(f"{name}|{coords['x']}|{coords['y']}|{coords['z']}\n")
         
         save_leaderboard_data()
         save_user_info()
+        save_snapshot()
+        if ROOM.owns("economy"):
+            HEARTS_JOURNAL.close()
+            USERS.close()
+        EMOTE_CALIBRATION.save()
         safe_print("✅ Datos guardados con éxito (incluidos puntos de teletransporte)")
     except Exception as e: print(f"❌ Error guardando datos: {e}")
+
+def signal_handler(sig, frame):
+    """Guarda datos al salir"""
+    print("\n🛑 Señal de salida recibida. Guardando datos...")
+    save_all_data()
+    task_registry.cancel_everything()
     print("👋 ¡Adiós!")
     sys.exit(0)
 
@@ -0,0 +1,126 @@
+"""Buzón de salida: agrupa los mensajes cortos para un mismo destinatario en menos envíos
+
+Los chat/send_whisper que llegan para el mismo destino (la sala o un usuario) dentro de una
+ventana corta se unen con saltos de línea hasta el límite de longitud de la plataforma y salen
+en una sola llamada. El orden se conserva: los volcados se hacen de uno en uno.
+
+Se aplica envolviendo bot.highrise (como metrics.InstrumentedHighrise), así que los manejadores
+siguen llamando a self.highrise.chat / send_whisper sin cambios; la llamada vuelve al encolar.
+"""
+
+import asyncio
+
+import instrumentation
+import metrics
+
+DEFAULT_WINDOW = 0.15         # segundos que un mensaje espera a otros para el mismo destino
+MESSAGE_LIMIT = 250           # caracteres por mensaje de chat/susurro
+ROOM = None                   # clave del chat público
+
+
+def pack(messages: list, limit: int = MESSAGE_LIMIT) -> list:
+    """Une mensajes consecutivos con saltos de línea sin pasar de `limit` (los largos van solos)"""
+    packed = []
+    current = None
+    for text in messages:
+        if current is not None and len(current) + 1 + len(text) <= limit:
+            current = f"{current}\n{text}"
+            continue
+        if current is not None:
+            packed.append(current)
+        current = text
+    if current is not None:
+        packed.append(current)
+    return packed
+
+
+class Outbox:
+    """Búferes por destinatario con un volcado programado por ventana"""
+
+    def __init__(self, name: str, window: float = DEFAULT_WINDOW, limit: int = MESSAGE_LIMIT, logger=print):
+        self.name = name
+        self.window = window
+        self.limit = limit
+        self.logger = logger
+        self._inner = None
+        self._buffers = {}                # destino -> [mensajes]
+        self._flushing = set()
+        self._lock = asyncio.Lock()
+        self.messages = 0
+        self.sends = 0
+
+    def wrap(self, client):
+        """Devuelve el cliente envuelto; los volcados salen por `client` (el de la conexión actual)"""
+        client = self.unwrap(client)
+        self._inner = client
+        if self.window <= 0:
+            return client
+        return CoalescingClient(client, self)
+
+    @staticmethod
+    def unwrap(client):
+        """Cliente sin la envoltura del buzón (para volver a instrumentar tras reconectar)"""
+        return client._inner if isinstance(client, CoalescingClient) else client
+
+    def enqueue(self, target, text: str):
+        buffer = self._buffers.get(target)
+        if buffer is None:
+            buffer = self._buffers[target] = []
+            asyncio.get_running_loop().call_later(self.window, self._start_flush, target)
+        buffer.append(text)
+        self.messages += 1
+        metrics.inc("outbound_messages_total", kind="chat" if target is ROOM else "whisper")
+
+    def _start_flush(self, target):
+        task = asyncio.create_task(instrumentation.untraced(self._flush(target)))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, target):
+        async with self._lock:
+            messages = self._buffers.pop(target, None)
+            if not messages:
+                return
+            for text in pack(messages, self.limit):
+                self.sends += 1
+                metrics.inc("outbound_sends_total", kind="chat" if target is ROOM else "whisper")
+                try:
+                    if target is ROOM:
+                        await self._inner.chat(text)
+                    else:
+                        await self._inner.send_whisper(target, text)
+                except Exception as e:
+                    self.logger(f"Error enviando mensaje ({self.name}): {type(e).__name__}: {e}")
+
+    async def drain(self):
+        """Vuelca todo lo pendiente sin esperar a la ventana"""
+        for target in list(self._buffers):
+            await self._flush(target)
+        if self._flushing:
+            await asyncio.gather(*list(self._flushing), return_exceptions=True)
+
+    def ratio(self) -> float:
+        """Mensajes por envío (1.0 = sin agrupar)"""
+        return self.messages / self.sends if self.sends else 1.0
+
+    def collect_metrics(self):
+        """Collector para metrics: mensajes pendientes y proporción de agrupado"""
+        metrics.set_gauge("queue_depth", sum(len(b) for b in self._buffers.values()), queue=f"{self.name}:outbox")
+        metrics.set_gauge("outbound_coalesce_ratio", round(self.ratio(), 3), outbox=self.name)
+
+
+class CoalescingClient:
+    """Envoltura del cliente Highrise cuyo chat y send_whisper pasan por el buzón"""
+
+    def __init__(self, inner, outbox: Outbox):
+        self._inner = inner
+        self._outbox = outbox
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    async def chat(self, message: str) -> None:
+        self._outbox.enqueue(ROOM, message)
+
+    async def send_whisper(self, user_id: str, message: str) -> None:
+        self._outbox.enqueue(user_id, message)
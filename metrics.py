@@ -0,0 +1,369 @@
+"""Métricas ligeras de los bots: registro en memoria, envío por UDP al launcher y formato Prometheus"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+from highrise.models import Error
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# El launcher (run.py) define estas variables al lanzar cada bot
+METRICS_ADDR_ENV = "HIGHRISE_METRICS_ADDR"
+METRICS_NAME_ENV = "HIGHRISE_METRICS_NAME"
+
+REPORT_INTERVAL = 5.0                 # segundos entre envíos de snapshot
+MAX_DATAGRAM = 60000                  # tamaño máximo de un snapshot UDP
+MAX_SERIES_PER_METRIC = 200           # límite de combinaciones de etiquetas por métrica
+PREFIX = "highrise_bot_"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    "command_latency_seconds": ("histogram", "Latencia total de cada comando o evento"),
+    "command_compute_seconds": ("histogram", "Tiempo de cómputo local de cada comando o evento"),
+    "command_api_seconds": ("histogram", "Tiempo esperando a la API dentro de cada comando o evento"),
+    "api_calls_total": ("counter", "Llamadas salientes a la API de Highrise por tipo"),
+    "api_errors_total": ("counter", "Llamadas a la API que devolvieron error"),
+    "api_latency_seconds": ("histogram", "Latencia de las llamadas a la API de Highrise"),
+    "rate_limited_total": ("counter", "Respuestas de rate limit recibidas por tipo de llamada"),
+    "rate_limit_wait_seconds_total": ("counter", "Tiempo total esperado por rate limit"),
+    "active_emote_loops": ("gauge", "Bucles de emote activos"),
+    "room_users": ("gauge", "Usuarios en la sala de cada bot (último get_room_users o lista compartida)"),
+    "queue_depth": ("gauge", "Elementos pendientes en colas internas"),
+    "event_loop_tasks": ("gauge", "Tareas vivas en el event loop del bot"),
+    "persistence_flush_seconds": ("histogram", "Duración de los guardados a disco"),
+    "sessions_started_total": ("counter", "Veces que se ejecutó on_start (conexiones)"),
+    "reconnects_total": ("counter", "Reconexiones exitosas detectadas por el bot"),
+    "background_tasks": ("gauge", "Tareas en segundo plano vivas en el registro"),
+    "background_task_cpu_seconds": ("gauge", "Tiempo de CPU acumulado por tarea en segundo plano"),
+    "background_task_restarts_total": ("counter", "Reinicios de tareas en segundo plano tras un fallo"),
+    "store_size": ("gauge", "Entradas en cada contenedor acotado de estado transitorio"),
+    "store_evictions_total": ("counter", "Entradas desalojadas por TTL o tamaño máximo"),
+    "users_resident": ("gauge", "Usuarios con datos cargados en memoria"),
+    "users_archived": ("gauge", "Usuarios inactivos en el archivo en disco"),
+    "user_archive_moves_total": ("counter", "Usuarios movidos de memoria al archivo"),
+    "user_archive_faults_total": ("counter", "Usuarios recuperados del archivo bajo demanda"),
+    "heart_journal_records_total": ("counter", "Registros del diario de corazones escritos a disco"),
+    "heart_journal_compactions_total": ("counter", "Compactaciones del diario de corazones"),
+    "wallet_balance": ("gauge", "Saldo de oro del bot según el libro local"),
+    "wallet_credits_total": ("counter", "Oro recibido en propinas"),
+    "wallet_debits_total": ("counter", "Oro enviado en propinas"),
+    "wallet_drift_total": ("counter", "Diferencia acumulada corregida al conciliar con get_wallet"),
+    "dispatch_wait_seconds": ("histogram", "Espera de un evento en cola hasta que un worker lo atiende"),
+    "dispatch_dropped_total": ("counter", "Eventos descartados por cola de usuario llena"),
+    "group_teleport_moves_total": ("counter", "Usuarios movidos por teletransportes en grupo"),
+    "group_teleport_failures_total": ("counter", "Teletransportes en grupo fallidos"),
+    "emote_drift_seconds": ("histogram", "Retraso del envío de un emote en bucle respecto a su momento previsto"),
+    "emote_fanout_seconds": ("histogram", "Duración del envío de un tick de emote a todo un grupo"),
+    "emote_fanout_failures_total": ("counter", "Envíos fallidos dentro de un tick de emote en grupo"),
+    "emote_calibration_samples_total": ("counter", "Muestras de duración de emotes aceptadas"),
+    "emote_calibrated": ("gauge", "Emotes con muestras de duración (propias o de otros bots)"),
+    "outbound_messages_total": ("counter", "Mensajes de chat/susurro encolados en el buzón de salida"),
+    "outbound_sends_total": ("counter", "Llamadas de chat/susurro realmente enviadas tras agrupar"),
+    "outbound_coalesce_ratio": ("gauge", "Mensajes por envío en el buzón de salida (1 = sin agrupar)"),
+    "announcements_sent_total": ("counter", "Anuncios automáticos enviados, por bot"),
+    "announcements_skipped_total": ("counter", "Turnos de anuncio omitidos, por bot y motivo (sala vacía, reservado, formato)"),
+    "presence_messages_total": ("counter", "Mensajes del bus de presencia entre bots, por dirección y tipo"),
+    "presence_bus_connected": ("gauge", "1 si el bot está conectado al bus de presencia del launcher"),
+    "metrics_snapshots_dropped_total": ("counter", "Snapshots de métricas no enviados al launcher por superar MAX_DATAGRAM"),
+    "boot_step_seconds": ("gauge", "Duración de cada paso del último arranque"),
+    "boot_ready_seconds": ("gauge", "Segundos desde on_start hasta aceptar comandos"),
+    "launcher_bot_up": ("gauge", "1 si el proceso del bot está vivo"),
+    "launcher_bot_restarts_total": ("counter", "Reinicios del proceso del bot"),
+    "launcher_bot_uptime_seconds": ("gauge", "Segundos desde el último arranque del proceso"),
+    "launcher_report_age_seconds": ("gauge", "Segundos desde el último snapshot recibido del bot"),
+}
+
+# ============================================================================
+# REGISTRO DE MÉTRICAS
+# ============================================================================
+
+_counters = {}
+_gauges = {}
+_histograms = {}
+_series_per_metric = {}
+_collectors = []
+_reporter_task = None
+
+# Funciones (método, segundos) notificadas tras cada llamada a la API
+API_OBSERVERS = []
+
+
+def _key(name: str, labels: dict):
+    """Clave interna (nombre, etiquetas ordenadas) con límite de cardinalidad"""
+    items = tuple(sorted(labels.items())) if labels else ()
+    key = (name, items)
+    series = _series_per_metric.setdefault(name, set())
+    if key not in series:
+        if len(series) >= MAX_SERIES_PER_METRIC:
+            # Demasiadas etiquetas distintas: agrupar en "other"
+            return (name, tuple((k, "other") for k, _ in items))
+        series.add(key)
+    return key
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Incrementa un contador"""
+    key = _key(name, labels)
+    _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Fija el valor de un gauge"""
+    _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+    """Registra una observación en un histograma"""
+    key = _key(name, labels)
+    hist = _histograms.get(key)
+    if hist is None:
+        hist = _histograms[key] = [list(buckets), [0] * (len(buckets) + 1), 0.0, 0]
+    bounds, counts = hist[0], hist[1]
+    index = len(bounds)
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            index = i
+            break
+    counts[index] += 1
+    hist[2] += value
+    hist[3] += 1
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """Mide la duración del bloque y la registra en un histograma"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timed(name: str, **labels):
+    """Decorador que registra la duración de una función (síncrona o async)"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            async def async_wrapper(*args, **kwargs):
+                with timer(name, **labels):
+                    return await func(*args, **kwargs)
+            async_wrapper.__name__ = func.__name__
+            async_wrapper.__doc__ = func.__doc__
+            return async_wrapper
+
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
+
+
+def add_collector(collector):
+    """Registra una función que actualiza gauges justo antes de cada snapshot"""
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def command_key(message: str) -> str:
+    """Etiqueta de comando para métricas: '!cmd' o 'text'"""
+    if message.startswith("!"):
+        return message.split(" ", 1)[0].lower()
+    return "text"
+
+
+def snapshot(bot_name: str = "") -> dict:
+    """Copia serializable de todas las métricas"""
+    for collector in list(_collectors):
+        try:
+            collector()
+        except Exception:
+            pass
+    return {
+        "bot": bot_name,
+        "pid": os.getpid(),
+        "time": time.time(),
+        "counters": [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+        "gauges": [[name, dict(labels), value] for (name, labels), value in _gauges.items()],
+        "histograms": [[name, dict(labels), h[0], h[1], h[2], h[3]] for (name, labels), h in _histograms.items()],
+    }
+
+
+# ============================================================================
+# ENVÍO AL LAUNCHER
+# ============================================================================
+
+def _launcher_address():
+    raw = os.environ.get(METRICS_ADDR_ENV, "")
+    host, _, port = raw.rpartition(":")
+    if not host or not port.isdigit():
+        return None
+    return host, int(port)
+
+
+async def _report_loop(address, bot_name: str, logger=print):
+    """Envía el snapshot al launcher cada REPORT_INTERVAL segundos"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    oversized = False
+    try:
+        while True:
+            try:
+                payload = json.dumps(snapshot(bot_name), separators=(",", ":")).encode("utf-8")
+                if len(payload) <= MAX_DATAGRAM:
+                    sock.sendto(payload, address)
+                    oversized = False
+                else:
+                    # No cabe en un datagrama: se cuenta siempre y se avisa al empezar a pasar
+                    inc("metrics_snapshots_dropped_total", reason="oversized")
+                    if not oversized:
+                        logger(f"Snapshot de métricas de {len(payload)} bytes (máximo {MAX_DATAGRAM}): "
+                               f"no se envía al launcher")
+                    oversized = True
+            except (BlockingIOError, OSError):
+                # El launcher no está escuchando: se pierde este snapshot
+                pass
+            await asyncio.sleep(REPORT_INTERVAL)
+    finally:
+        sock.close()
+
+
+def _collect_loop_tasks():
+    set_gauge("event_loop_tasks", len(asyncio.all_tasks()))
+
+
+def start_reporter(logger=print):
+    """Arranca (una sola vez por proceso) el envío periódico de métricas"""
+    global _reporter_task
+    address = _launcher_address()
+    if address is None:
+        return None
+    if _reporter_task is not None and not _reporter_task.done():
+        return _reporter_task
+    bot_name = os.environ.get(METRICS_NAME_ENV, "bot")
+    add_collector(_collect_loop_tasks)
+    _reporter_task = asyncio.create_task(_report_loop(address, bot_name, logger))
+    return _reporter_task
+
+
+# ============================================================================
+# INSTRUMENTACIÓN DEL CLIENTE HIGHRISE
+# ============================================================================
+
+def is_rate_limit_error(error) -> bool:
+    """Detecta respuestas de rate limit en mensajes de error del servidor"""
+    message = str(getattr(error, "message", error)).lower().replace("-", " ").replace("_", " ")
+    return "rate limit" in message or "ratelimit" in message or "too many" in message
+
+
+class InstrumentedHighrise:
+    """Envoltura del cliente Highrise que cuenta llamadas, errores y latencias por método"""
+
+    def __init__(self, inner, on_room_users=None):
+        self._inner = inner
+        self._on_room_users = on_room_users     # callback(n) con el tamaño de cada get_room_users
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            start = time.perf_counter()
+            inc("api_calls_total", method=name)
+            try:
+                result = await attr(*args, **kwargs)
+            except Exception as e:
+                inc("api_errors_total", method=name)
+                if is_rate_limit_error(e):
+                    inc("rate_limited_total", method=name)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                observe("api_latency_seconds", elapsed, method=name)
+                for observer in API_OBSERVERS:
+                    observer(name, elapsed)
+
+            if isinstance(result, Error):
+                inc("api_errors_total", method=name)
+                if is_rate_limit_error(result):
+                    inc("rate_limited_total", method=name)
+            elif name == "get_room_users" and self._on_room_users is not None:
+                self._on_room_users(len(result.content))
+            return result
+
+        # Guardar en la instancia para no recrear la función en cada llamada
+        self.__dict__[name] = call
+        return call
+
+
+def instrument_bot(bot):
+    """Envuelve bot.highrise (el SDK lo reasigna en cada conexión) y arranca el reporter.
+
+    Cada get_room_users deja el número de usuarios en bot.room_users: un proceso puede
+    alojar varias salas, así que la ocupación es de cada bot y no un gauge global.
+    """
+    if not isinstance(bot.highrise, InstrumentedHighrise):
+        bot.highrise = InstrumentedHighrise(bot.highrise, lambda n: setattr(bot, "room_users", n))
+    inc("sessions_started_total")
+    start_reporter()
+
+
+# ============================================================================
+# FORMATO PROMETHEUS
+# ============================================================================
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: dict, extra: dict | None = None) -> str:
+    merged = dict(labels)
+    if extra:
+        merged.update(extra)
+    if not merged:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in merged.items()) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(snapshots: list) -> str:
+    """Convierte una lista de snapshots en texto de exposición Prometheus"""
+    families = {}
+    for snap in snapshots:
+        base = {"bot": snap.get("bot", "")}
+        for name, labels, value in snap.get("counters", []):
+            families.setdefault(name, []).append(f"{PREFIX}{name}{_labels(base, labels)} {_number(value)}")
+        for name, labels, value in snap.get("gauges", []):
+            families.setdefault(name, []).append(f"{PREFIX}{name}{_labels(base, labels)} {_number(value)}")
+        for name, labels, bounds, counts, total, count in snap.get("histograms", []):
+            lines = families.setdefault(name, [])
+            series = dict(base, **labels)
+            cumulative = 0
+            for bound, bucket_count in zip(list(bounds) + [float("inf")], counts):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{_labels(series, {'le': _number(float(bound))})} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(series)} {_number(total)}")
+            lines.append(f"{PREFIX}{name}_count{_labels(series)} {count}")
+
+    output = []
+    for name in sorted(families):
+        kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+        output.append(f"# HELP {PREFIX}{name} {help_text}")
+        output.append(f"# TYPE {PREFIX}{name} {kind}")
+        output.extend(families[name])
+    return "\n".join(output) + "\n"
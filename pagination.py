@@ -0,0 +1,131 @@
+"""Listados paginados: se renderizan una vez en páginas de hasta 250 caracteres y se guardan hasta que cambian los datos
+
+Cada listado se identifica por un nombre y una versión de sus datos. Las colecciones que se
+listan son WatchedDict, que cuentan sus modificaciones, así que comprobar si la caché sigue
+valiendo es O(1). Pedir una página es una consulta a la caché y un solo mensaje.
+"""
+
+import bounded_store
+
+PAGE_LIMIT = 250              # caracteres por mensaje de chat/susurro
+CACHE_SIZE = 64               # listados renderizados guardados
+
+
+class WatchedDict(dict):
+    """dict que incrementa `version` en cada modificación"""
+
+    version = 0
+
+    def _touch(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._touch()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._touch()
+        return result
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._touch()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._touch()
+
+    def clear(self):
+        super().clear()
+        self._touch()
+
+
+def _chunk(lines: list, budget: int) -> list:
+    """Agrupa las líneas en bloques de como mucho `budget` caracteres (recortando las que no caben solas)"""
+    chunks, current, size = [], [], 0
+    for line in lines:
+        if len(line) > budget:
+            line = line[:budget - 1] + "…"
+        if current and size + len(line) + 1 > budget:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def paginate(title: str, lines: list, footer: str = "", limit: int = PAGE_LIMIT, command: str = "") -> list:
+    """Reparte las líneas en páginas de como mucho `limit` caracteres con título y pie.
+
+    Cada página lleva "título (p/n)"; si hay más páginas y se da `command`, el pie indica
+    cómo pedir la siguiente. Una línea que no cabe sola se recorta.
+    """
+    if not lines:
+        return [f"{title}\n{footer}".strip()]
+    # Reserva para "(pp/nn)" y la indicación de siguiente página; si salen más páginas de
+    # las que caben en esas cifras, se reparte de nuevo reservando las que hacen falta
+    digits = 2
+    while True:
+        number = "9" * digits
+        next_hint = f"💡 {command} {number}" if command else ""
+        reserve = len(title) + len(f" ({number}/{number})\n") + max(len(footer), len(next_hint)) + 1
+        chunks = _chunk(lines, max(20, limit - reserve))
+        if len(str(len(chunks))) <= digits:
+            break
+        digits = len(str(len(chunks)))
+
+    total = len(chunks)
+    pages = []
+    for index, chunk in enumerate(chunks, 1):
+        header = f"{title} ({index}/{total})" if total > 1 else title
+        tail = f"💡 {command} {index + 1}" if command and index < total else footer
+        pages.append("\n".join([header, *chunk, tail]).strip())
+    return pages
+
+
+def page_number(arg: str | None) -> int:
+    """Número de página pedido (1 si falta o no es válido)"""
+    try:
+        return max(1, int(arg)) if arg else 1
+    except ValueError:
+        return 1
+
+
+class PageCache:
+    """Listados renderizados por (nombre, versión)"""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self._pages = bounded_store.LRUMap("listing_pages", maxsize)
+
+    def pages(self, name: str, version, render) -> list:
+        """Páginas del listado; render() solo se llama si la versión cambió"""
+        cached = self._pages.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        pages = render()
+        self._pages[name] = (version, pages)
+        return pages
+
+    def page(self, name: str, version, render, number: int) -> str:
+        """Una página (la última si `number` se pasa del total)"""
+        pages = self.pages(name, version, render)
+        return pages[min(number, len(pages)) - 1]
+
+    def invalidate(self, name: str | None = None):
+        if name is None:
+            self._pages.clear()
+        else:
+            self._pages.pop(name, None)
@@ -0,0 +1,270 @@
+"""Presencia compartida entre los bots que lanza run.py: lista de la sala y estado por un bus local
+
+El launcher abre un servidor TCP en 127.0.0.1 (PresenceHub) y pasa su dirección a los bots por
+entorno, igual que la de métricas. Cada bot se conecta con PresenceBus y publica mensajes JSON
+de una línea; el hub los reenvía a los demás y guarda el último "roster" y "state" de cada bot
+para entregárselos al que se conecte después (o se reinicie).
+
+Con la lista de sala que publica un bot, el otro comprueba su propia presencia sin llamar a
+get_room_users: de los dos sondeos cada 30 segundos queda uno. Sin launcher (bot suelto o
+simulador) no hay dirección y todo sigue como antes: cada bot consulta la sala por su cuenta.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import metrics
+
+BUS_ADDR_ENV = "HIGHRISE_BUS_ADDR"
+ROSTER_MAX_AGE = 30.0                  # una lista publicada hace menos que esto sustituye al sondeo propio
+RETAINED_KINDS = ("roster", "state", "loops")   # mensajes que el hub guarda y repite a quien se conecta
+LOOPS_INTERVAL = 2.0                   # segundos entre comprobaciones de los usuarios animados por bucles
+RECONNECT_DELAY = 2.0                  # segundos, se duplica hasta RECONNECT_MAX_DELAY
+RECONNECT_MAX_DELAY = 30.0
+LINE_LIMIT = 1024 * 1024
+
+
+def bus_address() -> tuple | None:
+    """(host, puerto) del hub si el launcher lo ha anunciado"""
+    raw = os.environ.get(BUS_ADDR_ENV, "")
+    host, _, port = raw.rpartition(":")
+    if not host or not port.isdigit():
+        return None
+    return host, int(port)
+
+
+def encode(message: dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# ============================================================================
+# HUB (launcher)
+# ============================================================================
+
+class PresenceHub:
+    """Reenvía los mensajes de cada bot a los demás y recuerda el último estado de cada uno"""
+
+    def __init__(self, logger=print):
+        self.logger = logger
+        self.clients = {}             # writer -> nombre del bot
+        self.retained = {}            # (bot, tipo) -> mensaje
+        self.server = None
+        self._sessions = {}           # tarea -> writer de cada conexión abierta
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Abre el servidor y devuelve la dirección "host:puerto" para los bots"""
+        self.server = await asyncio.start_server(self._serve, host, port, limit=LINE_LIMIT)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    def _broadcast(self, message: dict, sender=None):
+        data = encode(message)
+        for writer in list(self.clients):
+            if writer is not sender and not writer.is_closing():
+                writer.write(data)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        name = None
+        self._sessions[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    raw = await reader.readline()
+                except ValueError:
+                    continue
+                if not raw:
+                    break
+                try:
+                    message = json.loads(raw.decode("utf-8"))
+                except (ValueError, UnicodeDecodeError):
+                    continue
+                kind = message.get("kind")
+                if kind == "hello":
+                    name = message.get("from", "?")
+                    self.clients[writer] = name
+                    for retained in self.retained.values():
+                        if retained.get("from") != name:
+                            writer.write(encode(retained))
+                    self._broadcast({"from": name, "kind": "online"}, sender=writer)
+                    continue
+                if name is None:
+                    continue
+                message["from"] = name
+                if kind in RETAINED_KINDS:
+                    self.retained[(name, kind)] = message
+                self._broadcast(message, sender=writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._sessions.pop(asyncio.current_task(), None)
+            self.clients.pop(writer, None)
+            if name is not None and name not in self.clients.values():
+                self.retained.pop((name, "state"), None)
+                self.retained.pop((name, "loops"), None)
+                self._broadcast({"from": name, "kind": "offline"})
+            writer.close()
+
+    async def close(self):
+        if self.server is None:
+            return
+        self.server.close()
+        # Cerrar las conexiones (no cancelar las tareas) deja que cada sesión termine sola
+        for writer in list(self._sessions.values()):
+            writer.close()
+        await asyncio.gather(*list(self._sessions), return_exceptions=True)
+        await self.server.wait_closed()
+
+
+# ============================================================================
+# CLIENTE (cada bot)
+# ============================================================================
+
+class Roster:
+    """Usuarios de la sala según el último sondeo publicado por algún bot"""
+
+    def __init__(self):
+        self.users = {}               # user_id -> username
+        self.updated_at = None        # time.time() del sondeo
+        self.source = None
+
+    def replace(self, users: dict, source: str, at: float):
+        self.users = users
+        self.source = source
+        self.updated_at = at
+
+    def age(self) -> float:
+        return float("inf") if self.updated_at is None else time.time() - self.updated_at
+
+
+class PresenceBus:
+    """Conexión de un bot al hub: publica su lista y su estado y recibe los de los demás"""
+
+    def __init__(self, name: str, logger=print):
+        self.name = name
+        self.logger = logger
+        self.address = bus_address()
+        self.roster = Roster()        # última lista de la sala, propia o de otro bot
+        self.peers = {}               # bot -> {"online": bool, "state": dict, "loops": set}
+        self.peer_loops = set()       # ids animados por los bucles de los demás bots (bots incluidos)
+        self._handlers = {}           # tipo -> [callback(mensaje)]
+        self._writer = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def on(self, kind: str, callback):
+        """Registra callback(mensaje) para los mensajes de otros bots de ese tipo"""
+        self._handlers.setdefault(kind, []).append(callback)
+
+    def publish(self, kind: str, **data) -> bool:
+        """Envía un mensaje a los demás bots; False si no hay conexión con el hub"""
+        if not self.connected:
+            return False
+        self._writer.write(encode({"from": self.name, "kind": kind, **data}))
+        metrics.inc("presence_messages_total", direction="out", kind=kind)
+        return True
+
+    def publish_roster(self, room_users) -> dict:
+        """Publica el resultado de get_room_users (lista de (User, posición)) y lo devuelve como dict"""
+        users = {user.id: user.username for user, _ in room_users}
+        now = time.time()
+        self.roster.replace(users, self.name, now)
+        self.publish("roster", users=users, at=now)
+        return users
+
+    def shared_users(self, max_age: float) -> dict | None:
+        """Lista publicada por otro bot hace menos de max_age segundos, o None"""
+        if self.roster.source in (None, self.name) or self.roster.age() > max_age:
+            return None
+        return self.roster.users
+
+    def peer(self, name: str) -> dict | None:
+        """{"online", "state", "loops"} del bot indicado, o None si nunca se ha sabido de él"""
+        return self.peers.get(name)
+
+    async def share_loops(self, looped, interval: float = LOOPS_INTERVAL):
+        """Tarea: publica, cuando cambian, los ids que animan los bucles de este bot (looped() -> ids).
+
+        Los demás bots no cuentan los emotes de esos usuarios como muestras de calibración:
+        el intervalo entre dos envíos de un bucle es la duración que el propio bucle ya supone.
+        """
+        last = None
+        while True:
+            current = sorted(uid for uid in looped() if uid)
+            # Tras reconectar se vuelve a publicar: el hub olvida los bucles de quien se desconecta
+            if (current, self._writer) != last and self.publish("loops", users=current):
+                last = (current, self._writer)
+            await asyncio.sleep(interval)
+
+    def _update_peer_loops(self):
+        self.peer_loops = set().union(*(peer["loops"] for peer in self.peers.values()))
+
+    def _handle(self, message: dict):
+        sender = message.get("from")
+        kind = message.get("kind")
+        if not sender or sender == self.name:
+            return
+        metrics.inc("presence_messages_total", direction="in", kind=kind or "?")
+        peer = self.peers.setdefault(sender, {"online": True, "state": {}, "loops": set()})
+        if kind == "roster":
+            at = float(message.get("at", 0))
+            if self.roster.updated_at is None or at >= self.roster.updated_at:
+                self.roster.replace(dict(message.get("users", {})), sender, at)
+        elif kind == "state":
+            peer["state"] = dict(message.get("state", {}))
+            peer["online"] = True
+        elif kind == "loops":
+            peer["loops"] = set(message.get("users", []))
+            self._update_peer_loops()
+        elif kind == "online":
+            peer["online"] = True
+        elif kind == "offline":
+            peer["online"] = False
+            peer["state"] = {}
+            peer["loops"] = set()
+            self._update_peer_loops()
+        for callback in self._handlers.get(kind, ()):
+            try:
+                callback(message)
+            except Exception as e:
+                self.logger(f"Error en manejador de presencia '{kind}': {type(e).__name__}: {e}")
+
+    async def run(self):
+        """Tarea en segundo plano: mantiene la conexión con el hub y procesa lo que llega"""
+        if self.address is None:
+            return
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(*self.address, limit=LINE_LIMIT)
+            except OSError as e:
+                self.logger(f"Bus de presencia no disponible ({e}); reintento en {delay:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(RECONNECT_MAX_DELAY, delay * 2)
+                continue
+            delay = RECONNECT_DELAY
+            self._writer = writer
+            writer.write(encode({"from": self.name, "kind": "hello"}))
+            metrics.set_gauge("presence_bus_connected", 1, bus=self.name)
+            try:
+                while True:
+                    try:
+                        raw = await reader.readline()
+                    except ValueError:
+                        continue
+                    if not raw:
+                        break
+                    try:
+                        self._handle(json.loads(raw.decode("utf-8")))
+                    except (ValueError, UnicodeDecodeError):
+                        continue
+            except ConnectionError:
+                pass
+            finally:
+                self._writer = None
+                metrics.set_gauge("presence_bus_connected", 0, bus=self.name)
+                writer.close()
+            await asyncio.sleep(delay)
@@ -0,0 +1,131 @@
+"""Operaciones de sala sobre grupos de usuarios (teletransporte, emotes) con ritmo y concurrencia acotados
+
+teleport y send_emote del SDK no esperan respuesta del servidor, así que lo que limita es el ritmo de envío:
+un marcapasos reparte los envíos a RATE por segundo y un semáforo limita los que están en vuelo.
+Los errores de rate limit se reintentan con espera creciente; el resto cuenta como fallo.
+"""
+
+import asyncio
+import math
+import time
+
+from highrise import Position
+from highrise.models import Error
+
+import metrics
+
+DEFAULT_RATE = 10.0           # llamadas por segundo
+DEFAULT_CONCURRENCY = 4       # llamadas en vuelo a la vez
+DEFAULT_SPACING = 1.0         # separación de la cuadrícula alrededor del punto
+MAX_RETRIES = 2
+RETRY_DELAY = 0.5             # segundos, se multiplica por el intento
+
+
+class RatePacer:
+    """Reparte llamadas a un ritmo máximo fijo"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def grid_positions(point: dict, count: int, spacing: float = DEFAULT_SPACING) -> list:
+    """Posiciones en espiral cuadrada alrededor del punto (la primera es el propio punto)"""
+    x, y, z = point["x"], point["y"], point["z"]
+    if count <= 0:
+        return []
+    if spacing <= 0:
+        return [Position(x, y, z) for _ in range(count)]
+    positions = [Position(x, y, z)]
+    ring = 1
+    while len(positions) < count:
+        # Anillo `ring`: todas las celdas con max(|dx|, |dz|) == ring
+        for dx in range(-ring, ring + 1):
+            for dz in range(-ring, ring + 1):
+                if max(abs(dx), abs(dz)) == ring:
+                    positions.append(Position(x + dx * spacing, y, z + dz * spacing))
+        ring += 1
+    # Dentro de cada anillo, primero las celdas más cercanas al centro
+    head, rest = positions[:1], positions[1:]
+    rest.sort(key=lambda p: (max(abs(p.x - x), abs(p.z - z)), math.hypot(p.x - x, p.z - z)))
+    return (head + rest)[:count]
+
+
+class GroupTeleportResult:
+    __slots__ = ("moved", "failed", "elapsed")
+
+    def __init__(self):
+        self.moved = 0
+        self.failed = []          # (user_id, motivo)
+        self.elapsed = 0.0
+
+
+async def run_paced(items, call, rate: float = DEFAULT_RATE, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    """Ejecuta call(item) para cada item con ritmo y concurrencia acotados.
+
+    call devuelve None/resultado en éxito, o un Error / lanza una excepción en fallo.
+    Devuelve [(item, motivo)] de los fallidos; los rate limit se reintentan.
+    """
+    pacer = RatePacer(rate)
+    slots = asyncio.Semaphore(max(1, concurrency))
+    failed = []
+
+    async def run(item):
+        async with slots:
+            for attempt in range(MAX_RETRIES + 1):
+                await pacer.wait()
+                try:
+                    response = await call(item)
+                except Exception as e:
+                    response = e
+                if not isinstance(response, (Error, Exception)):
+                    return
+                if metrics.is_rate_limit_error(response) and attempt < MAX_RETRIES:
+                    delay = RETRY_DELAY * (attempt + 1)
+                    metrics.inc("rate_limit_wait_seconds_total", delay)
+                    await asyncio.sleep(delay)
+                    continue
+                failed.append((item, str(getattr(response, "message", response))))
+                return
+
+    await asyncio.gather(*(run(item) for item in items))
+    return failed
+
+
+async def teleport_group(client, user_ids, point: dict, spread: float = 0.0,
+                         rate: float = DEFAULT_RATE, concurrency: int = DEFAULT_CONCURRENCY) -> GroupTeleportResult:
+    """Teletransporta a user_ids al punto; con spread > 0 los reparte en cuadrícula para no apilarlos"""
+    user_ids = list(dict.fromkeys(user_ids))
+    if spread > 0:
+        positions = grid_positions(point, len(user_ids), spread)
+    else:
+        positions = [Position(point["x"], point["y"], point["z"])] * len(user_ids)
+    result = GroupTeleportResult()
+    started = time.perf_counter()
+    failed = await run_paced(
+        list(zip(user_ids, positions)), lambda item: client.teleport(*item), rate=rate, concurrency=concurrency,
+    )
+    result.failed = [(item[0], reason) for item, reason in failed]
+    result.moved = len(user_ids) - len(result.failed)
+    result.elapsed = time.perf_counter() - started
+    metrics.inc("group_teleport_moves_total", result.moved)
+    if result.failed:
+        metrics.inc("group_teleport_failures_total", len(result.failed))
+    return result
+
+
+async def send_emote_group(client, user_ids, emote_id: str,
+                           rate: float = DEFAULT_RATE, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    """Envía el mismo emote a varios usuarios. Devuelve [(user_id, motivo)] de los fallidos"""
+    return await run_paced(
+        list(dict.fromkeys(user_ids)), lambda uid: client.send_emote(emote_id, uid), rate=rate, concurrency=concurrency,
+    )
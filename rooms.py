@@ -0,0 +1,238 @@
+"""Una definición de bot en muchas salas: contexto por sala, datos compartidos y reparto entre procesos
+
+main.py guarda su estado en variables de módulo. Para llevar el mismo bot a varias salas sin un
+proceso completo por sala, cada sala carga su propia copia del módulo (load_room_module): la
+copia tiene sus globales (puntos, zonas, emotes activos...) y comparte con las demás el
+intérprete, el SDK y los módulos comunes como el catálogo de emotes.
+
+Mientras se ejecuta la copia, current() devuelve el RoomContext de la sala; main.py lo usa para
+leer su configuración y resolver sus rutas de datos en rooms/<sala>/. Las categorías listadas en
+"shared" ("vip", "economy") son el mismo objeto en todas las salas del grupo y se guardan en
+rooms/_shared/<grupo>/; solo la primera sala del grupo las carga y las persiste. Las salas que
+comparten datos se asignan siempre al mismo proceso.
+
+Uso (lo lanza run.py --rooms rooms.json): python rooms.py rooms.json <índice> <procesos>
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+
+DEFAULT_ROOMS_FILE = "rooms.json"
+ROOMS_DIR = "rooms"
+SHARED_DIR = os.path.join(ROOMS_DIR, "_shared")
+SHAREABLE = ("vip", "economy")
+DEFAULT_GROUP = "global"
+
+_loading = None               # RoomContext de la copia que se está importando
+_shared_objects = {}          # (grupo, categoría, nombre) -> objeto
+_owners = {}                  # (grupo, categoría) -> sala que carga y guarda esos datos
+
+
+class RoomContext:
+    """Sala para la que se ejecuta una copia de main.py"""
+
+    def __init__(self, name: str = "", room_id: str = "", api_token: str = "", root: str = ".",
+                 base_config: str = "config.json", overrides: dict | None = None,
+                 shared=(), group: str = DEFAULT_GROUP):
+        self.name = name
+        self.room_id = room_id
+        self.api_token = api_token
+        self.root = root
+        self.base_config = base_config
+        self.overrides = overrides or {}
+        self.shared = tuple(category for category in shared if category in SHAREABLE)
+        self.group = group
+
+    @property
+    def is_default(self) -> bool:
+        """Bot de una sola sala (python -m highrise main:Bot): rutas y configuración de siempre"""
+        return self.root == "."
+
+    @property
+    def config_path(self) -> str:
+        """Archivo donde se guardan los cambios de configuración hechos con comandos"""
+        return self.base_config if self.is_default else os.path.join(self.root, "config.json")
+
+    def path(self, relative: str, category: str | None = None) -> str:
+        """Ruta de un archivo de datos de la sala (o del grupo si la categoría es compartida)"""
+        if category in self.shared:
+            return os.path.join(SHARED_DIR, self.group, relative)
+        return relative if self.is_default else os.path.join(self.root, relative)
+
+    def label(self, base: str) -> str:
+        """Nombre de bot distinguible por sala (secciones de archivos comunes, registros)"""
+        return base if not self.name else f"{base} [{self.name}]"
+
+    def load_config(self) -> dict:
+        """config.json base, con los valores de la sala en rooms.json y los guardados por comandos encima"""
+        config = _read_json(self.base_config)
+        if not self.is_default:
+            config.update(self.overrides)
+            config.update(_read_json(self.config_path))
+        if self.room_id:
+            config["room_id"] = self.room_id
+        if self.api_token:
+            config["api_token"] = self.api_token
+        return config
+
+    def shared_object(self, category: str, name: str, factory):
+        """factory() para esta sala, o el objeto común del grupo si la categoría es compartida"""
+        if category not in self.shared:
+            return factory()
+        key = (self.group, category, name)
+        if key not in _shared_objects:
+            _shared_objects[key] = factory()
+        _owners.setdefault((self.group, category), self.name)
+        return _shared_objects[key]
+
+    def owns(self, category: str) -> bool:
+        """¿Carga y guarda esta sala los datos de la categoría? (siempre, si no se comparte)"""
+        return category not in self.shared or _owners.get((self.group, category)) == self.name
+
+
+DEFAULT_ROOM = RoomContext()
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current() -> RoomContext:
+    """Contexto de la sala cuya copia de main.py se está importando (DEFAULT_ROOM fuera de rooms)"""
+    return _loading or DEFAULT_ROOM
+
+
+def load_room_module(room: RoomContext, path: str = "main.py"):
+    """Ejecuta una copia independiente del módulo para la sala"""
+    global _loading
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f"{stem}__{room.name}"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    _loading = room
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        _loading = None
+    return module
+
+
+# ============================================================================
+# CONFIGURACIÓN Y REPARTO
+# ============================================================================
+
+def load_rooms(path: str = DEFAULT_ROOMS_FILE) -> tuple:
+    """Lee rooms.json. Devuelve (ajustes generales, [RoomContext])"""
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    default_shared = spec.get("shared", [])
+    base_config = spec.get("base_config", "config.json")
+    rooms = []
+    for entry in spec.get("rooms", []):
+        name = entry["name"]
+        if not name or name.startswith("_") or os.sep in name or "/" in name:
+            raise ValueError(f"nombre de sala inválido: '{name}'")
+        rooms.append(RoomContext(
+            name=name,
+            room_id=entry["room_id"],
+            api_token=entry.get("api_token", spec.get("api_token", "")),
+            root=os.path.join(ROOMS_DIR, name),
+            base_config=base_config,
+            overrides=entry.get("config", {}),
+            shared=entry.get("shared", default_shared),
+            group=entry.get("group", DEFAULT_GROUP),
+        ))
+    if len({room.name for room in rooms}) != len(rooms):
+        raise ValueError("hay nombres de sala repetidos")
+    return spec, rooms
+
+
+def worker_count(spec: dict, rooms: list) -> int:
+    """Procesos a usar: "workers" de rooms.json (0 = núcleos de CPU), sin pasar del número de bloques"""
+    wanted = int(spec.get("workers", 0)) or os.cpu_count() or 1
+    return max(1, min(wanted, len(_units(rooms))))
+
+
+def _units(rooms: list) -> list:
+    """Bloques que no se pueden separar: las salas de un grupo con datos compartidos van juntas"""
+    units = {}
+    for room in rooms:
+        key = ("group", room.group) if room.shared else ("room", room.name)
+        units.setdefault(key, []).append(room)
+    return list(units.values())
+
+
+def shard(rooms: list, workers: int) -> list:
+    """Reparte las salas en `workers` listas equilibradas por número de salas (determinista)"""
+    shards = [[] for _ in range(max(1, workers))]
+    for unit in sorted(_units(rooms), key=len, reverse=True):
+        min(shards, key=len).extend(unit)
+    return shards
+
+
+# ============================================================================
+# PROCESO DE TRABAJO
+# ============================================================================
+
+async def run_worker(bots):
+    """Conexiones de las salas del proceso, con la supervisión del modo de proceso único de run.py"""
+    import run
+
+    stop_event = asyncio.Event()
+    run.install_signal_handlers(asyncio.get_running_loop(), stop_event)
+    previous_streams = sys.stdout, sys.stderr
+    relay = run.LogRelay(stream=sys.stdout)
+    sys.stdout = run.HostedOutput(relay, relay.stream)
+    sys.stderr = run.HostedOutput(relay, sys.stderr)
+    relay_task = asyncio.create_task(relay.run(stop_event))
+    supervisors = [asyncio.create_task(run.supervise_hosted(bot, stop_event)) for bot in bots]
+
+    waiter = asyncio.create_task(stop_event.wait())
+    pending = set(supervisors)
+    while pending and not stop_event.is_set():
+        done, pending = await asyncio.wait([waiter, *pending], return_when=asyncio.FIRST_COMPLETED)
+        pending.discard(waiter)
+
+    stop_event.set()
+    await run.stop_hosted(bots)
+    await asyncio.gather(*supervisors, return_exceptions=True)
+    waiter.cancel()
+    await relay_task
+    sys.stdout, sys.stderr = previous_streams
+
+
+def worker_main(argv) -> int:
+    import presence
+    import run
+
+    rooms_file, index, count = argv[0], int(argv[1]), int(argv[2])
+    spec, rooms = load_rooms(rooms_file)
+    mine = shard(rooms, count)[index]
+    bot_path = spec.get("bot", "main:Bot")
+    module_name, class_name = bot_path.split(":")
+    # El bus de presencia une al bot principal con el cantinero de una sala, no a salas distintas
+    os.environ.pop(presence.BUS_ADDR_ENV, None)
+
+    bots = []
+    for room in mine:
+        os.makedirs(room.root, exist_ok=True)
+        bot = run.HostedBot(room.name, bot_path, room.room_id, room.api_token)
+        bot.module = load_room_module(room, f"{module_name}.py")
+        bot.bot_class = getattr(bot.module, class_name)
+        bots.append(bot)
+    print(f"🏠 Proceso {index + 1}/{count}: {len(bots)} salas ({', '.join(room.name for room in mine)})")
+    asyncio.run(run_worker(bots))
+    return 0
+
+
+if __name__ == "__main__":
+    # Las copias de main.py hacen "import rooms": el contexto de sala tiene que vivir en ese módulo, no en __main__
+    import rooms
+    sys.exit(rooms.worker_main(sys.argv[1:]))
@@ -1,26 +1,48 @@
 import asyncio
+import contextvars
+import importlib
 import json
-import subprocess
+import random
+import signal
 import sys
 import threading
 import time
 import os
+from collections import deque
+
+import metrics
+import presence
 
 # ------------------------------
 # SERVIDOR WEB PARA KOYEB
 # ------------------------------
-from flask import Flask
+def create_app():
+    """App Flask del launcher (se importa aquí: los procesos de salas importan run.py sin servidor web)"""
+    from flask import Flask, Response, jsonify
+
+    app = Flask(__name__)
+
+    @app.route("/")
+    def home():
+        return "Bots Highrise corriendo en Koyeb!"
 
-app = Flask(__name__)
+    @app.route("/healthz")
+    def healthz():
+        """Estado de los bots desde la caché del launcher"""
+        health = METRICS_CACHE.health
+        return jsonify(health), (200 if health["status"] == "ok" else 503)
 
-@app.route("/")
-def home():
-    return "Bots Highrise corriendo en Koyeb!"
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Métricas en formato Prometheus desde la caché del launcher"""
+        return Response(METRICS_CACHE.text, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    return app
 
 def start_web():
     """Inicia un servidor web para que Koyeb no cierre la app."""
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
+    create_app().run(host="0.0.0.0", port=port)
 
 
 # ------------------------------
@@ -37,57 +59,563 @@ def load_config(config_file):
 
 
 # ------------------------------
-# EJECUCIÓN DE BOTS HIGHRISE
+# SUPERVISOR ASÍNCRONO DE BOTS
 # ------------------------------
-def run_bot(bot_name, bot_file, room_id, api_token):
-    """Ejecuta un bot usando el SDK de Highrise"""
+
+# Reinicios con backoff exponencial y jitter
+RESTART_BASE_DELAY = 5        # segundos tras la primera caída
+RESTART_MAX_DELAY = 300       # tope del backoff
+RESTART_JITTER = 0.2          # ±20% aleatorio para no reiniciar ambos bots a la vez
+STABLE_RUNTIME = 120          # si el bot vivió más que esto, el backoff vuelve a empezar
+
+# Detección de bucle de caídas
+CRASH_LOOP_WINDOW = 300       # ventana de observación (segundos)
+CRASH_LOOP_THRESHOLD = 5      # caídas dentro de la ventana para considerarlo bucle
+CRASH_LOOP_COOLDOWN = 900     # pausa larga cuando se detecta un bucle
+
+# Relay de logs
+LOG_FLUSH_INTERVAL = 0.25     # cada cuánto se vuelca el lote de líneas
+LOG_MAX_BATCH = 500           # líneas máximas por volcado
+PIPE_READ_LIMIT = 1024 * 1024 # tamaño máximo de una línea del hijo
+
+# Apagado ordenado
+SHUTDOWN_GRACE = 15           # segundos para que los bots guarden sus datos
+
+# Modo de proceso único (los dos bots como conexiones del mismo event loop)
+SINGLE_PROCESS_ENV = "BOTS_SINGLE_PROCESS"
+SINGLE_PROCESS_FLAG = "--single-process"
+HOSTED_REPORT_NAME = "Bots"   # un solo registro de métricas para todo el proceso
+
+# Modo multisala (rooms.py: el bot principal en muchas salas repartidas entre procesos)
+ROOMS_FLAG = "--rooms"
+ROOMS_ENV = "BOTS_ROOMS_FILE"
+
+# Métricas
+METRICS_REFRESH_INTERVAL = 2  # cada cuánto se regenera la caché de /metrics y /healthz
+METRICS_STALE_AFTER = metrics.REPORT_INTERVAL * 3
+
+
+class MetricsCache:
+    """Último snapshot de cada bot y respuestas HTTP ya renderizadas"""
+
+    def __init__(self):
+        self.snapshots = {}
+        self.received_at = {}
+        # Flask solo lee estas dos referencias; el launcher las reemplaza enteras
+        self.text = ""
+        self.health = {"status": "starting", "bots": {}}
+
+    def store(self, snapshot: dict):
+        name = snapshot.get("bot", "")
+        self.snapshots[name] = snapshot
+        self.received_at[name] = time.monotonic()
+
+    def refresh(self, bots):
+        """Regenera el texto Prometheus y el estado de salud"""
+        now = time.monotonic()
+        launcher = {"bot": "launcher", "counters": [], "gauges": []}
+        bots_health = {}
+        healthy = True
+
+        for bot in bots:
+            alive = bot.alive()
+            received = self.received_at.get(bot.report_name)
+            report_age = None if received is None else now - received
+            fresh = report_age is not None and report_age <= METRICS_STALE_AFTER
+            healthy = healthy and alive and fresh
+
+            labels = {"bot": bot.name}
+            launcher["gauges"].append(["launcher_bot_up", labels, 1 if alive else 0])
+            launcher["counters"].append(["launcher_bot_restarts_total", labels, bot.restarts])
+            if alive:
+                launcher["gauges"].append(["launcher_bot_uptime_seconds", labels, round(now - bot.started_at, 1)])
+            if report_age is not None:
+                launcher["gauges"].append(["launcher_report_age_seconds", labels, round(report_age, 1)])
+
+            bots_health[bot.name] = {
+                "running": alive,
+                "restarts": bot.restarts,
+                "last_report_seconds": None if report_age is None else round(report_age, 1),
+            }
+
+        self.text = metrics.render_prometheus([launcher, *self.snapshots.values()])
+        self.health = {"status": "ok" if healthy else "degraded", "bots": bots_health}
+
+
+class MetricsProtocol(asyncio.DatagramProtocol):
+    """Recibe por UDP local los snapshots que envían los bots"""
+
+    def __init__(self, cache: MetricsCache):
+        self.cache = cache
+
+    def datagram_received(self, data, addr):
+        try:
+            self.cache.store(json.loads(data.decode("utf-8")))
+        except (ValueError, UnicodeDecodeError):
+            pass
+
+
+METRICS_CACHE = MetricsCache()
+METRICS_ADDR = None
+BUS_ADDR = None               # hub de presencia compartido por los bots
+
+
+async def refresh_metrics(bots, stop_event: asyncio.Event):
+    """Mantiene actualizada la caché que sirve Flask"""
+    while not stop_event.is_set():
+        METRICS_CACHE.refresh(bots)
+        try:
+            await asyncio.wait_for(stop_event.wait(), METRICS_REFRESH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+class LogRelay:
+    """Agrupa la salida de todos los bots y la escribe en lotes con prefijo"""
+
+    def __init__(self, stream=None):
+        self.pending = []
+        # En modo de proceso único sys.stdout es HostedOutput: se escribe en la consola real
+        self.stream = stream
+
+    def push(self, bot_name: str, line: str):
+        self.pending.append(f"[{bot_name}] {line}")
+        if len(self.pending) >= LOG_MAX_BATCH:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunk = "".join(self.pending)
+        self.pending = []
+        stream = self.stream or sys.stdout
+        try:
+            stream.write(chunk)
+        except UnicodeEncodeError:
+            # Consolas de Windows sin soporte de emojis
+            stream.write(chunk.encode("ascii", "ignore").decode("ascii"))
+        stream.flush()
+
+    async def run(self, stop_event: asyncio.Event):
+        """Vuelca el lote periódicamente hasta que se detenga el launcher"""
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), LOG_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.flush()
+        self.flush()
+
+
+class BotProcess:
+    """Estado de supervisión de un bot hijo"""
+
+    def __init__(self, name: str, bot_path: str, room_id: str, api_token: str):
+        self.name = name
+        self.bot_path = bot_path
+        self.room_id = room_id
+        self.api_token = api_token
+        self.report_name = name
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.crash_times = deque()
+
+    def command(self):
+        return [sys.executable, "-m", "highrise", self.bot_path, self.room_id, self.api_token]
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def record_crash(self) -> bool:
+        """Registra una caída y devuelve True si el bot está en bucle de caídas"""
+        now = time.monotonic()
+        runtime = now - self.started_at
+        if runtime >= STABLE_RUNTIME:
+            self.consecutive_failures = 0
+        self.consecutive_failures += 1
+
+        self.crash_times.append(now)
+        while self.crash_times and now - self.crash_times[0] > CRASH_LOOP_WINDOW:
+            self.crash_times.popleft()
+        return len(self.crash_times) >= CRASH_LOOP_THRESHOLD
+
+    def next_delay(self, crash_loop: bool) -> float:
+        """Calcula la espera antes del siguiente reinicio"""
+        if crash_loop:
+            return CRASH_LOOP_COOLDOWN
+        delay = min(RESTART_MAX_DELAY, RESTART_BASE_DELAY * (2 ** (self.consecutive_failures - 1)))
+        return delay * random.uniform(1 - RESTART_JITTER, 1 + RESTART_JITTER)
+
+
+def child_environment(bot: BotProcess):
+    """Entorno de los bots hijos: salida sin buffer, UTF-8 y dirección de métricas"""
+    env = os.environ.copy()
+    env["PYTHONUNBUFFERED"] = "1"
+    env["PYTHONIOENCODING"] = "utf-8"
+    env[metrics.METRICS_NAME_ENV] = bot.name
+    if METRICS_ADDR:
+        env[metrics.METRICS_ADDR_ENV] = METRICS_ADDR
+    if BUS_ADDR:
+        env[presence.BUS_ADDR_ENV] = BUS_ADDR
+    return env
+
+
+async def skip_line(stream: asyncio.StreamReader):
+    """Descarta lo que queda de la línea actual, salto incluido, sin tocar lo que viene detrás"""
+    while True:
+        try:
+            await stream.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as e:
+            # e.consumed: bytes revisados sin llegar al salto (o hasta él, si está más allá del límite)
+            await stream.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+
+async def relay_output(bot: BotProcess, relay: LogRelay):
+    """Lee la salida del hijo sin bloquear el event loop"""
+    stream = bot.process.stdout
+    while True:
+        try:
+            raw = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            raw = e.partial       # fin de la salida: lo que quede sin salto final
+        except asyncio.LimitOverrunError:
+            # Línea más larga que PIPE_READ_LIMIT: se salta solo esa línea
+            await skip_line(stream)
+            relay.push(bot.name, "<línea truncada>\n")
+            continue
+        if not raw:
+            break
+        line = raw.decode("utf-8", errors="replace")
+        if not line.endswith("\n"):
+            line += "\n"
+        relay.push(bot.name, line)
+
+
+async def stop_process(bot: BotProcess):
+    """Envía SIGTERM al bot y espera a que guarde sus datos antes de matarlo"""
+    process = bot.process
+    if process is None or process.returncode is not None:
+        return
+    print(f"⚠️ Deteniendo {bot.name} (esperando hasta {SHUTDOWN_GRACE}s para guardar datos)...")
+    try:
+        if sys.platform == "win32":
+            process.terminate()
+        else:
+            process.send_signal(signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(process.wait(), SHUTDOWN_GRACE)
+    except asyncio.TimeoutError:
+        print(f"❌ {bot.name} no terminó a tiempo, forzando cierre")
+        process.kill()
+        await process.wait()
+
+
+async def wait_before_restart(bot: BotProcess, stop_event: asyncio.Event):
+    """Registra la caída y espera el backoff (o el apagado) antes del siguiente intento"""
+    crash_loop = bot.record_crash()
+    delay = bot.next_delay(crash_loop)
+    if crash_loop:
+        print(f"🛑 {bot.name} se cayó {len(bot.crash_times)} veces en {CRASH_LOOP_WINDOW}s: bucle de caídas detectado")
+    print(f"🔄 Reiniciando {bot.name} en {delay:.1f} segundos...")
+
+    try:
+        await asyncio.wait_for(stop_event.wait(), delay)
+    except asyncio.TimeoutError:
+        bot.restarts += 1
+
+
+async def supervise_bot(bot: BotProcess, relay: LogRelay, stop_event: asyncio.Event):
+    """Ejecuta un bot y lo reinicia con backoff exponencial si se cae"""
     print(f"\n{'='*60}")
-    print(f"🤖 Iniciando {bot_name}")
+    print(f"🤖 Iniciando {bot.name}")
     print(f"{'='*60}\n")
-    
-    cmd = [
-        sys.executable,
-        "-m",
-        "highrise",
-        bot_file,
-        room_id,
-        api_token
-    ]
-    
-    process = None
-    while True:
+
+    while not stop_event.is_set():
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
+            bot.process = await asyncio.create_subprocess_exec(
+                *bot.command(),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                env=child_environment(bot),
+                limit=PIPE_READ_LIMIT
             )
-            
-            if process.stdout:
-                for line in process.stdout:
-                    print(f"[{bot_name}] {line}", end='')
-            
-            process.wait()
-            
-            if process.returncode != 0:
-                print(f"\n❌ {bot_name} terminó con código {process.returncode}")
-                print(f"🔄 Reiniciando {bot_name} en 5 segundos...")
-                time.sleep(5)
-            else:
-                print(f"\n✅ {bot_name} terminó normalmente")
+            bot.started_at = time.monotonic()
+            if stop_event.is_set():
+                # El apagado llegó mientras se creaba el proceso
+                await stop_process(bot)
+
+            await relay_output(bot, relay)
+            returncode = await bot.process.wait()
+            relay.flush()
+
+            if stop_event.is_set():
+                break
+
+            if returncode == 0:
+                print(f"\n✅ {bot.name} terminó normalmente")
+                break
+
+            print(f"\n❌ {bot.name} terminó con código {returncode}")
+        except Exception as e:
+            print(f"\n❌ Error en {bot.name}: {e}")
+
+        await wait_before_restart(bot, stop_event)
+
+
+def install_signal_handlers(loop, stop_event: asyncio.Event):
+    """Convierte SIGINT/SIGTERM del launcher en un apagado ordenado"""
+    def request_stop(*_):
+        loop.call_soon_threadsafe(stop_event.set)
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, request_stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows: el event loop no admite add_signal_handler
+            signal.signal(sig, request_stop)
+
+
+async def run_supervisor(bots, hosted: bool = False):
+    """Supervisa todos los bots en un único event loop (hosted: los bots corren en este mismo proceso)"""
+    global METRICS_ADDR, BUS_ADDR
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    install_signal_handlers(loop, stop_event)
+
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: MetricsProtocol(METRICS_CACHE), local_addr=("127.0.0.1", 0)
+    )
+    host, port = transport.get_extra_info("sockname")[:2]
+    METRICS_ADDR = f"{host}:{port}"
+    metrics_task = asyncio.create_task(refresh_metrics(bots, stop_event))
+
+    hub = presence.PresenceHub()
+    try:
+        BUS_ADDR = await hub.start()
+    except OSError as e:
+        print(f"⚠️ Bus de presencia no disponible, cada bot consultará la sala por su cuenta: {e}")
+
+    if hosted:
+        # Los bots leen las direcciones del entorno igual que si fueran procesos hijos
+        os.environ[metrics.METRICS_ADDR_ENV] = METRICS_ADDR
+        os.environ[metrics.METRICS_NAME_ENV] = HOSTED_REPORT_NAME
+        if BUS_ADDR:
+            os.environ[presence.BUS_ADDR_ENV] = BUS_ADDR
+        previous_streams = sys.stdout, sys.stderr
+        relay = LogRelay(stream=sys.stdout)
+        sys.stdout = HostedOutput(relay, relay.stream)
+        sys.stderr = HostedOutput(relay, sys.stderr)
+        supervisors = [asyncio.create_task(supervise_hosted(bot, stop_event)) for bot in bots]
+    else:
+        relay = LogRelay()
+        supervisors = [asyncio.create_task(supervise_bot(bot, relay, stop_event)) for bot in bots]
+    relay_task = asyncio.create_task(relay.run(stop_event))
+
+    print("\n" + "="*60)
+    print("🚀 Ambos bots están corriendo")
+    print("⚠️  Presiona Ctrl+C para detener todos los bots (si estás en PC)")
+    print("="*60 + "\n")
+
+    waiter = asyncio.create_task(stop_event.wait())
+    await asyncio.wait([waiter, *supervisors], return_when=asyncio.FIRST_COMPLETED)
+    if not stop_event.is_set():
+        # Algún bot terminó normalmente: seguir supervisando al resto
+        pending = [task for task in supervisors if not task.done()]
+        if pending:
+            await asyncio.wait([waiter, *pending], return_when=asyncio.FIRST_COMPLETED)
+
+    if stop_event.is_set():
+        print("\n\n" + "="*60)
+        print("⛔ Deteniendo todos los bots...")
+        print("="*60 + "\n")
+
+    stop_event.set()
+    if hosted:
+        await stop_hosted(bots)
+    else:
+        await asyncio.gather(*(stop_process(bot) for bot in bots))
+    await asyncio.gather(*supervisors, return_exceptions=True)
+    waiter.cancel()
+    await relay_task
+    if hosted:
+        sys.stdout, sys.stderr = previous_streams
+    await metrics_task
+    await hub.close()
+    transport.close()
+
+    print("✅ Bots detenidos correctamente")
+    print("👋 ¡Hasta pronto!\n")
+
+
+# ------------------------------
+# MODO DE PROCESO ÚNICO
+# ------------------------------
+
+# Bot al que pertenece la tarea actual; las tareas hijas heredan el contexto de la que las crea
+HOSTED_BOT = contextvars.ContextVar("hosted_bot", default=None)
+
+
+class HostedOutput:
+    """sys.stdout/sys.stderr del modo de proceso único: cada línea de un bot pasa por el LogRelay con su prefijo"""
+
+    def __init__(self, relay: LogRelay, stream):
+        self.relay = relay
+        self.stream = stream
+        self.partial = {}
+
+    def write(self, text: str) -> int:
+        name = HOSTED_BOT.get()
+        if name is None:
+            return self.stream.write(text)
+        *lines, rest = (self.partial.pop(name, "") + text).split("\n")
+        for line in lines:
+            self.relay.push(name, line + "\n")
+        if rest:
+            self.partial[name] = rest
+        return len(text)
+
+    def flush(self):
+        if HOSTED_BOT.get() is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class HostedBot(BotProcess):
+    """Bot alojado como conexión dentro del proceso del launcher"""
+
+    def __init__(self, name: str, bot_path: str, room_id: str, api_token: str):
+        super().__init__(name, bot_path, room_id, api_token)
+        self.report_name = HOSTED_REPORT_NAME
+        self.module = None
+        self.bot_class = None
+        self.instance = None
+        self.task = None
+
+    def alive(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def import_class(self):
+        """Importa el módulo del bot (antes de instalar las señales del launcher: main.py instala las suyas al importarse)"""
+        module_name, class_name = self.bot_path.split(":")
+        self.module = importlib.import_module(module_name)
+        self.bot_class = getattr(self.module, class_name)
+
+    def save_data(self):
+        """Lo que el bot guardaría al recibir SIGTERM como proceso propio"""
+        save = getattr(self.module, "save_all_data", None)
+        if save is not None:
+            save()
+
+
+async def supervise_hosted(bot: HostedBot, stop_event: asyncio.Event):
+    """Ejecuta la conexión del bot en este event loop y la reinicia con backoff si se cae"""
+    from highrise.__main__ import bot_runner
+
+    HOSTED_BOT.set(bot.name)
+    print(f"🤖 Iniciando {bot.name} (proceso único)")
+    # Una sola instancia durante toda la vida del launcher, como en las reconexiones del SDK:
+    # sus tareas en segundo plano están en task_registry y no se duplican al reiniciar
+    bot.instance = bot.instance or bot.bot_class()
+    bot.instance.hosted = True
+
+    while not stop_event.is_set():
+        stopper = asyncio.create_task(stop_event.wait())
+        try:
+            bot.task = asyncio.create_task(bot_runner(bot.instance, bot.room_id, bot.api_token), name=bot.name)
+            bot.started_at = time.monotonic()
+            await asyncio.wait([bot.task, stopper], return_when=asyncio.FIRST_COMPLETED)
+            if stop_event.is_set():
                 break
-                
-        except KeyboardInterrupt:
-            print(f"\n⚠️ Deteniendo {bot_name}...")
-            if process:
-                process.kill()
+            bot.task.result()
+            print(f"\n✅ {bot.name} terminó normalmente")
             break
         except Exception as e:
-            print(f"\n❌ Error en {bot_name}: {e}")
-            print(f"🔄 Reiniciando {bot_name} en 5 segundos...")
-            time.sleep(5)
+            print(f"\n❌ Error en {bot.name}: {type(e).__name__}: {e}")
+        finally:
+            stopper.cancel()
+
+        await wait_before_restart(bot, stop_event)
+
+
+async def stop_hosted(bots):
+    """Cierra las conexiones, detiene las tareas de los bots y guarda sus datos"""
+    import task_registry
+
+    tasks = [bot.task for bot in bots if bot.alive()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    task_registry.cancel_everything()
+    await asyncio.sleep(0)
+    for bot in bots:
+        print(f"💾 Guardando datos de {bot.name}...")
+        try:
+            bot.save_data()
+        except Exception as e:
+            print(f"❌ Error guardando datos de {bot.name}: {e}")
+
+
+# ------------------------------
+# MODO MULTISALA
+# ------------------------------
+
+class WorkerProcess(BotProcess):
+    """Proceso hijo de rooms.py que aloja un reparto de salas"""
+
+    def __init__(self, rooms_file: str, index: int, count: int):
+        super().__init__(f"Salas {index + 1}/{count}", "main:Bot", "", "")
+        self.rooms_file = rooms_file
+        self.index = index
+        self.count = count
+
+    def command(self):
+        return [sys.executable, "rooms.py", self.rooms_file, str(self.index), str(self.count)]
+
+
+def rooms_file_argument(argv) -> str | None:
+    """Archivo de salas pedido con --rooms [archivo] o BOTS_ROOMS_FILE, o None"""
+    if ROOMS_FLAG in argv:
+        position = argv.index(ROOMS_FLAG) + 1
+        if position < len(argv) and not argv[position].startswith("--"):
+            return argv[position]
+        import rooms
+        return rooms.DEFAULT_ROOMS_FILE
+    return os.getenv(ROOMS_ENV) or None
+
+
+def main_rooms(rooms_file: str):
+    """Lanza un proceso por reparto de salas y los supervisa como a los bots"""
+    import rooms
+
+    try:
+        spec, room_list = rooms.load_rooms(rooms_file)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error cargando {rooms_file}: {e}")
+        return
+    if not room_list:
+        print(f"❌ Error: {rooms_file} no define ninguna sala")
+        return
+
+    count = rooms.worker_count(spec, room_list)
+    print(f"🏠 {len(room_list)} salas en {count} procesos\n")
+    for index, shard in enumerate(rooms.shard(room_list, count)):
+        print(f"   {index + 1}. {', '.join(room.name for room in shard)}")
+    print()
+
+    workers = [WorkerProcess(rooms_file, index, count) for index in range(count)]
+    try:
+        asyncio.run(run_supervisor(workers))
+    except KeyboardInterrupt:
+        print("\n✅ Bots detenidos")
 
 
 # ------------------------------
@@ -97,78 +625,74 @@ def main():
     print("\n" + "="*60)
     print("🕷️  NOCTURNO BOTS LAUNCHER 🕷️")
     print("="*60 + "\n")
-    
+
+    rooms_file = rooms_file_argument(sys.argv[1:])
+    if rooms_file:
+        main_rooms(rooms_file)
+        return
+
     config_main = load_config("config.json")
     config_cantinero = load_config("cantinero_config.json")
-    
+
     if not config_main:
         print("❌ Error: No se pudo cargar config.json")
         print("📝 Debe contener api_token y room_id")
         return
-    
+
     if not config_cantinero:
         print("❌ Error: No se pudo cargar cantinero_config.json")
         print("📝 Debe contener api_token y (opcional) room_id")
         return
-    
+
     api_token_main = config_main.get("api_token")
     room_id_main = config_main.get("room_id")
-    
+
     api_token_cantinero = config_cantinero.get("api_token")
     room_id_cantinero = config_cantinero.get("room_id", room_id_main)
-    
+
     if not api_token_main or not room_id_main:
         print("❌ Error: config.json debe contener 'api_token' y 'room_id'")
         return
-    
+
     if not api_token_cantinero:
         print("❌ Error: cantinero_config.json debe contener 'api_token'")
         return
-    
+
     print("✅ Configuración cargada correctamente\n")
     print("📋 Bots a ejecutar:")
     print(f"   1. Bot Principal (main.py)")
     print(f"   2. Bot Cantinero (cantinero_bot.py)")
     print(f"\n🔗 Sala: {room_id_main}\n")
-    
+
+    # Proceso único: un intérprete, un SDK y un catálogo de emotes para los dos bots
+    hosted = SINGLE_PROCESS_FLAG in sys.argv[1:] or os.getenv(SINGLE_PROCESS_ENV, "") == "1"
+    if hosted:
+        print("🧩 Modo de proceso único: ambos bots comparten este proceso\n")
+
     # Detectar Replit (no pedir Enter)
     is_replit = os.getenv('REPL_ID') is not None or os.getenv('REPLIT_DB_URL') is not None
-    
+
     if not is_replit:
         input("Presiona ENTER para iniciar los bots...")
     else:
         print("🚀 Iniciando bots automáticamente...")
-    
-    # Hilos para los bots
-    thread1 = threading.Thread(
-        target=run_bot,
-        args=("Bot Principal", "main:Bot", room_id_main, api_token_main),
-        daemon=True
-    )
-    
-    thread2 = threading.Thread(
-        target=run_bot,
-        args=("Bot Cantinero", "cantinero_bot:BartenderBot", room_id_cantinero, api_token_cantinero),
-        daemon=True
-    )
-    
-    thread1.start()
-    thread2.start()
-    
-    print("\n" + "="*60)
-    print("🚀 Ambos bots están corriendo")
-    print("⚠️  Presiona Ctrl+C para detener todos los bots (si estás en PC)")
-    print("="*60 + "\n")
-    
+
+    bot_type = HostedBot if hosted else BotProcess
+    bots = [
+        bot_type("Bot Principal", "main:Bot", room_id_main, api_token_main),
+        bot_type("Bot Cantinero", "cantinero_bot:BartenderBot", room_id_cantinero, api_token_cantinero),
+    ]
+    if hosted:
+        started = time.perf_counter()
+        for bot in bots:
+            bot.import_class()
+        print(f"📦 Bots cargados en {time.perf_counter() - started:.2f}s\n")
+
     try:
-        while True:
-            time.sleep(1)
+        asyncio.run(run_supervisor(bots, hosted=hosted))
     except KeyboardInterrupt:
-        print("\n\n" + "="*60)
-        print("⛔ Deteniendo todos los bots...")
-        print("="*60 + "\n")
-        print("✅ Bots detenidos correctamente")
-        print("👋 ¡Hasta pronto!\n")
+        # Ctrl+C antes de que el supervisor instale sus manejadores
+        print("\n✅ Bots detenidos")
 
 
 # ------------------------------
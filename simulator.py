@@ -0,0 +1,557 @@
+"""Simulador de sala offline: cliente Highrise falso y generador de carga para Bot y BartenderBot
+
+Uso:
+    python simulator.py --duration 30 --users 80 --chat-rate 8 --latency-ms 40 --rate-limit 25
+
+Los bots se ejecutan en un directorio temporal con una configuración mínima, así que
+los datos reales de data/ no se tocan. El resultado se imprime en JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+
+from highrise import ResponseError
+from highrise.models import (
+    CurrencyItem, Error, GetInventoryRequest, GetRoomUsersRequest,
+    GetUserOutfitRequest, GetWalletRequest, Item, Position, RoomInfo, SessionMetadata, User,
+)
+
+import dispatcher
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SIM_OWNER_ID = "sim_owner"
+SIM_ADMIN_ID = "sim_admin"
+MAIN_BOT_ID = "sim_bot_main"
+CANTINERO_BOT_ID = "sim_bot_cantinero"
+
+# Mezcla de mensajes de chat (peso relativo)
+CHAT_MIX = [
+    ("hola a todos", 30),
+    ("jajaja", 15),
+    ("!info", 5),
+    ("!stats", 3),
+    ("!online", 3),
+    ("!leaderboard heart", 3),
+    ("!heart @{target}", 6),
+    ("!emote list", 1),
+    ("!help", 2),
+    ("{emote_number}", 10),
+    ("{emote_name}", 8),
+    ("!stop", 4),
+    ("!trago", 3),
+    ("@cantinero hola", 1),
+    ("@bot ayuda", 1),
+]
+
+
+# ============================================================================
+# CLIENTE HIGHRISE FALSO
+# ============================================================================
+
+class SimOptions:
+    """Parámetros de la simulación"""
+
+    def __init__(self, **overrides):
+        self.duration = 30.0
+        self.users = 50
+        self.join_rate = 1.0          # entradas por segundo
+        self.leave_rate = 0.5         # salidas por segundo
+        self.chat_rate = 5.0          # mensajes por segundo
+        self.whisper_rate = 0.5       # susurros por segundo
+        self.tip_rate = 0.05          # propinas por segundo
+        self.move_burst_interval = 5.0
+        self.move_burst_size = 20
+        self.latency_ms = 30.0        # latencia media de la API
+        self.jitter_ms = 20.0
+        self.rate_limit = 20.0        # peticiones por segundo por bot (0 = sin límite)
+        self.rate_burst = 20
+        self.error_rate = 0.0         # probabilidad de error aleatorio
+        self.bots = ("main", "cantinero")
+        self.seed = 1
+        for key, value in overrides.items():
+            setattr(self, key, value)
+
+
+class FakeRoom:
+    """Estado compartido de la sala simulada"""
+
+    def __init__(self):
+        self.users = {}               # user_id -> (User, Position)
+        self.outfits = {}
+        self.wallets = Counter()
+        self.chat_messages = 0
+        self.whispers = 0
+        self.emotes = 0
+        self.tips_sent = 0
+
+    def add_user(self, user: User, position: Position):
+        self.users[user.id] = (user, position)
+
+    def remove_user(self, user_id: str):
+        self.users.pop(user_id, None)
+
+    def move_user(self, user_id: str, position):
+        if user_id in self.users:
+            self.users[user_id] = (self.users[user_id][0], position)
+
+
+class FakeHighrise:
+    """Sustituto de highrise.Highrise con latencia y rate limit configurables"""
+
+    def __init__(self, room: FakeRoom, my_id: str, options: SimOptions, rng: random.Random):
+        self.room = room
+        self.my_id = my_id
+        self.options = options
+        self.rng = rng
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.errors = Counter()
+        self._tokens = float(options.rate_burst)
+        self._last_refill = time.monotonic()
+
+    def _take_token(self) -> bool:
+        if not self.options.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.options.rate_burst, self._tokens + (now - self._last_refill) * self.options.rate_limit)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _call(self, method: str):
+        """Aplica latencia y devuelve un mensaje de error o None"""
+        self.calls[method] += 1
+        allowed = self._take_token()
+        if self.options.latency_ms or self.options.jitter_ms:
+            latency = max(0.0, self.rng.gauss(self.options.latency_ms, self.options.jitter_ms)) / 1000
+            await asyncio.sleep(latency)
+        if not allowed:
+            self.rate_limited[method] += 1
+            return "Rate limited"
+        if self.options.error_rate and self.rng.random() < self.options.error_rate:
+            self.errors[method] += 1
+            return "Simulated error"
+        return None
+
+    async def _no_response(self, method: str):
+        error = await self._call(method)
+        if error:
+            raise ResponseError(error)
+
+    # Métodos sin respuesta (lanzan ResponseError como el SDK)
+    async def chat(self, message: str) -> None:
+        await self._no_response("chat")
+        self.room.chat_messages += 1
+
+    async def send_whisper(self, user_id: str, message: str) -> None:
+        await self._no_response("send_whisper")
+        self.room.whispers += 1
+
+    async def send_emote(self, emote_id: str, target_user_id: str | None = None) -> None:
+        await self._no_response("send_emote")
+        self.room.emotes += 1
+
+    async def react(self, reaction, target_user_id: str) -> None:
+        await self._no_response("react")
+
+    async def teleport(self, user_id: str, dest: Position) -> None:
+        await self._no_response("teleport")
+        self.room.move_user(user_id, dest)
+
+    async def walk_to(self, destination) -> None:
+        await self._no_response("walk_to")
+        self.room.move_user(self.my_id, destination)
+
+    async def moderate_room(self, user_id: str, action: str, action_length: int | None = None) -> None:
+        await self._no_response("moderate_room")
+        if action in ("kick", "ban"):
+            self.room.remove_user(user_id)
+
+    # Métodos con respuesta (devuelven Error como el SDK)
+    async def get_room_users(self):
+        error = await self._call("get_room_users")
+        if error:
+            return Error(error)
+        return GetRoomUsersRequest.GetRoomUsersResponse(content=list(self.room.users.values()), rid="sim")
+
+    async def tip_user(self, user_id: str, tip: str):
+        error = await self._call("tip_user")
+        if error:
+            return Error(error)
+        amount = int(tip.replace("gold_bar_", "").replace("k", "000"))
+        if self.room.wallets[self.my_id] < amount:
+            return "insufficient_funds"
+        self.room.wallets[self.my_id] -= amount
+        self.room.wallets[user_id] += amount
+        self.room.tips_sent += 1
+        return "success"
+
+    async def get_wallet(self):
+        error = await self._call("get_wallet")
+        if error:
+            return Error(error)
+        return GetWalletRequest.GetWalletResponse(
+            content=[CurrencyItem(type="gold", amount=self.room.wallets[self.my_id])], rid="sim"
+        )
+
+    async def get_user_outfit(self, user_id: str):
+        error = await self._call("get_user_outfit")
+        if error:
+            return Error(error)
+        return GetUserOutfitRequest.GetUserOutfitResponse(outfit=list(self.room.outfits.get(user_id, [])), rid="sim")
+
+    async def get_my_outfit(self):
+        return await self.get_user_outfit(self.my_id)
+
+    async def set_outfit(self, outfit: list[Item]):
+        error = await self._call("set_outfit")
+        if error:
+            return Error(error)
+        self.room.outfits[self.my_id] = list(outfit)
+        return None
+
+    async def get_inventory(self):
+        error = await self._call("get_inventory")
+        if error:
+            return Error(error)
+        return GetInventoryRequest.GetInventoryResponse(items=list(self.room.outfits.get(self.my_id, [])))
+
+
+class FakeWebAPI:
+    """WebAPI sin red: los bots usan sus datos locales"""
+
+    async def get_user(self, user_id: str):
+        return None
+
+
+# ============================================================================
+# GENERADOR DE CARGA
+# ============================================================================
+
+class LatencyRecorder:
+    """Latencias de los eventos entregados a los bots"""
+
+    def __init__(self):
+        self.samples = {}
+        self.failures = Counter()
+        self.completed = 0
+
+    async def dispatch(self, kind: str, coro):
+        start = time.perf_counter()
+        queued = []
+        try:
+            with dispatcher.track_completion(queued):
+                await coro
+            # Los manejadores encolados vuelven enseguida: se mide hasta que termina su trabajo
+            if queued and not all(await asyncio.gather(*queued)):
+                self.failures[kind] += 1
+        except Exception:
+            self.failures[kind] += 1
+        finally:
+            self.samples.setdefault(kind, deque(maxlen=20000)).append(time.perf_counter() - start)
+            self.completed += 1
+
+    def summary(self) -> dict:
+        result = {}
+        for kind, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1)))] * 1000
+            result[kind] = {
+                "count": len(ordered),
+                "failures": self.failures[kind],
+                "p50_ms": round(pick(0.50), 2),
+                "p95_ms": round(pick(0.95), 2),
+                "p99_ms": round(pick(0.99), 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        return result
+
+
+class CrowdDriver:
+    """Reproduce una multitud sintética contra los bots"""
+
+    def __init__(self, bots: list, room: FakeRoom, options: SimOptions, rng: random.Random):
+        self.bots = bots
+        self.room = room
+        self.options = options
+        self.rng = rng
+        self.recorder = LatencyRecorder()
+        self.pending = set()
+        self.next_user = 0
+        self.offline = []
+        self.emote_names = []
+        self.events = Counter()
+
+    def _spawn(self, kind: str, coro):
+        task = asyncio.create_task(self.recorder.dispatch(kind, coro))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    def _broadcast(self, kind: str, method: str, *args):
+        self.events[kind] += 1
+        for bot in self.bots:
+            self._spawn(kind, getattr(bot, method)(*args))
+
+    def _random_position(self) -> Position:
+        return Position(round(self.rng.uniform(0, 20), 1), round(self.rng.uniform(0, 12), 1), round(self.rng.uniform(0, 20), 1))
+
+    def _crowd(self):
+        return [user for user_id, (user, _) in self.room.users.items() if not user_id.startswith("sim_bot")]
+
+    def join(self):
+        if self.offline and self.rng.random() < 0.5:
+            user = self.offline.pop(self.rng.randrange(len(self.offline)))
+        else:
+            self.next_user += 1
+            user = User(id=f"sim_user_{self.next_user:05d}", username=f"sim_{self.next_user:05d}")
+        position = self._random_position()
+        self.room.add_user(user, position)
+        self._broadcast("join", "on_user_join", user, position)
+
+    def leave(self):
+        crowd = self._crowd()
+        if not crowd:
+            return
+        user = self.rng.choice(crowd)
+        self.room.remove_user(user.id)
+        self.offline.append(user)
+        self._broadcast("leave", "on_user_leave", user)
+
+    def _message(self, crowd) -> str:
+        template = self.rng.choices([m for m, _ in CHAT_MIX], weights=[w for _, w in CHAT_MIX])[0]
+        return template.format(
+            target=self.rng.choice(crowd).username,
+            emote_number=self.rng.randint(1, 224),
+            emote_name=self.rng.choice(self.emote_names) if self.emote_names else "dance",
+        )
+
+    def chat(self):
+        crowd = self._crowd()
+        if not crowd:
+            return
+        user = self.rng.choice(crowd)
+        self._broadcast("chat", "on_chat", user, self._message(crowd))
+
+    def whisper(self):
+        crowd = self._crowd()
+        if not crowd:
+            return
+        user = self.rng.choice(crowd)
+        self.events["whisper"] += 1
+        self._spawn("whisper", self.bots[0].on_whisper(user, self._message(crowd)))
+
+    def tip(self):
+        crowd = self._crowd()
+        if not crowd:
+            return
+        sender = self.rng.choice(crowd)
+        receiver = User(id=MAIN_BOT_ID, username="NOCTURNO_BOT")
+        amount = self.rng.choice([1, 5, 10, 100])
+        self.room.wallets[MAIN_BOT_ID] += amount
+        self._broadcast("tip", "on_tip", sender, receiver, CurrencyItem(type="gold", amount=amount))
+
+    def move_burst(self):
+        crowd = self._crowd()
+        for user in self.rng.sample(crowd, min(len(crowd), self.options.move_burst_size)):
+            position = self._random_position()
+            self.room.move_user(user.id, position)
+            self._broadcast("move", "on_user_move", user, position)
+
+    async def _poisson(self, rate: float, action, deadline: float):
+        if rate <= 0:
+            return
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.rng.expovariate(rate))
+            action()
+
+    async def _bursts(self, deadline: float):
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.options.move_burst_interval)
+            self.move_burst()
+
+    async def run(self):
+        options = self.options
+        for _ in range(options.users):
+            self.join()
+        deadline = time.monotonic() + options.duration
+        await asyncio.gather(
+            self._poisson(options.join_rate, self.join, deadline),
+            self._poisson(options.leave_rate, self.leave, deadline),
+            self._poisson(options.chat_rate, self.chat, deadline),
+            self._poisson(options.whisper_rate, self.whisper, deadline),
+            self._poisson(options.tip_rate, self.tip, deadline),
+            self._bursts(deadline),
+        )
+        if self.pending:
+            await asyncio.wait(list(self.pending), timeout=30)
+        # Con el despachador los manejadores vuelven al encolar: esperar a que se vacíen las colas
+        for bot in self.bots:
+            if getattr(bot, "dispatcher", None) is not None:
+                await bot.dispatcher.drain(timeout=30)
+            if getattr(bot, "outbox", None) is not None:
+                await bot.outbox.drain()
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def prepare_workdir() -> str:
+    """Crea un directorio temporal con configuración mínima para los bots"""
+    workdir = tempfile.mkdtemp(prefix="highrise_sim_")
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    config = {
+        "api_token": "sim", "room_id": "sim_room",
+        "owner_id": SIM_OWNER_ID, "admin_ids": [SIM_ADMIN_ID], "moderator_ids": [],
+        "vip_zone": {"x": 1, "y": 0, "z": 1}, "dj_zone": {"x": 2, "y": 0, "z": 2},
+        "directivo_zone": {"x": 3, "y": 0, "z": 3},
+        "forbidden_zones": [{"x": 10, "y": 0, "z": 10, "radius": 2}],
+        "bot_wallet": 0,
+    }
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    with open(os.path.join(workdir, "cantinero_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"api_token": "sim", "punto_inicio": {"x": 5, "y": 0, "z": 5}}, f)
+    return workdir
+
+
+def load_bot_classes():
+    """Importa los bots desde el directorio actual (ya dentro del workdir)"""
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    import main
+    import cantinero_bot
+    return main, cantinero_bot
+
+
+async def simulate(options: SimOptions) -> dict:
+    """Ejecuta la simulación y devuelve el informe"""
+    rng = random.Random(options.seed)
+    main, cantinero_bot = load_bot_classes()
+    import instrumentation
+
+    room = FakeRoom()
+    bots = []
+    clients = []
+    definitions = [
+        ("main", main.Bot, MAIN_BOT_ID, "NOCTURNO_BOT"),
+        ("cantinero", cantinero_bot.BartenderBot, CANTINERO_BOT_ID, "CANTINERO_BOT"),
+    ]
+    for name, bot_class, bot_id, bot_username in definitions:
+        if name not in options.bots:
+            continue
+        bot = bot_class()
+        client = FakeHighrise(room, bot_id, options, random.Random(rng.random()))
+        bot.highrise = client
+        bot.webapi = FakeWebAPI()
+        room.add_user(User(id=bot_id, username=bot_username), Position(0, 0, 0))
+        bots.append(bot)
+        clients.append(client)
+
+    started = time.perf_counter()
+    metadata = SessionMetadata(
+        user_id="", room_info=RoomInfo(owner_id=SIM_OWNER_ID, room_name="Simulación"),
+        rate_limits={}, connection_id="sim",
+    )
+    for bot, client in zip(bots, clients):
+        metadata.user_id = client.my_id
+        await bot.on_start(metadata)
+    startup = time.perf_counter() - started
+
+    driver = CrowdDriver(bots, room, options, rng)
+    driver.emote_names = [data["name"] for data in main.emotes.values()]
+    run_started = time.perf_counter()
+    await driver.run()
+    elapsed = time.perf_counter() - run_started
+
+    calls = Counter()
+    limited = Counter()
+    errors = Counter()
+    for client in clients:
+        calls.update(client.calls)
+        limited.update(client.rate_limited)
+        errors.update(client.errors)
+
+    # Cancelar bucles de fondo de los bots
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            task.cancel()
+
+    return {
+        "options": {k: v for k, v in vars(options).items() if not k.startswith("_")},
+        "startup_seconds": round(startup, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "events": dict(driver.events),
+        "handled": driver.recorder.completed,
+        "throughput_per_second": round(driver.recorder.completed / elapsed, 2) if elapsed else 0,
+        "latency": driver.recorder.summary(),
+        "api_calls": dict(calls),
+        "api_rate_limited": dict(limited),
+        "api_errors": dict(errors),
+        "room": {
+            "users": len(room.users), "chat_messages": room.chat_messages,
+            "whispers": room.whispers, "emotes": room.emotes, "tips_sent": room.tips_sent,
+        },
+        "commands": instrumentation.stats(),
+    }
+
+
+def run_simulation(options: SimOptions, keep_workdir: bool = False) -> dict:
+    """Ejecuta la simulación en un directorio temporal y restaura el cwd"""
+    workdir = prepare_workdir()
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        report = asyncio.run(simulate(options))
+        report["workdir"] = workdir if keep_workdir else None
+        return report
+    finally:
+        os.chdir(previous)
+        if not keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def parse_args(argv=None) -> tuple:
+    defaults = SimOptions()
+    parser = argparse.ArgumentParser(description="Simulador de carga offline para los bots")
+    for name, value in vars(defaults).items():
+        if name == "bots":
+            parser.add_argument("--bots", default=",".join(value), help="main,cantinero")
+        else:
+            parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("--output", help="Guardar el informe JSON en este archivo")
+    parser.add_argument("--keep-workdir", action="store_true", help="No borrar el directorio temporal")
+    parser.add_argument("--quiet", action="store_true", help="Silenciar la salida de los bots")
+    args = parser.parse_args(argv)
+    overrides = {name: getattr(args, name) for name in vars(defaults)}
+    overrides["bots"] = tuple(b.strip() for b in args.bots.split(",") if b.strip())
+    return SimOptions(**overrides), args
+
+
+if __name__ == "__main__":
+    options, args = parse_args()
+    stdout = sys.stdout
+    if args.quiet:
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    try:
+        report = run_simulation(options, keep_workdir=args.keep_workdir)
+    finally:
+        if args.quiet:
+            sys.stdout.close()
+            sys.stdout = stdout
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
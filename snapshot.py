@@ -0,0 +1,452 @@
+"""Snapshot binario del estado persistente del bot (arranque rápido)
+
+Formato (versión 1), todo en little-endian:
+
+    cabecera   magic "NOCTSNAP" | versión u16 | nº secciones u16 | crc32 del cuerpo u32
+    sección    etiqueta 4 bytes | longitud u64 | datos
+
+Los textos se guardan una sola vez en la tabla de cadenas (sección STRS) y el resto de
+secciones los referencian por índice. Los datos numéricos van en columnas `array`, de modo
+que la carga es una lectura del archivo más unas pocas conversiones en bloque.
+Las secciones desconocidas se ignoran al leer, para poder ampliar el formato.
+"""
+
+import gc
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+
+MAGIC = b"NOCTSNAP"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHHI")
+_SECTION = struct.Struct("<4sQ")
+_U32 = struct.Struct("<I")
+_COLUMN = struct.Struct("<IBB")
+
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Tipos de valor en columnas de tabla
+K_ABSENT, K_NONE, K_INT, K_FLOAT, K_STR, K_BOOL, K_DATETIME, K_DATETIME_TZ, K_JSON = range(9)
+
+# Bits de la columna: qué arrays de datos están presentes
+_HAS_INTS, _HAS_FLOATS, _HAS_OFFSETS, _HAS_TEXT = 1, 2, 4, 8
+_MIXED = 255
+
+
+class _Absent:
+    """Marca de clave ausente en una fila de tabla"""
+
+
+_ABSENT = _Absent()
+
+
+class SnapshotError(Exception):
+    """Snapshot inexistente, corrupto o de versión no soportada"""
+
+
+# ============================================================================
+# UTILIDADES
+# ============================================================================
+
+def _pack_array(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack_array(typecode: str, data: memoryview, offset: int, count: int):
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    values.frombytes(data[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+class _Strings:
+    """Tabla de cadenas con índices estables"""
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def ref(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+    def pack(self) -> bytes:
+        blob = "\x00".join(self.values).encode("utf-8")
+        return _U32.pack(len(self.values)) + blob
+
+
+def _encode_datetime(value: datetime):
+    if value.tzinfo is None:
+        return K_DATETIME, (value - _NAIVE_EPOCH) // _MICROSECOND, 0
+    offset = value.utcoffset() or timedelta(0)
+    return K_DATETIME_TZ, (value - _UTC_EPOCH) // _MICROSECOND, int(offset.total_seconds())
+
+
+# ============================================================================
+# TABLAS COLUMNARES (dict de dicts)
+# ============================================================================
+
+def _encode_table(rows: dict, strings: _Strings) -> bytes:
+    ids = array("I", (strings.ref(row_id) for row_id in rows))
+    records = list(rows.values())
+    keys = []
+    seen = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+
+    parts = [_U32.pack(len(ids)), _pack_array(ids), struct.pack("<H", len(keys))]
+    for key in keys:
+        kinds = array("B")
+        ints = array("q")
+        floats = array("d")
+        offsets = array("i")
+        for record in records:
+            value = record.get(key, _ABSENT)
+            i_val, f_val, o_val = 0, 0.0, 0
+            if value is _ABSENT:
+                kind = K_ABSENT
+            elif value is None:
+                kind = K_NONE
+            elif isinstance(value, bool):
+                kind, i_val = K_BOOL, int(value)
+            elif isinstance(value, int) and -(1 << 63) <= value < (1 << 63):
+                kind, i_val = K_INT, value
+            elif isinstance(value, float):
+                kind, f_val = K_FLOAT, value
+            elif isinstance(value, str):
+                kind, i_val = K_STR, strings.ref(value)
+            elif isinstance(value, datetime):
+                kind, i_val, o_val = _encode_datetime(value)
+            else:
+                kind, i_val = K_JSON, strings.ref(json.dumps(value, ensure_ascii=False, default=str))
+            kinds.append(kind)
+            ints.append(i_val)
+            floats.append(f_val)
+            offsets.append(o_val)
+
+        present = set(kinds)
+        uniform = kinds[0] if len(present) == 1 else _MIXED
+        if uniform in (K_DATETIME, K_DATETIME_TZ):
+            # Columna de fechas homogénea: texto ISO (datetime.fromisoformat es la conversión más rápida)
+            text = "\x00".join(record[key].isoformat() for record in records).encode("ascii")
+            parts.append(_COLUMN.pack(strings.ref(key), uniform, _HAS_TEXT))
+            parts.append(_U32.pack(len(text)) + text)
+            continue
+
+        flags = 0
+        if present & {K_INT, K_STR, K_BOOL, K_DATETIME, K_DATETIME_TZ, K_JSON}:
+            flags |= _HAS_INTS
+        if K_FLOAT in present:
+            flags |= _HAS_FLOATS
+        if K_DATETIME_TZ in present:
+            flags |= _HAS_OFFSETS
+
+        parts.append(_COLUMN.pack(strings.ref(key), uniform, flags))
+        if uniform == _MIXED:
+            parts.append(kinds.tobytes())
+        if flags & _HAS_INTS:
+            parts.append(_pack_array(ints))
+        if flags & _HAS_FLOATS:
+            parts.append(_pack_array(floats))
+        if flags & _HAS_OFFSETS:
+            parts.append(_pack_array(offsets))
+    return b"".join(parts)
+
+
+def _decode_value(kind, i_val, f_val, o_val, strings):
+    if kind == K_INT:
+        return i_val
+    if kind == K_STR:
+        return strings[i_val]
+    if kind == K_DATETIME:
+        return _NAIVE_EPOCH + timedelta(microseconds=i_val)
+    if kind == K_FLOAT:
+        return f_val
+    if kind == K_NONE:
+        return None
+    if kind == K_BOOL:
+        return bool(i_val)
+    if kind == K_DATETIME_TZ:
+        return (_UTC_EPOCH + timedelta(microseconds=i_val)).astimezone(timezone(timedelta(seconds=o_val)))
+    if kind == K_JSON:
+        return json.loads(strings[i_val])
+    return _ABSENT
+
+
+def _decode_column(uniform, kinds, ints, floats, offsets, strings, count):
+    # Rutas rápidas: todos los valores de la columna tienen el mismo tipo
+    if uniform == K_INT:
+        return ints.tolist()
+    if uniform == K_STR:
+        return list(map(strings.__getitem__, ints))
+    if uniform == K_FLOAT:
+        return floats.tolist()
+    if uniform == K_NONE:
+        return [None] * count
+    if uniform == K_ABSENT:
+        return [_ABSENT] * count
+    zeros = [0] * count
+    return [
+        _decode_value(kind, i_val, f_val, o_val, strings)
+        for kind, i_val, f_val, o_val in zip(
+            kinds if uniform == _MIXED else [uniform] * count,
+            ints if ints is not None else zeros,
+            floats if floats is not None else zeros,
+            offsets if offsets is not None else zeros,
+        )
+    ]
+
+
+def _decode_table(data: memoryview, strings: list) -> dict:
+    count = _U32.unpack_from(data, 0)[0]
+    ids, offset = _unpack_array("I", data, 4, count)
+    (ncols,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+
+    keys = []
+    columns = []
+    has_absent = False
+    for _ in range(ncols):
+        key_idx, uniform, flags = _COLUMN.unpack_from(data, offset)
+        offset += _COLUMN.size
+        kinds = ints = floats = offsets = None
+        if uniform == _MIXED:
+            kinds = bytes(data[offset:offset + count])
+            offset += count
+            has_absent = has_absent or K_ABSENT in kinds
+        elif uniform == K_ABSENT:
+            has_absent = True
+        if flags & _HAS_INTS:
+            ints, offset = _unpack_array("q", data, offset, count)
+        if flags & _HAS_FLOATS:
+            floats, offset = _unpack_array("d", data, offset, count)
+        if flags & _HAS_OFFSETS:
+            offsets, offset = _unpack_array("i", data, offset, count)
+        if flags & _HAS_TEXT:
+            length = _U32.unpack_from(data, offset)[0]
+            text = bytes(data[offset + 4:offset + 4 + length]).decode("ascii")
+            offset += 4 + length
+            keys.append(strings[key_idx])
+            columns.append(list(map(datetime.fromisoformat, text.split("\x00"))) if count else [])
+            continue
+        keys.append(strings[key_idx])
+        columns.append(_decode_column(uniform, kinds, ints, floats, offsets, strings, count))
+
+    row_ids = list(map(strings.__getitem__, ids))
+    if not keys:
+        return {row_id: {} for row_id in row_ids}
+    rows = [dict(zip(keys, values)) for values in zip(*columns)]
+    if has_absent:
+        for row in rows:
+            for key in [k for k, v in row.items() if v is _ABSENT]:
+                del row[key]
+    return dict(zip(row_ids, rows))
+
+
+# ============================================================================
+# ESCRITURA
+# ============================================================================
+
+def write_snapshot(path: str, state: dict) -> int:
+    """Escribe el estado de forma atómica y devuelve el tamaño en bytes.
+
+    state: vip_users, teleport_points, user_names, user_hearts, user_activity,
+    user_info y saved_outfits (mismas estructuras que los globales de main.py).
+    """
+    strings = _Strings()
+    sections = []
+
+    vips = array("I", (strings.ref(name) for name in sorted(state.get("vip_users", ()))))
+    sections.append((b"VIPS", _U32.pack(len(vips)) + _pack_array(vips)))
+
+    points = state.get("teleport_points", {})
+    names = array("I", (strings.ref(name) for name in points))
+    coords = array("d")
+    for point in points.values():
+        coords.extend((float(point["x"]), float(point["y"]), float(point["z"])))
+    sections.append((b"TELE", _U32.pack(len(names)) + _pack_array(names) + _pack_array(coords)))
+
+    user_names = state.get("user_names", {})
+    ids = array("I", (strings.ref(uid) for uid in user_names))
+    values = array("I", (strings.ref(name) for name in user_names.values()))
+    sections.append((b"NAME", _U32.pack(len(ids)) + _pack_array(ids) + _pack_array(values)))
+
+    hearts = state.get("user_hearts", {})
+    ids = array("I", (strings.ref(uid) for uid in hearts))
+    amounts = array("q", hearts.values())
+    sections.append((b"HART", _U32.pack(len(ids)) + _pack_array(ids) + _pack_array(amounts)))
+
+    sections.append((b"ACTV", _encode_table(state.get("user_activity", {}), strings)))
+    sections.append((b"UINF", _encode_table(state.get("user_info", {}), strings)))
+
+    outfits = state.get("saved_outfits", {})
+    nums = array("q", outfits.keys())
+    counts = array("I", (len(items) for items in outfits.values()))
+    types, item_ids, item_amounts = array("I"), array("I"), array("q")
+    for items in outfits.values():
+        for item in items:
+            types.append(strings.ref(item.type))
+            item_ids.append(strings.ref(item.id))
+            item_amounts.append(item.amount)
+    sections.append((b"OUTF", _U32.pack(len(nums)) + _pack_array(nums) + _pack_array(counts)
+                     + _U32.pack(len(types)) + _pack_array(types) + _pack_array(item_ids) + _pack_array(item_amounts)))
+
+    # La tabla de cadenas va primero para poder resolver índices al leer
+    sections.insert(0, (b"STRS", strings.pack()))
+    body = b"".join(_SECTION.pack(tag, len(payload)) + payload for tag, payload in sections)
+    header = _HEADER.pack(MAGIC, VERSION, len(sections), zlib.crc32(body))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(header) + len(body)
+
+
+# ============================================================================
+# LECTURA
+# ============================================================================
+
+def read_snapshot(path: str, item_factory=None) -> dict:
+    """Lee el snapshot completo en una sola lectura y devuelve el estado.
+
+    item_factory(type, id, amount) construye los items de outfits (por defecto tuplas).
+    """
+    # La carga crea cientos de miles de objetos de golpe: sin GC cíclico durante la lectura
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _read_snapshot(path, item_factory)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _read_snapshot(path: str, item_factory) -> dict:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        raise SnapshotError(f"No se pudo leer {path}: {e}")
+
+    if len(raw) < _HEADER.size:
+        raise SnapshotError("Snapshot truncado")
+    magic, version, section_count, crc = _HEADER.unpack_from(raw, 0)
+    if magic != MAGIC:
+        raise SnapshotError("No es un snapshot del bot")
+    if version > VERSION:
+        raise SnapshotError(f"Versión de snapshot no soportada: {version}")
+    body = memoryview(raw)[_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise SnapshotError("Snapshot corrupto (CRC)")
+
+    sections = {}
+    offset = 0
+    for _ in range(section_count):
+        tag, length = _SECTION.unpack_from(body, offset)
+        offset += _SECTION.size
+        sections[tag] = body[offset:offset + length]
+        offset += length
+
+    state = {
+        "vip_users": set(), "teleport_points": {}, "user_names": {}, "user_hearts": {},
+        "user_activity": {}, "user_info": {}, "saved_outfits": {},
+    }
+
+    strings = []
+    if b"STRS" in sections:
+        data = sections[b"STRS"]
+        count = _U32.unpack_from(data, 0)[0]
+        if count:
+            strings = bytes(data[4:]).decode("utf-8").split("\x00")
+
+    if b"VIPS" in sections:
+        data = sections[b"VIPS"]
+        count = _U32.unpack_from(data, 0)[0]
+        refs, _ = _unpack_array("I", data, 4, count)
+        state["vip_users"] = set(map(strings.__getitem__, refs))
+
+    if b"TELE" in sections:
+        data = sections[b"TELE"]
+        count = _U32.unpack_from(data, 0)[0]
+        refs, offset = _unpack_array("I", data, 4, count)
+        coords, _ = _unpack_array("d", data, offset, count * 3)
+        state["teleport_points"] = {
+            strings[ref]: {"x": coords[3 * i], "y": coords[3 * i + 1], "z": coords[3 * i + 2]}
+            for i, ref in enumerate(refs)
+        }
+
+    if b"NAME" in sections:
+        data = sections[b"NAME"]
+        count = _U32.unpack_from(data, 0)[0]
+        ids, offset = _unpack_array("I", data, 4, count)
+        names, _ = _unpack_array("I", data, offset, count)
+        state["user_names"] = dict(zip(map(strings.__getitem__, ids), map(strings.__getitem__, names)))
+
+    if b"HART" in sections:
+        data = sections[b"HART"]
+        count = _U32.unpack_from(data, 0)[0]
+        ids, offset = _unpack_array("I", data, 4, count)
+        amounts, _ = _unpack_array("q", data, offset, count)
+        state["user_hearts"] = dict(zip(map(strings.__getitem__, ids), amounts.tolist()))
+
+    if b"ACTV" in sections:
+        state["user_activity"] = _decode_table(sections[b"ACTV"], strings)
+    if b"UINF" in sections:
+        state["user_info"] = _decode_table(sections[b"UINF"], strings)
+
+    if b"OUTF" in sections:
+        data = sections[b"OUTF"]
+        count = _U32.unpack_from(data, 0)[0]
+        nums, offset = _unpack_array("q", data, 4, count)
+        counts, offset = _unpack_array("I", data, offset, count)
+        total = _U32.unpack_from(data, offset)[0]
+        types, offset = _unpack_array("I", data, offset + 4, total)
+        item_ids, offset = _unpack_array("I", data, offset, total)
+        amounts, _ = _unpack_array("q", data, offset, total)
+        factory = item_factory or (lambda t, i, a: (t, i, a))
+        position = 0
+        for num, size in zip(nums, counts):
+            state["saved_outfits"][num] = [
+                factory(strings[types[j]], strings[item_ids[j]], amounts[j])
+                for j in range(position, position + size)
+            ]
+            position += size
+
+    return state
+
+
+def is_fresh(path: str, sources: list) -> bool:
+    """True si el snapshot existe y no es más antiguo que ninguno de los archivos fuente"""
+    try:
+        snapshot_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return False
+    for source in sources:
+        try:
+            if os.stat(source).st_mtime_ns > snapshot_mtime:
+                return False
+        except OSError:
+            continue
+    return True
@@ -0,0 +1,102 @@
+"""Pipeline de arranque: pasos con dependencias, ejecución concurrente y tiempos por paso"""
+
+import asyncio
+import time
+
+import metrics
+
+
+class BootStep:
+    """Un paso del arranque y su resultado"""
+
+    def __init__(self, name: str, func, after=(), thread: bool = False):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.thread = thread
+        self.done = asyncio.Event()
+        self.started_at = None
+        self.duration = None
+        self.error = None
+
+
+class BootPipeline:
+    """Ejecuta pasos de arranque en paralelo respetando sus dependencias.
+
+    `ready` se activa en cuanto terminan los pasos indicados en ready_after, sin esperar
+    al resto (apariencia, tareas en segundo plano, etc.).
+    """
+
+    def __init__(self, name: str, ready_after=(), ready: asyncio.Event | None = None):
+        self.name = name
+        self.steps = {}
+        self.ready_after = tuple(ready_after)
+        self.ready = ready if ready is not None else asyncio.Event()
+        self.started_at = None
+        self.ready_at = None
+
+    def step(self, name: str, func, after=(), thread: bool = False):
+        """Declara un paso. func es async, o síncrona si thread=True (se ejecuta en un hilo)"""
+        self.steps[name] = BootStep(name, func, after, thread)
+        return self
+
+    async def _run_step(self, step: BootStep):
+        for dependency in step.after:
+            await self.steps[dependency].done.wait()
+        step.started_at = time.perf_counter()
+        try:
+            if step.thread:
+                await asyncio.to_thread(step.func)
+            else:
+                await step.func()
+        except Exception as e:
+            step.error = e
+        finally:
+            step.duration = time.perf_counter() - step.started_at
+            step.done.set()
+            metrics.set_gauge("boot_step_seconds", round(step.duration, 4), bot=self.name, step=step.name)
+            self._check_ready()
+
+    def _check_ready(self):
+        if self.ready_at is not None:
+            return
+        if all(self.steps[name].done.is_set() for name in self.ready_after if name in self.steps):
+            self.ready_at = time.perf_counter()
+            metrics.set_gauge("boot_ready_seconds", round(self.ready_at - self.started_at, 4), bot=self.name)
+            self.ready.set()
+
+    async def run(self):
+        """Ejecuta todos los pasos y devuelve el desglose de tiempos"""
+        for step in self.steps.values():
+            missing = [name for name in step.after if name not in self.steps]
+            if missing:
+                raise ValueError(f"Paso '{step.name}' depende de pasos inexistentes: {missing}")
+        self.started_at = time.perf_counter()
+        self._check_ready()
+        await asyncio.gather(*(self._run_step(step) for step in self.steps.values()))
+        self._check_ready()
+        return self.report()
+
+    def report(self) -> dict:
+        """Desglose por paso: inicio relativo, duración y error (en milisegundos)"""
+        result = {}
+        for step in self.steps.values():
+            result[step.name] = {
+                "start_ms": None if step.started_at is None else round((step.started_at - self.started_at) * 1000, 1),
+                "duration_ms": None if step.duration is None else round(step.duration * 1000, 1),
+                "error": None if step.error is None else str(step.error),
+            }
+        if self.ready_at is not None:
+            result["ready"] = {"start_ms": round((self.ready_at - self.started_at) * 1000, 1), "duration_ms": 0, "error": None}
+        return result
+
+    def summary(self) -> str:
+        """Resumen de una línea para el log"""
+        parts = []
+        for name, data in self.report().items():
+            if name == "ready":
+                continue
+            status = "" if data["error"] is None else " ERROR"
+            parts.append(f"{name}={data['duration_ms']}ms{status}")
+        ready = f"ready en {(self.ready_at - self.started_at) * 1000:.0f}ms" if self.ready_at else "sin ready"
+        return f"{self.name}: {ready} | " + ", ".join(parts)
@@ -0,0 +1,161 @@
+"""Registro de tareas en segundo plano: una instancia viva por nombre, reinicio con backoff y apagado limpio"""
+
+import asyncio
+import random
+import time
+import weakref
+
+import instrumentation
+import metrics
+
+RESTART_BASE_DELAY = 1.0      # segundos antes del primer reinicio
+RESTART_MAX_DELAY = 60.0
+RESTART_JITTER = 0.2
+STABLE_RUNTIME = 60.0         # tras este tiempo sin fallar se reinicia el backoff
+CANCEL_TIMEOUT = 5.0
+
+_registries = weakref.WeakSet()
+
+
+class TaskEntry:
+    """Estado de una tarea registrada"""
+
+    __slots__ = ("name", "factory", "restart", "task", "started_at", "run_started",
+                 "ended_at", "restarts", "last_error", "compute", "state")
+
+    def __init__(self, name: str, factory, restart: bool):
+        self.name = name
+        self.factory = factory
+        self.restart = restart
+        self.task = None
+        self.started_at = None
+        self.run_started = None
+        self.ended_at = None
+        self.restarts = 0
+        self.last_error = None
+        self.compute = 0.0            # segundos de CPU en el event loop (acumulado)
+        self.state = "pending"
+
+    def alive(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+class TaskRegistry:
+    """Garantiza una sola tarea viva por nombre.
+
+    start() con un nombre que ya tiene tarea viva devuelve la existente en lugar de lanzar
+    otra copia, así que on_start y las reconexiones pueden llamarlo sin duplicar bucles.
+    """
+
+    def __init__(self, owner: str, logger=print):
+        self.owner = owner
+        self.logger = logger
+        self.entries = {}
+        _registries.add(self)
+
+    def start(self, name: str, factory, restart: bool = True) -> asyncio.Task:
+        """Lanza factory() como tarea `name` si no hay una viva; factory devuelve una corrutina"""
+        entry = self.entries.get(name)
+        if entry is not None and entry.alive():
+            return entry.task
+        if entry is None:
+            entry = self.entries[name] = TaskEntry(name, factory, restart)
+        else:
+            entry.factory = factory
+            entry.restart = restart
+        entry.started_at = time.time()
+        entry.ended_at = None
+        entry.task = asyncio.create_task(instrumentation.untraced(self._supervise(entry)), name=f"{self.owner}:{name}")
+        return entry.task
+
+    def is_running(self, name: str) -> bool:
+        entry = self.entries.get(name)
+        return entry is not None and entry.alive()
+
+    async def _supervise(self, entry: TaskEntry):
+        try:
+            await self._run(entry)
+        finally:
+            entry.ended_at = time.time()
+
+    async def _run(self, entry: TaskEntry):
+        failures = 0
+        while True:
+            entry.state = "running"
+            entry.run_started = time.perf_counter()
+            try:
+                await instrumentation.TimedCoroutine(entry.factory(), entry)
+                entry.state = "finished"
+                return
+            except asyncio.CancelledError:
+                entry.state = "cancelled"
+                raise
+            except Exception as e:
+                entry.last_error = f"{type(e).__name__}: {e}"
+                if not entry.restart:
+                    entry.state = "failed"
+                    self.logger(f"Tarea {entry.name} terminó con error: {entry.last_error}")
+                    return
+
+            if time.perf_counter() - entry.run_started >= STABLE_RUNTIME:
+                failures = 0
+            failures += 1
+            entry.restarts += 1
+            metrics.inc("background_task_restarts_total", task=entry.name)
+            delay = min(RESTART_MAX_DELAY, RESTART_BASE_DELAY * 2 ** (failures - 1))
+            delay *= 1 + random.uniform(-RESTART_JITTER, RESTART_JITTER)
+            entry.state = "backoff"
+            self.logger(f"Tarea {entry.name} falló ({entry.last_error}), reinicio en {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def cancel(self, name: str) -> bool:
+        """Cancela la tarea `name` si está viva"""
+        entry = self.entries.get(name)
+        if entry is None or not entry.alive():
+            return False
+        entry.task.cancel()
+        return True
+
+    def cancel_nowait(self):
+        """Cancela todas las tareas sin esperar (para manejadores de señales)"""
+        for entry in self.entries.values():
+            if entry.alive():
+                entry.task.cancel()
+
+    async def cancel_all(self, timeout: float = CANCEL_TIMEOUT):
+        """Cancela todas las tareas y espera a que terminen"""
+        tasks = [entry.task for entry in self.entries.values() if entry.alive()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def snapshot(self) -> list:
+        """Lista de tareas con estado, reinicios y tiempo de CPU/espera (segundos)"""
+        now = time.time()
+        result = []
+        for entry in self.entries.values():
+            state = entry.state
+            uptime = (entry.ended_at or now) - entry.started_at if entry.started_at else 0.0
+            result.append({
+                "name": entry.name,
+                "state": state,
+                "restarts": entry.restarts,
+                "uptime_s": round(uptime, 1),
+                "cpu_s": round(entry.compute, 3),
+                "await_s": round(max(0.0, uptime - entry.compute), 1),
+                "last_error": entry.last_error,
+            })
+        return result
+
+    def collect_metrics(self):
+        """Collector para metrics: tareas vivas y CPU acumulada por tarea"""
+        metrics.set_gauge("background_tasks", sum(1 for e in self.entries.values() if e.alive()), bot=self.owner)
+        for entry in self.entries.values():
+            metrics.set_gauge("background_task_cpu_seconds", round(entry.compute, 3), bot=self.owner, task=entry.name)
+
+
+def cancel_everything():
+    """Cancela las tareas de todos los registros del proceso"""
+    for registry in list(_registries):
+        registry.cancel_nowait()
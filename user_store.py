@@ -0,0 +1,265 @@
+"""Almacén de usuarios por niveles: los activos en memoria, los inactivos en un archivo SQLite
+
+Los diccionarios calientes (USER_INFO, USER_HEARTS, USER_ACTIVITY) siguen siendo los de main.py;
+este módulo solo mueve usuarios entre ellos y el archivo. Un usuario está en un nivel o en
+el otro: si tras una caída aparece en ambos, gana la copia en memoria.
+"""
+
+import asyncio
+import heapq
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import metrics
+
+ARCHIVE_BATCH = 1000          # usuarios por transacción al archivar
+ARCHIVE_INTERVAL = 3600       # segundos entre pasadas de archivado
+DEFAULT_MAX_AGE_DAYS = 90
+IN_CHUNK = 500                # ids por consulta "IN (...)" (SQLite antiguo admite 999 parámetros)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id   TEXT PRIMARY KEY,
+    username  TEXT,
+    hearts    INTEGER NOT NULL DEFAULT 0,
+    messages  INTEGER NOT NULL DEFAULT 0,
+    last_seen REAL NOT NULL DEFAULT 0,
+    record    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_hearts ON users (hearts);
+CREATE INDEX IF NOT EXISTS users_messages ON users (messages);
+"""
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"No serializable: {type(value).__name__}")
+
+
+def _decode(obj):
+    if len(obj) == 1 and "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+class UserArchive:
+    """Nivel frío: una fila por usuario con columnas para ranking y el registro completo en JSON"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Se abre en el hilo de arranque y se usa después desde el event loop, nunca a la vez
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Filas del archivo: se cuentan una vez al abrir y se ajustan en cada cambio (para métricas)
+        self.count = self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def put_many(self, rows: list):
+        """rows: (user_id, username, hearts, messages, last_seen, record)"""
+        ids = list(dict.fromkeys(row[0] for row in rows))
+        existing = 0
+        for start in range(0, len(ids), IN_CHUNK):
+            batch = ids[start:start + IN_CHUNK]
+            existing += self.conn.execute(
+                f"SELECT COUNT(*) FROM users WHERE user_id IN ({','.join('?' * len(batch))})", batch
+            ).fetchone()[0]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?)",
+                [(uid, name, hearts, messages, last_seen, json.dumps(record, default=_encode, ensure_ascii=False))
+                 for uid, name, hearts, messages, last_seen, record in rows],
+            )
+        self.count += len(ids) - existing
+
+    def take(self, user_id: str) -> dict | None:
+        """Saca a un usuario del archivo y devuelve su registro"""
+        row = self.conn.execute("SELECT record FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        with self.conn:
+            self.conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+        self.count -= 1
+        return json.loads(row[0], object_hook=_decode)
+
+    def archived_at(self, user_ids) -> dict:
+        """{user_id: momento en que se archivó} de los indicados que están en el archivo y lo tienen anotado"""
+        user_ids = list(user_ids)
+        result = {}
+        for start in range(0, len(user_ids), IN_CHUNK):
+            batch = user_ids[start:start + IN_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT user_id, record FROM users WHERE user_id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            for user_id, record in rows:
+                archived = json.loads(record).get("archived_at")
+                if archived is not None:
+                    result[user_id] = archived
+        return result
+
+    def discard_many(self, user_ids) -> int:
+        with self.conn:
+            cursor = self.conn.executemany("DELETE FROM users WHERE user_id = ?", ((uid,) for uid in user_ids))
+        self.count -= cursor.rowcount
+        return cursor.rowcount
+
+    def top(self, column: str, limit: int) -> list:
+        """[(user_id, username, valor)] ordenado de mayor a menor"""
+        if column not in ("hearts", "messages"):
+            raise ValueError(column)
+        return self.conn.execute(
+            f"SELECT user_id, username, {column} FROM users ORDER BY {column} DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def totals(self) -> tuple:
+        """(usuarios, corazones, mensajes). Recorre todo el archivo: solo para !stats"""
+        count, hearts, messages = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hearts), 0), COALESCE(SUM(messages), 0) FROM users"
+        ).fetchone()
+        return count, hearts, messages
+
+    def close(self):
+        self.conn.close()
+
+
+class TieredUsers:
+    """Coordina los diccionarios calientes con el archivo frío"""
+
+    def __init__(self, info: dict, hearts: dict, activity: dict, names):
+        self.info = info
+        self.hearts = hearts
+        self.activity = activity
+        self.names = names
+        self.archive = None
+        self.max_age_days = DEFAULT_MAX_AGE_DAYS
+        self.faults = 0
+
+    def open(self, path: str, max_age_days: float = DEFAULT_MAX_AGE_DAYS) -> int:
+        """Abre el archivo y descarta las filas de usuarios que ya están en memoria"""
+        self.max_age_days = max_age_days
+        if self.archive is None:
+            self.archive = UserArchive(path)
+        hot = set(self.info) | set(self.hearts) | set(self.activity)
+        return self.archive.discard_many(hot) if hot else 0
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def is_resident(self, user_id: str) -> bool:
+        return user_id in self.info or user_id in self.hearts or user_id in self.activity
+
+    def archived_at(self, user_ids) -> dict:
+        """{user_id: momento en que se archivó} de los indicados que solo están en el archivo"""
+        if self.archive is None:
+            return {}
+        return self.archive.archived_at(uid for uid in set(user_ids) if not self.is_resident(uid))
+
+    def ensure(self, user_id: str) -> bool:
+        """Trae al usuario a memoria si está archivado. Devuelve True si hubo que cargarlo"""
+        if self.archive is None or self.is_resident(user_id):
+            return False
+        record = self.archive.take(user_id)
+        if record is None:
+            return False
+        if record.get("info") is not None:
+            self.info[user_id] = record["info"]
+        if record.get("hearts") is not None:
+            self.hearts[user_id] = record["hearts"]
+        if record.get("activity") is not None:
+            self.activity[user_id] = record["activity"]
+        if record.get("username"):
+            self.names[user_id] = record["username"]
+        self.faults += 1
+        metrics.inc("user_archive_faults_total")
+        return True
+
+    def _last_seen(self, user_id: str) -> float:
+        last_seen = 0.0
+        activity = self.activity.get(user_id)
+        if activity and isinstance(activity.get("last_activity"), datetime):
+            last_seen = activity["last_activity"].timestamp()
+        info = self.info.get(user_id)
+        if info:
+            joined = info.get("time_joined")
+            if isinstance(joined, (int, float)):
+                last_seen = max(last_seen, float(joined))
+            first_seen = info.get("first_seen")
+            if isinstance(first_seen, str):
+                try:
+                    first_seen = datetime.fromisoformat(first_seen)
+                except ValueError:
+                    first_seen = None
+            if isinstance(first_seen, datetime):
+                last_seen = max(last_seen, first_seen.timestamp())
+        return last_seen
+
+    async def archive_inactive(self, present=()) -> int:
+        """Mueve al archivo a los usuarios sin actividad en max_age_days (salvo los presentes)"""
+        if self.archive is None or self.max_age_days <= 0:
+            return 0
+        cutoff = time.time() - self.max_age_days * 86400
+        present = set(present)
+        candidates = [
+            uid for uid in set(self.info) | set(self.hearts) | set(self.activity)
+            if uid not in present and self._last_seen(uid) < cutoff
+        ]
+        moved = 0
+        for start in range(0, len(candidates), ARCHIVE_BATCH):
+            batch = candidates[start:start + ARCHIVE_BATCH]
+            rows = []
+            now = time.time()
+            for uid in batch:
+                info = self.info.get(uid)
+                activity = self.activity.get(uid)
+                username = (info or {}).get("username") or self.names.get(uid)
+                # archived_at: los cambios del diario anteriores ya están en esta copia
+                record = {"info": info, "hearts": self.hearts.get(uid), "activity": activity, "username": username,
+                          "archived_at": now}
+                rows.append((uid, username, self.hearts.get(uid, 0),
+                             (activity or {}).get("messages", 0), self._last_seen(uid), record))
+            self.archive.put_many(rows)
+            # Solo después de escribir el archivo se quitan de memoria
+            for uid in batch:
+                self.info.pop(uid, None)
+                self.hearts.pop(uid, None)
+                self.activity.pop(uid, None)
+            moved += len(batch)
+            await asyncio.sleep(0)
+        if moved:
+            metrics.inc("user_archive_moves_total", moved)
+        return moved
+
+    def top_hearts(self, limit: int = 10) -> list:
+        """[(user_id, corazones)] combinando memoria y archivo"""
+        hot = heapq.nlargest(limit, self.hearts.items(), key=lambda item: item[1])
+        cold = [(uid, value) for uid, _, value in self.archive.top("hearts", limit)] if self.archive else []
+        return heapq.nlargest(limit, hot + cold, key=lambda item: item[1])
+
+    def top_messages(self, limit: int = 10) -> list:
+        """[(user_id, mensajes)] combinando memoria y archivo"""
+        hot = heapq.nlargest(limit, ((uid, data["messages"]) for uid, data in self.activity.items()),
+                             key=lambda item: item[1])
+        cold = [(uid, value) for uid, _, value in self.archive.top("messages", limit)] if self.archive else []
+        return heapq.nlargest(limit, hot + cold, key=lambda item: item[1])
+
+    def totals(self) -> tuple:
+        """(corazones, mensajes) de todos los usuarios, en memoria y archivados"""
+        hearts = sum(self.hearts.values())
+        messages = sum(data.get("messages", 0) for data in self.activity.values())
+        if self.archive is not None:
+            _, cold_hearts, cold_messages = self.archive.totals()
+            hearts += cold_hearts
+            messages += cold_messages
+        return hearts, messages
+
+    def collect_metrics(self, **labels):
+        """Collector para metrics: usuarios en memoria y archivados"""
+        metrics.set_gauge("users_resident", len(self.info), **labels)
+        if self.archive is not None:
+            metrics.set_gauge("users_archived", self.archive.count, **labels)
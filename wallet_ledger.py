@@ -0,0 +1,122 @@
+"""Libro local de la billetera del bot: saldo en memoria con conciliación periódica contra get_wallet
+
+El saldo se mantiene con las propinas recibidas (on_tip) y las enviadas (tip_user), así que las
+consultas de saldo no necesitan ir a la API. Se concilia con get_wallet cada cierto tiempo,
+al arrancar y después de cualquier error o respuesta inesperada de tip_user.
+"""
+
+import asyncio
+import time
+
+from highrise.models import Error
+
+import metrics
+
+RECONCILE_INTERVAL = 600      # segundos entre conciliaciones programadas
+
+BAR_VALUES = {
+    "gold_bar_1": 1, "gold_bar_5": 5, "gold_bar_10": 10, "gold_bar_50": 50,
+    "gold_bar_100": 100, "gold_bar_500": 500, "gold_bar_1k": 1000,
+    "gold_bar_5000": 5000, "gold_bar_10k": 10000,
+}
+
+
+def bars_value(bars: str) -> int:
+    """Oro total de una cadena de barras separadas por comas ("gold_bar_5,gold_bar_1")"""
+    return sum(BAR_VALUES.get(bar, 0) for bar in bars.split(",") if bar)
+
+
+class WalletLedger:
+    """Saldo local de oro del bot"""
+
+    def __init__(self, client, fallback: int = 0, name: str = "", logger=print):
+        self._client = client             # callable que devuelve el cliente Highrise actual
+        self.fallback = fallback
+        self.labels = {"bot": name} if name else {}
+        self.logger = logger
+        self.balance = None
+        self.last_sync = None
+        self.needs_reconcile = True
+        self._changes = 0
+        self._lock = asyncio.Lock()
+
+    def credit(self, amount: int):
+        """Propina recibida"""
+        if self.balance is not None:
+            self.balance += amount
+            metrics.set_gauge("wallet_balance", self.balance, **self.labels)
+        self._changes += 1
+        metrics.inc("wallet_credits_total", amount)
+
+    def debit(self, amount: int):
+        """Propina enviada con éxito"""
+        if self.balance is not None:
+            self.balance -= amount
+            metrics.set_gauge("wallet_balance", self.balance, **self.labels)
+        self._changes += 1
+        metrics.inc("wallet_debits_total", amount)
+
+    async def reconcile(self) -> int:
+        """Consulta get_wallet y ajusta el saldo local. Devuelve el saldo resultante"""
+        async with self._lock:
+            changes = self._changes
+            try:
+                response = await self._client().get_wallet()
+            except Exception as e:
+                self.logger(f"Error conciliando billetera: {e}")
+                return self.current()
+            if isinstance(response, Error):
+                self.logger(f"Error conciliando billetera: {response.message}")
+                return self.current()
+
+            gold = next((item.amount for item in response.content if item.type == "gold"), None)
+            if gold is None and response.content:
+                gold = response.content[0].amount
+            if gold is None:
+                return self.current()
+
+            if self._changes != changes:
+                # Hubo movimientos durante la consulta: no se sabe si el servidor los incluye
+                self.needs_reconcile = True
+                return self.current()
+
+            if self.balance is not None and self.balance != gold:
+                metrics.inc("wallet_drift_total", abs(gold - self.balance))
+                self.logger(f"Billetera conciliada: local {self.balance}, servidor {gold}")
+            self.balance = gold
+            self.last_sync = time.time()
+            self.needs_reconcile = False
+            metrics.set_gauge("wallet_balance", gold, **self.labels)
+            return gold
+
+    def current(self) -> int:
+        return self.balance if self.balance is not None else self.fallback
+
+    async def get_balance(self) -> int:
+        """Saldo desde memoria; solo consulta la API si no hay saldo fiable"""
+        if self.balance is None or self.needs_reconcile:
+            return await self.reconcile()
+        return self.balance
+
+    async def tip(self, user_id: str, bars: str):
+        """tip_user con contabilidad local. Devuelve la respuesta de la API"""
+        amount = bars_value(bars)
+        # Una propina en vuelo invalida cualquier conciliación que se solape con ella
+        self._changes += 1
+        try:
+            result = await self._client().tip_user(user_id, bars)
+        except Exception:
+            self.needs_reconcile = True
+            raise
+        if result == "success":
+            self.debit(amount)
+        else:
+            # insufficient_funds o Error: el saldo local no es fiable
+            self.needs_reconcile = True
+        return result
+
+    async def reconcile_loop(self, interval: float = RECONCILE_INTERVAL):
+        """Tarea en segundo plano: conciliación programada"""
+        while True:
+            await self.reconcile()
+            await asyncio.sleep(interval)